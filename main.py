@@ -4,16 +4,9 @@ import sys
 import os
 import time
 
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon
-from nanosense.gui.main_window import AppWindow
-from nanosense.gui.splash_screen import SplashScreen
-from nanosense.gui.welcome_widget import WelcomeWidget
-import pyqtgraph as pg
-
-# 设置图表样式
-pg.setConfigOption('background', '#F0F0F0')
-pg.setConfigOption('foreground', '#E2E8F0')
+# 注意：Qt / pyqtgraph / GUI 模块只在下方 __main__ 分支中导入。
+# 并行处理的进程池使用 "spawn" 启动方式，每个工作进程都会重新导入本模块，
+# 放在模块顶层会让每个工作进程都加载一遍完整的 GUI。
 
 # 全局变量，用于持有对窗口的引用，防止被垃圾回收
 # 我们现在需要分别管理欢迎页和主程序窗口
@@ -74,6 +67,17 @@ def launch_main_app(mode_name, use_real_hardware):
         welcome_screen = None
 
 if __name__ == '__main__':
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QIcon
+    from nanosense.gui.main_window import AppWindow
+    from nanosense.gui.splash_screen import SplashScreen
+    from nanosense.gui.welcome_widget import WelcomeWidget
+    import pyqtgraph as pg
+
+    # 设置图表样式
+    pg.setConfigOption('background', '#F0F0F0')
+    pg.setConfigOption('foreground', '#E2E8F0')
+
     app = QApplication(sys.argv)
     #设置应用程序图标
     # 这段代码的目的是设置所有窗口左上角和任务栏的图标
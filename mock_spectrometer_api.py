@@ -18,6 +18,7 @@ class Wrapper:
         self.wavelengths = np.linspace(350, 950, 2048)
         self.device_count = 1
         self.start_time = time.time()  # 模拟开始的时间
+        self.scans_to_average = 1
 
     def _gaussian(self, x, amp, cen, wid):
         """高斯函数生成器"""
@@ -38,47 +39,51 @@ class Wrapper:
     def setIntegrationTime(self, index, time_ms):
         pass
 
-    def getSpectrum(self, index):
+    def setScansToAverage(self, index, num_scans):
+        """模拟硬件平均：噪声按 1/sqrt(N) 缩小。"""
+        self.scans_to_average = max(1, int(num_scans))
+
+    def _peak_positions(self, elapsed):
+        """动态模式下各时刻的峰位（elapsed 为秒数组，向量化分段计算）。"""
+        initial_pos = self.config.get('dynamic_initial_pos', 650.0)
+        total_shift = self.config.get('dynamic_shift_total', 10.0)
+        baseline_dur = self.config.get('dynamic_baseline_duration', 5)
+        assoc_dur = self.config.get('dynamic_assoc_duration', 20)
+        dissoc_dur = self.config.get('dynamic_dissoc_duration', 30)
+
+        assoc_end = baseline_dur + assoc_dur
+        dissoc_end = assoc_end + dissoc_dur
+        shift = np.select(
+            [elapsed < baseline_dur, elapsed < assoc_end, elapsed < dissoc_end],
+            [0.0,
+             total_shift * (elapsed - baseline_dur) / assoc_dur,
+             total_shift * (1 - (elapsed - assoc_end) / dissoc_dur)],
+            default=0.0,
+        )
+        return initial_pos + shift
+
+    def _render(self, elapsed):
         """
-        核心修改：根据配置文件中的模式，动态生成光谱。
+        按配置模式生成 len(elapsed) 条光谱，返回 (帧数, 像素数) 数组。
+        所有帧在一次广播运算中生成，供单帧与突发采集共用。
         """
+        elapsed = np.atleast_1d(np.asarray(elapsed, dtype=np.float64))
+        shape = (len(elapsed), len(self.wavelengths))
         mode = self.config.get('mode', 'dynamic')
-        noise_level = self.config.get('noise_level', 50.0)
-        noise = np.random.normal(0, noise_level, len(self.wavelengths))
+        noise_level = self.config.get('noise_level', 50.0) / np.sqrt(self.scans_to_average)
+        noise = np.random.normal(0, noise_level, shape)
 
         # 模式一：动态动力学
         if mode == 'dynamic':
-            elapsed_time = time.time() - self.start_time
-            current_peak_pos = self.config.get('dynamic_initial_pos', 650.0)
-            initial_pos = self.config.get('dynamic_initial_pos', 650.0)
-            total_shift = self.config.get('dynamic_shift_total', 10.0)
-            baseline_dur = self.config.get('dynamic_baseline_duration', 5)
-            assoc_dur = self.config.get('dynamic_assoc_duration', 20)
-            dissoc_dur = self.config.get('dynamic_dissoc_duration', 30)
-
-            if elapsed_time < baseline_dur:
-                current_peak_pos = initial_pos
-            elif elapsed_time < baseline_dur + assoc_dur:
-                time_in_phase = elapsed_time - baseline_dur
-                shift = total_shift * (time_in_phase / assoc_dur)
-                current_peak_pos = initial_pos + shift
-            elif elapsed_time < baseline_dur + assoc_dur + dissoc_dur:
-                time_in_phase = elapsed_time - (baseline_dur + assoc_dur)
-                shift = total_shift * (1 - (time_in_phase / dissoc_dur))
-                current_peak_pos = initial_pos + shift
-            else:
-                current_peak_pos = initial_pos
-
-            intensity = self._gaussian(self.wavelengths, 15000, current_peak_pos, 10)
-            return intensity + noise
+            centers = self._peak_positions(elapsed)[:, None]
+            return self._gaussian(self.wavelengths, 15000, centers, 10) + noise
 
         # 模式二：静态峰
         elif mode == 'static':
             amp = self.config.get('static_peak_amp', 15000.0)
             pos = self.config.get('static_peak_pos', 650.0)
             width = self.config.get('static_peak_width', 10.0)
-            intensity = self._gaussian(self.wavelengths, amp, pos, width)
-            return intensity + noise
+            return self._gaussian(self.wavelengths, amp, pos, width) + noise
 
         # 模式三：纯噪声基线
         elif mode == 'noisy_baseline':
@@ -87,4 +92,18 @@ class Wrapper:
 
         # 默认情况
         else:
-            return np.zeros_like(self.wavelengths)
\ No newline at end of file
+            return np.zeros(shape)
+
+    def getSpectrum(self, index):
+        """
+        核心修改：根据配置文件中的模式，动态生成光谱。
+        """
+        return self._render(time.time() - self.start_time)[0]
+
+    def getSpectrumBurst(self, index, num_frames, interval_ms=0.0):
+        """
+        模拟驱动的突发采集：一次返回 (num_frames, 像素数) 数组，
+        第 k 帧对应 k * interval_ms 之后的时刻。用于离线评估突发采集吞吐。
+        """
+        offsets = np.arange(int(num_frames)) * (float(interval_ms) / 1000.0)
+        return self._render(time.time() - self.start_time + offsets)
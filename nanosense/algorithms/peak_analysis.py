@@ -1,8 +1,13 @@
 # nanosense/algorithms/peak_analysis.py
 
+import time
+
 import numpy as np
 from scipy.signal import find_peaks
 from scipy.optimize import curve_fit
+from scipy.stats import skew
+
+from .peak_fitting import fit_peaks, fit_peaks_batch
 
 PEAK_METHOD_LABELS = {
     'highest_point': 'Highest Point',
@@ -11,9 +16,22 @@ PEAK_METHOD_LABELS = {
     'parabolic': 'Parabolic Interpolation',
     'wavelet': 'Wavelet Transform',
     'threshold': 'Threshold-based',
+    'gaussian_3point': 'Gaussian 3-Point',
+    'centroid_window': 'Windowed Centroid',
+    'lorentzian_fit': 'Lorentzian Fit',
+    'voigt_fit': 'Pseudo-Voigt Fit',
 }
 PEAK_METHOD_KEYS = tuple(PEAK_METHOD_LABELS.keys())
 
+# 由多峰拟合引擎（单峰 + 常数基线）实现的寻峰方法及其线型
+FIT_PEAK_SHAPES = {
+    'lorentzian_fit': 'lorentzian',
+    'voigt_fit': 'pseudo_voigt',
+}
+
+# np.trapz 在 NumPy 2 中更名为 np.trapezoid
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
 
 def find_spectral_peaks(y_data, min_height=None, min_distance=None):
     """
@@ -27,48 +45,144 @@ def find_spectral_peaks(y_data, min_height=None, min_distance=None):
         print(f"寻峰时发生错误: {e}")
         return np.array([]), {}
 
-def calculate_fwhm(x_data, y_data, peak_indices):
+FWHM_BASELINES = ('global', 'local')
+
+
+def _segment_argmin(flat, starts, stops):
+    """flat 中各 [start, stop) 段（非空）最小值的位置：拼接各段后用 reduceat 一次求出。"""
+    lengths = stops - starts
+    offsets = np.cumsum(lengths) - lengths
+    owner = np.repeat(np.arange(lengths.size), lengths)
+    positions = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+    values = flat[positions]
+    minima = np.minimum.reduceat(values, offsets)
+    # 每段取第一个等于最小值的位置
+    candidates = np.where(values == minima[owner], positions, np.iinfo(np.intp).max)
+    return np.minimum.reduceat(candidates, offsets)
+
+
+def _local_baseline(x_data, matrix, rows, peaks, window):
     """
-    手动计算在一组峰值处的半峰全宽 (FWHM)。
+    各峰的局部基线：峰左右两侧（到相邻峰或 window 个点为止）谷底的连线在峰位处的值。
+    rows/peaks 须按 (行, 峰位) 升序排列；某侧为空（峰在端点）时只用另一侧的谷底。
+    """
+    n_points = matrix.shape[1]
+    flat = matrix.ravel()
+    same_row_prev = np.r_[False, rows[1:] == rows[:-1]]
+    same_row_next = np.r_[rows[1:] == rows[:-1], False]
+    previous = np.where(same_row_prev, np.r_[0, peaks[:-1]], 0)
+    following = np.where(same_row_next, np.r_[peaks[1:], 0], n_points - 1)
+    if window is not None:
+        previous = np.maximum(previous, peaks - int(window))
+        following = np.minimum(following, peaks + int(window))
+    base = rows * n_points
+    # 左侧 [previous, peak)、右侧 (peak, following]
+    left = np.full(peaks.size, -1, dtype=np.intp)
+    right = np.full(peaks.size, -1, dtype=np.intp)
+    has_left, has_right = previous < peaks, following > peaks
+    if has_left.any():
+        left[has_left] = _segment_argmin(flat, (base + previous)[has_left], (base + peaks)[has_left]) - base[has_left]
+    if has_right.any():
+        right[has_right] = _segment_argmin(
+            flat, (base + peaks + 1)[has_right], (base + following + 1)[has_right]) - base[has_right]
+    left = np.where(has_left, left, right)
+    right = np.where(has_right, right, left)
+    reference = np.full(peaks.size, np.nan)
+    sided = left >= 0
+    r, lo, hi, p = rows[sided], left[sided], right[sided], peaks[sided]
+    y_lo, y_hi = matrix[r, lo], matrix[r, hi]
+    span = x_data[hi] - x_data[lo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(span != 0, (y_hi - y_lo) / span, 0.0)
+    reference[sided] = y_lo + slope * (x_data[p] - x_data[lo])
+    return reference
+
+
+def half_max_crossings(x_data, matrix, peak_indices, baseline='global', window=None):
+    """
+    【半高交点】一次求出一批光谱中所有峰左右两侧半高处的线性插值交点。
+
+    参数:
+    matrix: (光谱数, 点数) 矩阵，或单条光谱。
+    peak_indices: (光谱数, 峰数) 峰位下标（单条光谱时为一维），-1 表示空位。
+    baseline: 'global' 以整条光谱的最小值为基线（与原 calculate_fwhm 相同）；
+              'local' 以峰两侧（到相邻峰或 window 个点为止）谷底的连线为基线，
+              适用于倾斜基线和重叠峰。
+
     返回:
-    list: 包含每个峰对应FWHM值的列表。
+    tuple: (left, right, half_levels)，形状与 peak_indices 相同；找不到交点时为 NaN。
     """
-    fwhms = []
-    for peak_idx in peak_indices:
-        try:
-            peak_height = y_data[peak_idx]
-            baseline = np.min(y_data)  # 简单以最低点为基线
-            half_max_height = baseline + (peak_height - baseline) / 2.0
-
-            # 寻找左边界
-            left_side = y_data[:peak_idx]
-            # 找到所有低于半高值的点，取最后一个
-            left_cross_indices = np.where(left_side < half_max_height)[0]
-            if not left_cross_indices.any():
-                fwhms.append(0)
-                continue
-            left_idx = left_cross_indices[-1]
-
-            # 寻找右边界
-            right_side = y_data[peak_idx:]
-            # 找到所有低于半高值的点，取第一个
-            right_cross_indices = np.where(right_side < half_max_height)[0]
-            if not right_cross_indices.any():
-                fwhms.append(0)
-                continue
-            right_idx = right_cross_indices[0] + peak_idx
-
-            # 使用线性插值来获得更精确的边界点
-            left_wl = np.interp(half_max_height, [y_data[left_idx], y_data[left_idx + 1]],
-                                [x_data[left_idx], x_data[left_idx + 1]])
-            right_wl = np.interp(half_max_height, [y_data[right_idx], y_data[right_idx - 1]],
-                                 [x_data[right_idx], x_data[right_idx - 1]])
-
-            fwhms.append(abs(right_wl - left_wl))
-        except Exception:
-            fwhms.append(0)  # 如果计算出错，则记为0
+    if baseline not in FWHM_BASELINES:
+        raise ValueError(f"未知的基线类型: {baseline}，可选 {FWHM_BASELINES}")
+    x_data = np.asarray(x_data, dtype=np.float64)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    peak_indices = np.asarray(peak_indices)
+    single = matrix.ndim == 1
+    matrix = np.atleast_2d(matrix)
+    peak_indices = peak_indices.reshape(1, -1) if single else np.atleast_2d(peak_indices)
+    n_rows, n_points = matrix.shape
+    if x_data.shape != (n_points,) or peak_indices.shape[0] != n_rows:
+        raise ValueError("x_data、光谱矩阵与峰位下标的形状不一致。")
+
+    shape = peak_indices.shape
+    left_x = np.full(shape, np.nan)
+    right_x = np.full(shape, np.nan)
+    levels = np.full(shape, np.nan)
+    valid = (peak_indices >= 0) & (peak_indices < n_points)
+    rows, slots = np.nonzero(valid)
+    peaks = peak_indices[rows, slots].astype(np.intp)
+    if peaks.size:
+        order = np.lexsort((peaks, rows))
+        rows, slots, peaks = rows[order], slots[order], peaks[order]
+        heights = matrix[rows, peaks]
+        if baseline == 'global':
+            reference = matrix.min(axis=1)[rows]
+        else:
+            reference = _local_baseline(x_data, matrix, rows, peaks, window)
+        half = reference + (heights - reference) / 2.0
+
+        # 左侧最后一个、右侧（含峰位）第一个低于半高的点
+        left = _scan_below(matrix, peaks - 1, half, step=-1, rows=rows)
+        right = _scan_below(matrix, peaks, half, step=1, rows=rows)
+        ok = (left >= 0) & (right < n_points) & (right > 0) & (left < n_points - 1)
+        rows, slots, half = rows[ok], slots[ok], half[ok]
+        left, right = left[ok], right[ok]
+        y_left, y_left_next = matrix[rows, left], matrix[rows, left + 1]
+        y_right, y_right_prev = matrix[rows, right], matrix[rows, right - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            left_x[rows, slots] = x_data[left] + (half - y_left) * (
+                (x_data[left + 1] - x_data[left]) / (y_left_next - y_left))
+            right_x[rows, slots] = x_data[right] + (half - y_right) * (
+                (x_data[right - 1] - x_data[right]) / (y_right_prev - y_right))
+        levels[rows, slots] = half
 
-    return fwhms
+    if single:
+        return left_x[0], right_x[0], levels[0]
+    return left_x, right_x, levels
+
+
+def calculate_fwhm_batch(x_data, matrix, peak_indices, baseline='global', window=None):
+    """
+    【批量FWHM】一批光谱中所有峰的半峰全宽，形状与 peak_indices 相同；无法计算时为 NaN。
+    参数含义见 half_max_crossings。
+    """
+    left, right, _ = half_max_crossings(x_data, matrix, peak_indices, baseline=baseline, window=window)
+    return np.abs(right - left)
+
+
+def calculate_fwhm(x_data, y_data, peak_indices, baseline='global', window=None):
+    """
+    手动计算在一组峰值处的半峰全宽 (FWHM)。
+    baseline 为 'global'（以最低点为基线）或 'local'（以两侧谷底为基线），见 half_max_crossings。
+    返回:
+    list: 包含每个峰对应FWHM值的列表（无法计算的峰记为0）。
+    """
+    try:
+        peak_indices = np.asarray(peak_indices, dtype=np.intp).ravel()
+        fwhms = calculate_fwhm_batch(x_data, np.asarray(y_data), peak_indices, baseline=baseline, window=window)
+    except Exception:
+        return [0] * len(peak_indices)
+    return [float(value) if np.isfinite(value) else 0 for value in fwhms]
 
 def find_main_resonance_peak(y_data, wavelengths=None, min_height=None, min_distance=None, method='highest_point'):
     """
@@ -149,6 +263,35 @@ def find_main_resonance_peak(y_data, wavelengths=None, min_height=None, min_dist
     return main_peak_original_index, main_peak_properties
 
 
+def find_main_resonance_peaks_batch(matrix):
+    """
+    【批量主共振峰】对 (光谱数, 点数) 矩阵的每一行取最高的内部局部极大值下标，
+    与逐条调用 find_main_resonance_peak(y)（不限高度与间距）的结果一致：端点不算峰，
+    没有内部极大值的行（单调、平坦）记为 -1。相邻点相等（平台峰）或含非有限值的行逐条回退。
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    n_rows, n_points = matrix.shape
+    indices = np.full(n_rows, -1, dtype=np.intp)
+    if n_rows == 0 or n_points < 3:
+        return indices
+
+    inner = matrix[:, 1:-1]
+    is_peak = (inner > matrix[:, :-2]) & (inner > matrix[:, 2:])
+    candidates = np.where(is_peak, inner, -np.inf)
+    best = np.argmax(candidates, axis=1)
+    found = is_peak[np.arange(n_rows), best]
+    indices[found] = best[found] + 1
+
+    # 平台峰（find_peaks 取平台中点）只有不低于当前最高候选时才可能改变结果：这些行与含 NaN 的行交给 scipy
+    height = candidates[np.arange(n_rows), best]
+    flat = matrix[:, 1:] == matrix[:, :-1]
+    fallback = np.any(flat & (matrix[:, 1:] >= height[:, None]), axis=1) | ~np.all(np.isfinite(matrix), axis=1)
+    for row in np.flatnonzero(fallback):
+        index, _ = find_main_resonance_peak(matrix[row])
+        indices[row] = -1 if index is None else index
+    return indices
+
+
 def calculate_centroid(wavelengths, intensities):
     """
     计算光谱峰的质心。
@@ -225,8 +368,11 @@ def fit_peak_gaussian(wavelengths, intensities):
         center_guess_index = np.argmax(intensities)
         center_guess = wavelengths[center_guess_index]
         amplitude_guess = np.max(intensities)
-        # 粗略估计峰宽
-        sigma_guess = (wavelengths[-1] - wavelengths[0]) / 10
+        # 由半高宽估计峰宽（FWHM = 2.355 sigma），比按范围的 1/10 猜测更接近真实值、收敛更稳
+        left, right = _half_max_bounds(np.asarray(intensities, dtype=np.float64), center_guess_index)
+        sigma_guess = abs(wavelengths[right] - wavelengths[left]) / 2.355
+        if not sigma_guess > 0:
+            sigma_guess = (wavelengths[-1] - wavelengths[0]) / 10
 
         # 使用scipy的curve_fit进行拟合
         popt, pcov = curve_fit(
@@ -292,6 +438,13 @@ def estimate_peak_position(wavelengths, intensities, method='highest_point'):
             center = float(fit_results['center'])
             approx_index = int(np.argmin(np.abs(wavelengths_arr - center)))
             return approx_index, center
+
+        if method_key in FIT_PEAK_SHAPES:
+            center = _fit_peak_centers(wavelengths_arr, intensities_arr[None, :], FIT_PEAK_SHAPES[method_key])[0]
+            if not np.isfinite(center):
+                return None, None
+            approx_index = int(np.argmin(np.abs(wavelengths_arr - center)))
+            return approx_index, float(center)
             
         if method_key == 'parabolic':
             # 二次多项式拟合寻峰
@@ -315,6 +468,16 @@ def estimate_peak_position(wavelengths, intensities, method='highest_point'):
             else:
                 return index, float(wavelengths_arr[index])
 
+        if method_key == 'gaussian_3point':
+            index = int(np.argmax(intensities_arr))
+            return index, gaussian_3point(wavelengths_arr, intensities_arr, index)
+
+        if method_key == 'centroid_window':
+            center = centroid_window(wavelengths_arr, intensities_arr)
+            if center is None:
+                return None, None
+            return int(_nearest_indices(wavelengths_arr.astype(np.float64), [center])[0]), center
+
         if method_key == 'wavelet':
             # 小波变换寻峰
             try:
@@ -382,6 +545,587 @@ def estimate_peak_position(wavelengths, intensities, method='highest_point'):
     return None, None
 
 
+
+# 可以整批向量化的寻峰方法；其余方法在 estimate_peak_positions_batch 中逐条回退
+BATCH_PEAK_METHODS = ('highest_point', 'parabolic', 'gaussian_3point', 'centroid', 'threshold',
+                      'lorentzian_fit', 'voigt_fit')
+
+
+def _fit_peak_centers(wavelengths, matrix, shape):
+    """以各行最高点为初值拟合单峰 + 常数基线，返回拟合中心（失败为 NaN）。"""
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape[1] < 5:
+        return np.full(matrix.shape[0], np.nan)
+    top = np.argmax(matrix, axis=1)
+    result = fit_peaks_batch(wavelengths, matrix, wavelengths[top][:, None], shape=shape)
+    center = result['center'][:, 0]
+    ok = np.isfinite(result['residual_rms']) & (result['amplitude'][:, 0] > 0)
+    return np.where(ok, center, np.nan)
+
+
+def _nearest_indices(wavelengths, values):
+    """与 np.argmin(np.abs(wavelengths - value)) 相同的最近点下标（并列时取靠前者），按行向量化。"""
+    values = np.asarray(values, dtype=np.float64)
+    if wavelengths.size > 1 and np.all(np.diff(wavelengths) > 0):
+        right = np.clip(np.searchsorted(wavelengths, values), 1, wavelengths.size - 1)
+        left = right - 1
+        use_right = np.abs(wavelengths[right] - values) < np.abs(values - wavelengths[left])
+        return np.where(use_right, right, left)
+    return np.array([int(np.argmin(np.abs(wavelengths - value))) for value in values], dtype=np.intp)
+
+
+def _vertex_3point(x0, x1, x2, y0, y1, y2):
+    """过三点的抛物线 y = a x^2 + b x + c 的顶点 -b / (2a) 与二次项系数 a（x 可非均匀，可按数组向量化）。"""
+    denom = (x0 - x1) * (x0 - x2) * (x1 - x2)
+    a = (x2 * (y1 - y0) + x1 * (y0 - y2) + x0 * (y2 - y1)) / denom
+    b = (x2 ** 2 * (y0 - y1) + x1 ** 2 * (y2 - y0) + x0 ** 2 * (y1 - y2)) / denom
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vertex = -b / (2 * a)
+    return vertex, a
+
+
+def _scan_below(matrix, start, level, step, block=64, rows=None):
+    """
+    从每行的 start 列起按 step（+1 向右 / -1 向左）方向寻找第一个低于 level 的列，按行向量化。
+    每轮只读取一小段（长度逐轮加倍），窄峰通常一两轮即可结束，而不必比较整行。
+    rows 指定每个起点所在的行（同一行可有多个起点），默认每行一个。
+    找不到时返回 -1（向左）或点数（向右）。
+    """
+    n_points = matrix.shape[1]
+    rows = np.arange(matrix.shape[0]) if rows is None else rows
+    found_at = np.full(len(start), -1 if step < 0 else n_points, dtype=np.intp)
+    pending = np.flatnonzero((start >= 0) & (start < n_points))
+    offset = 0
+    while pending.size:
+        columns = start[pending, None] + step * (offset + np.arange(block))
+        inside = (columns >= 0) & (columns < n_points)
+        values = matrix[rows[pending, None], np.clip(columns, 0, n_points - 1)]
+        hit = inside & (values < level[pending, None])
+        found = hit.any(axis=1)
+        found_at[pending[found]] = columns[found, np.argmax(hit[found], axis=1)]
+        pending = pending[~found & inside[:, -1]]
+        offset += block
+        block *= 2
+    return found_at
+
+
+def estimate_peak_positions_batch(wavelengths, matrix, method='highest_point'):
+    """
+    【批量寻峰】对 (光谱数, 点数) 矩阵的每一行估计峰位，结果与逐条调用 estimate_peak_position 一致。
+    highest_point / parabolic / gaussian_3point（三点顶点闭式解）/ centroid / threshold 整批向量化，
+    lorentzian_fit / voigt_fit 用批量拟合引擎一次求解所有行，其余方法逐条回退。
+
+    返回:
+    tuple: (indices, peak_wavelengths)，int 数组与 float 数组；无法确定峰位的行为 -1 和 NaN。
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    n_rows, n_points = matrix.shape
+    if wavelengths.shape != (n_points,):
+        raise ValueError("波长数组长度必须与光谱点数一致。")
+    indices = np.full(n_rows, -1, dtype=np.intp)
+    peaks = np.full(n_rows, np.nan)
+    if n_rows == 0 or n_points == 0:
+        return indices, peaks
+
+    method_key = (method or 'highest_point').lower()
+    if method_key not in PEAK_METHOD_LABELS:
+        method_key = 'highest_point'
+    if method_key not in BATCH_PEAK_METHODS:
+        for row, intensities in enumerate(matrix):
+            index, peak = estimate_peak_position(wavelengths, intensities, method=method_key)
+            if peak is not None:
+                indices[row], peaks[row] = index, peak
+        return indices, peaks
+
+    rows = np.arange(n_rows)
+    top = np.argmax(matrix, axis=1)
+
+    if method_key == 'highest_point':
+        return top, wavelengths[top]
+
+    if method_key in FIT_PEAK_SHAPES:
+        center = _fit_peak_centers(wavelengths, matrix, FIT_PEAK_SHAPES[method_key])
+        valid = np.isfinite(center)
+        peaks[valid] = center[valid]
+        indices[valid] = _nearest_indices(wavelengths, center[valid])
+        return indices, peaks
+
+    if method_key == 'threshold':
+        # 超过 均值+标准差 的点中的最大值（即各连续区域最大值中的最大者）；没有则退回最高点
+        threshold = matrix.mean(axis=1) + matrix.std(axis=1)
+        above = matrix > threshold[:, None]
+        candidate = np.argmax(np.where(above, matrix, -np.inf), axis=1)
+        index = np.where(above.any(axis=1), candidate, top)
+        return index, wavelengths[index]
+
+    if method_key in ('parabolic', 'gaussian_3point'):
+        indices[:], peaks[:] = top, wavelengths[top]
+        inner = (top > 0) & (top < n_points - 1)
+        if not inner.any():
+            return indices, peaks
+        r, i = rows[inner], top[inner]
+        x0, x1, x2 = wavelengths[i - 1], wavelengths[i], wavelengths[i + 1]
+        y0, y1, y2 = matrix[r, i - 1], matrix[r, i], matrix[r, i + 1]
+        if method_key == 'parabolic':
+            vertex, a = _vertex_3point(x0, x1, x2, y0, y1, y2)
+            curved = a != 0
+        else:
+            positive = (y0 > 0) & (y1 > 0) & (y2 > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                logs = [np.where(positive, np.log(y), y) for y in (y0, y1, y2)]
+            vertex, a = _vertex_3point(x0, x1, x2, *logs)
+            curved = (a < 0) & np.isfinite(vertex)
+        r, vertex = r[curved], vertex[curved]
+        peaks[r] = vertex
+        indices[r] = _nearest_indices(wavelengths, vertex)
+        return indices, peaks
+
+    # centroid：半高（最小值与最大值的中点）区间内的强度加权平均波长，与 calculate_centroid 相同
+    if n_points < 3:
+        return indices, peaks
+    low = matrix.min(axis=1)
+    half = low + (matrix[rows, top] - low) / 2.0
+    # 峰左侧最后一个、右侧（含峰位）第一个低于半高的点；找不到时取两端
+    left = _scan_below(matrix, top - 1, half, step=-1).clip(min=0)
+    right = _scan_below(matrix, top, half, step=1).clip(max=n_points - 1)
+    # 只收集各行 [left, right] 区间内的点（拼接成一维）求加权和，避免处理整行
+    lengths = right - left + 1
+    owner = np.repeat(rows, lengths)
+    columns = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - left, lengths)
+    values = matrix[owner, columns]
+    denominator = np.bincount(owner, weights=values, minlength=n_rows)
+    moment = np.bincount(owner, weights=values * wavelengths[columns], minlength=n_rows)
+    valid = denominator != 0
+    center = moment[valid] / denominator[valid]
+    peaks[valid] = center
+    indices[valid] = _nearest_indices(wavelengths, center)
+    return indices, peaks
+
+
+# ---------------------------------------------------------------------------
+# 亚像素峰位跟踪器：每帧开销固定，供实时动力学在全帧率下使用
+# ---------------------------------------------------------------------------
+
+def _half_max_bounds(intensities, index):
+    """峰 index 左侧最后一个、右侧第一个低于半高（最小值与峰值的中点）的下标；找不到时取两端。"""
+    low = np.min(intensities)
+    below = intensities < low + (intensities[index] - low) / 2.0
+    left = np.flatnonzero(below[:index])
+    right = np.flatnonzero(below[index:])
+    return (int(left[-1]) if left.size else 0), (int(right[0]) + index if right.size else len(intensities) - 1)
+
+
+def gaussian_3point(wavelengths, intensities, index=None):
+    """
+    【高斯三点法】对最高点及其左右相邻点的强度取对数后过三点求抛物线顶点。
+    高斯峰的对数是严格的抛物线，因此比直接三点抛物线插值的偏差更小；开销与光谱长度无关（除 argmax 外）。
+    任一点强度不为正时退回到直接三点抛物线；最高点在两端或曲率不为负时返回最高点波长。
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    intensities = np.asarray(intensities, dtype=np.float64)
+    if index is None:
+        index = int(np.argmax(intensities))
+    if index <= 0 or index >= len(intensities) - 1:
+        return float(wavelengths[index])
+    y = intensities[index - 1:index + 2]
+    if np.all(y > 0):
+        y = np.log(y)
+    vertex, a = _vertex_3point(*wavelengths[index - 1:index + 2], *y)
+    if not (a < 0 and np.isfinite(vertex)):
+        return float(wavelengths[index])
+    return float(vertex)
+
+
+def centroid_window(wavelengths, intensities, center=None, half_width=None, iterations=2):
+    """
+    【固定窗口质心】以 center（如上一帧峰位；为 None 时取最高点）为中心、±half_width（波长单位；
+    为 None 时取当前峰的半高全宽）的窗口内，对高于半高（窗口两端较低者与窗口峰值的中点）的部分求质心，
+    并按新质心重新取窗 iterations 次。窗口点数固定，每帧开销与光谱长度无关；利用了整个峰顶，
+    噪声低于三点法，且质心不受窗口位置偏差影响。窗口内没有高于半高的信号时返回 None。
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    intensities = np.asarray(intensities, dtype=np.float64)
+    n_points = len(intensities)
+    if n_points < 3:
+        return None
+    if center is None:
+        index = int(np.argmax(intensities))
+    else:
+        index = int(_nearest_indices(wavelengths, [center])[0])
+    if half_width is None:
+        left, right = _half_max_bounds(intensities, index)
+        half_points = max(1, right - left)
+    else:
+        pitch = abs(wavelengths[-1] - wavelengths[0]) / (n_points - 1)
+        half_points = max(1, int(round(half_width / pitch))) if pitch > 0 else 1
+
+    center = None
+    for _ in range(max(1, iterations)):
+        lo, hi = max(0, index - half_points), min(n_points - 1, index + half_points)
+        y = intensities[lo:hi + 1]
+        floor = min(y[0], y[-1])
+        weights = np.clip(y - (floor + (np.max(y) - floor) / 2.0), 0.0, None)
+        total = weights.sum()
+        if total <= 0:
+            return center
+        x = wavelengths[lo:hi + 1]
+        center = float(weights @ x / total)
+        index = lo + int(np.argmin(np.abs(x - center)))
+    return center
+
+
+def xcorr_shift(reference, intensities, max_lag=None):
+    """
+    【互相关位移】intensities 相对 reference 的位移（像素，正值表示向高下标移动）：
+    去均值后用 FFT 计算（循环）互相关，在 ±max_lag（默认长度的 1/4）内取最大值，再拟合峰顶附近的抛物线得到亚像素位移。
+    用到整段光谱的全部点，对噪声最不敏感；每帧开销 O(n log n)，与峰形无关。
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    intensities = np.asarray(intensities, dtype=np.float64)
+    n_points = len(reference)
+    if n_points < 3 or intensities.shape != reference.shape:
+        raise ValueError("互相关需要长度相同且至少 3 个点的光谱。")
+    if max_lag is None:
+        max_lag = n_points // 4
+    max_lag = int(np.clip(max_lag, 1, n_points - 2))
+    # 循环互相关：补零的线性互相关在去均值后随重叠长度变化，会把峰顶拉向零位移
+    spectrum = np.fft.rfft(intensities - intensities.mean())
+    spectrum *= np.conj(np.fft.rfft(reference - reference.mean()))
+    correlation = np.fft.irfft(spectrum, n_points)
+    # 依次排列滞后 -max_lag-1 .. max_lag+1，两端多取一点用于插值
+    lags = np.concatenate([correlation[-(max_lag + 1):], correlation[:max_lag + 2]])
+    best = int(np.argmax(lags[1:-1])) + 1
+    # 宽峰的互相关峰也很宽，三点抛物线对噪声敏感：对峰值 90% 以上的连续区域做最小二乘抛物线
+    level = lags[best] - 0.1 * (lags[best] - lags.min())
+    outside = lags < level
+    before = np.flatnonzero(outside[:best])
+    after = np.flatnonzero(outside[best:])
+    lo = min(int(before[-1]) + 1 if before.size else 0, best - 1)
+    hi = max(int(after[0]) + best - 1 if after.size else len(lags) - 1, best + 1)
+    x = np.arange(lo, hi + 1) - best
+    a, b, _ = np.polyfit(x, lags[lo:hi + 1], 2)
+    offset = float(np.clip(-b / (2.0 * a), x[0], x[-1])) if a < 0 else 0.0
+    return float(best - (max_lag + 1) + offset)
+
+
+def xcorr_peak_position(wavelengths, reference, intensities, reference_peak, max_lag=None):
+    """把 xcorr_shift 的像素位移换算为峰位：reference_peak（reference 的峰位）平移相同的像素数。"""
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    pixels = np.arange(len(wavelengths), dtype=np.float64)
+    shift = xcorr_shift(reference, intensities, max_lag=max_lag)
+    order = np.argsort(wavelengths)
+    reference_pixel = np.interp(reference_peak, wavelengths[order], pixels[order])
+    return float(np.interp(reference_pixel + shift, pixels, wavelengths))
+
+
+def _gaussian_offset(x, amplitude, center, sigma, offset):
+    return amplitude * np.exp(-(x - center) ** 2 / (2 * sigma ** 2)) + offset
+
+
+def _gaussian_offset_jacobian(x, amplitude, center, sigma, offset):
+    """_gaussian_offset 对 (amplitude, center, sigma, offset) 的解析偏导，形状 (点数, 4)。"""
+    dx = x - center
+    e = np.exp(-dx ** 2 / (2 * sigma ** 2))
+    jacobian = np.empty((len(x), 4))
+    jacobian[:, 0] = e
+    jacobian[:, 1] = amplitude * e * dx / sigma ** 2
+    jacobian[:, 2] = amplitude * e * dx ** 2 / sigma ** 3
+    jacobian[:, 3] = 1.0
+    return jacobian
+
+
+class PeakTracker:
+    """
+    【增量峰拟合】动力学中逐帧跟踪同一个峰：保存上一帧拟合的振幅、中心、宽度和偏移，
+    下一帧只在上一中心 ±window_fwhm 倍 FWHM 的窗口内拟合"高斯 + 常数"，并以上一帧的解作为初值
+    （解析雅可比）。相邻帧变化很小，通常几次迭代即收敛，点数也远少于整段 ROI。
+    拟合失败、中心跑出窗口或宽度突变时视为发散，从当前帧重新做全局初值估计（global search）。
+    """
+
+    def __init__(self, window_fwhm=1.5, max_width_change=2.0, max_nfev=100):
+        self.window_fwhm = float(window_fwhm)
+        self.max_width_change = float(max_width_change)
+        self.max_nfev = int(max_nfev)
+        self.reset()
+
+    def reset(self):
+        """丢弃上一帧的解，下一帧重新全局搜索。"""
+        self.params = None  # (amplitude, center, sigma, offset)
+        self.warm_fits = 0
+        self.restarts = 0
+
+    @property
+    def center(self):
+        return None if self.params is None else float(self.params[1])
+
+    @property
+    def fwhm(self):
+        return None if self.params is None else float(2.3548 * abs(self.params[2]))
+
+    def _window(self, wavelengths, center, half_width):
+        low, high = center - half_width, center + half_width
+        if wavelengths[0] < wavelengths[-1]:
+            return slice(int(np.searchsorted(wavelengths, low)), int(np.searchsorted(wavelengths, high, side='right')))
+        return np.flatnonzero((wavelengths >= low) & (wavelengths <= high))
+
+    def _fit(self, wavelengths, intensities, p0):
+        """在 p0 的中心 ±window_fwhm·FWHM 内拟合；发散时返回 None。"""
+        half_width = self.window_fwhm * 2.3548 * abs(p0[2])
+        window = self._window(wavelengths, p0[1], half_width)
+        x, y = wavelengths[window], intensities[window]
+        if len(x) < 5:
+            return None
+        try:
+            popt, _ = curve_fit(
+                _gaussian_offset, x, y, p0=p0, jac=_gaussian_offset_jacobian, maxfev=self.max_nfev
+            )
+        except (RuntimeError, ValueError):
+            return None
+        amplitude, center, sigma, _ = popt
+        sigma = abs(sigma)
+        if not (np.all(np.isfinite(popt)) and sigma > 0 and amplitude * p0[0] > 0):
+            return None
+        if abs(center - p0[1]) > half_width:
+            return None
+        ratio = sigma / abs(p0[2])
+        if ratio > self.max_width_change or ratio < 1.0 / self.max_width_change:
+            return None
+        popt[2] = sigma
+        return popt
+
+    def _initial_guess(self, wavelengths, intensities):
+        index = int(np.argmax(intensities))
+        left, right = _half_max_bounds(intensities, index)
+        sigma = abs(wavelengths[right] - wavelengths[left]) / 2.3548
+        if not sigma > 0:
+            sigma = abs(wavelengths[-1] - wavelengths[0]) / 10
+        offset = float(np.min(intensities))
+        return np.array([intensities[index] - offset, wavelengths[index], sigma, offset])
+
+    def update(self, wavelengths, intensities):
+        """拟合一帧，返回峰中心波长；全局搜索也失败时返回 None（并清除状态）。"""
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        intensities = np.asarray(intensities, dtype=np.float64)
+        if len(intensities) < 5:
+            return None
+        if self.params is not None:
+            popt = self._fit(wavelengths, intensities, self.params)
+            if popt is not None:
+                self.params = popt
+                self.warm_fits += 1
+                return float(popt[1])
+            self.restarts += 1
+        guess = self._initial_guess(wavelengths, intensities)
+        popt = self._fit(wavelengths, intensities, guess) if guess[0] > 0 else None
+        self.params = popt
+        return None if popt is None else float(popt[1])
+
+
+class CentroidTracker:
+    """
+    【固定窗口质心跟踪】动力学中逐帧跟踪同一个峰：第一帧以最高点为中心、当前峰的半高全宽为半窗宽求质心，
+    之后每帧都以上一帧的质心为中心、沿用同一半窗宽调用 centroid_window，窗口点数固定，
+    每帧开销与光谱长度无关。窗口内峰高（质心处强度减去窗口两端较低者）不足上一帧的 min_contrast 倍，
+    或窗口内没有高于半高的信号时视为丢失，从当前帧重新全局定位。
+    """
+
+    def __init__(self, min_contrast=0.5):
+        self.min_contrast = float(min_contrast)
+        self.reset()
+
+    def reset(self):
+        """丢弃上一帧的中心与窗宽，下一帧重新全局定位。"""
+        self.center = None
+        self.half_width = None
+        self.height = None
+        self.restarts = 0
+
+    def _height(self, wavelengths, intensities, center):
+        """质心处强度相对 ±half_width 窗口两端较低者的高度。"""
+        index = int(_nearest_indices(wavelengths, [center])[0])
+        pitch = abs(wavelengths[-1] - wavelengths[0]) / (len(wavelengths) - 1)
+        half_points = max(1, int(round(self.half_width / pitch))) if pitch > 0 else 1
+        lo, hi = max(0, index - half_points), min(len(intensities) - 1, index + half_points)
+        return float(intensities[index] - min(intensities[lo], intensities[hi]))
+
+    def update(self, wavelengths, intensities):
+        """返回本帧峰中心波长；全局定位也失败时返回 None（并清除状态）。"""
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        intensities = np.asarray(intensities, dtype=np.float64)
+        if len(intensities) < 3:
+            return None
+        if self.center is not None:
+            center = centroid_window(wavelengths, intensities, center=self.center, half_width=self.half_width)
+            if center is not None:
+                height = self._height(wavelengths, intensities, center)
+                if height >= self.min_contrast * self.height:
+                    self.center, self.height = center, height
+                    return center
+            self.restarts += 1
+        index = int(np.argmax(intensities))
+        left, right = _half_max_bounds(intensities, index)
+        pitch = abs(wavelengths[-1] - wavelengths[0]) / (len(wavelengths) - 1)
+        self.half_width = max(abs(wavelengths[right] - wavelengths[left]), pitch)
+        center = centroid_window(wavelengths, intensities, center=float(wavelengths[index]), half_width=self.half_width)
+        height = None if center is None else self._height(wavelengths, intensities, center)
+        if height is None or not height > 0:
+            self.center = self.half_width = self.height = None
+            return None
+        self.center, self.height = center, height
+        return center
+
+
+def benchmark_peak_trackers(wavelengths, spectra, true_centers, reference=None, reference_peak=None):
+    """
+    比较各峰位跟踪方法的精度与开销。spectra 为 (帧数, 点数)，true_centers 为各帧真实峰位；
+    提供 reference 与 reference_peak 时同时评估互相关位移法。
+    返回 {方法名: {'us_per_frame': 每帧耗时（微秒）, 'rms_error': 峰位均方根误差, 'failures': 失败帧数}}。
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=np.float64))
+    true_centers = np.asarray(true_centers, dtype=np.float64)
+    methods = {
+        key: (lambda y, key=key: estimate_peak_position(wavelengths, y, key)[1])
+        for key in ('highest_point', 'parabolic', 'gaussian_3point', 'centroid_window', 'centroid', 'gaussian_fit')
+    }
+    if reference is not None and reference_peak is not None:
+        methods['xcorr_shift'] = lambda y: xcorr_peak_position(wavelengths, reference, y, reference_peak)
+    # 有状态的增量拟合：逐帧沿用上一帧的解
+    tracker = PeakTracker()
+    methods['tracked_gaussian_fit'] = lambda y: tracker.update(wavelengths, y)
+    centroid_tracker = CentroidTracker()
+    methods['tracked_centroid_window'] = lambda y: centroid_tracker.update(wavelengths, y)
+
+    results = {}
+    for name, track in methods.items():
+        start = time.perf_counter()
+        found = [track(y) for y in spectra]
+        elapsed = time.perf_counter() - start
+        estimates = np.array([np.nan if value is None else value for value in found], dtype=np.float64)
+        valid = np.isfinite(estimates)
+        errors = estimates[valid] - true_centers[valid]
+        results[name] = {
+            'us_per_frame': elapsed * 1e6 / len(spectra),
+            'rms_error': float(np.sqrt(np.mean(errors ** 2))) if errors.size else np.nan,
+            'failures': int(np.count_nonzero(~valid)),
+        }
+    return results
+
+
+def compute_spectrum_metrics(x_data, y_data, find_range, noise_range, method='highest_point', peak=None, fwhm=None):
+    """
+    【单条光谱指标】计算汇总报告使用的峰位、峰强、FWHM、Q 值、噪声、SNR、峰面积等指标。
+    find_range / noise_range 为 (起, 止) 波长；无法计算的指标为 NaN。
+    peak 为预先（如 estimate_peak_positions_batch 批量）算好的寻峰范围内 (下标, 峰位)，
+    提供时不再逐条寻峰；峰位为 NaN 表示未找到。
+    fwhm 为预先（如 calculate_fwhm_batch）在该峰处算好的半峰全宽，NaN 表示无法计算。
+    """
+    x_data = np.asarray(x_data)
+    y_data = np.asarray(y_data)
+    metrics = {
+        "peak_wl": np.nan, "peak_int": np.nan, "fwhm": np.nan,
+        "rms_noise": np.nan, "c_noise": np.nan, "snr": np.nan,
+        "q_factor": np.nan, "peak_area": np.nan,
+        "skewness": np.nan, "slope": np.nan, "ripple": np.nan,
+        "noise_mean": np.nan  # 噪声区域均值，用于 LOB/LOD/LOQ
+    }
+    min_wl, max_wl = sorted(find_range)
+    noise_start, noise_end = sorted(noise_range)
+
+    # 定义掩码
+    range_mask = (x_data >= min_wl) & (x_data <= max_wl)
+    noise_mask = (x_data >= noise_start) & (x_data <= noise_end)
+
+    # A. 寻峰与峰形分析
+    peak_index_global = None
+    if np.count_nonzero(range_mask) >= 3:
+        x_subset = x_data[range_mask]
+        y_subset = y_data[range_mask]
+
+        # 计算偏度
+        try:
+            metrics['skewness'] = float(skew(y_subset)) if len(y_subset) > 0 else np.nan
+        except Exception:
+            pass
+
+        # 寻峰
+        if peak is None:
+            subset_index, peak_wavelength = estimate_peak_position(x_subset, y_subset, method)
+        else:
+            subset_index, peak_wavelength = peak
+            if peak_wavelength is not None and np.isnan(peak_wavelength):
+                subset_index, peak_wavelength = None, None
+        if peak_wavelength is not None:
+            if subset_index is None or subset_index < 0 or subset_index >= len(x_subset):
+                subset_index = int(np.argmin(np.abs(x_subset - peak_wavelength)))
+
+            metrics['peak_wl'] = float(peak_wavelength)
+            metrics['peak_int'] = float(y_subset[subset_index])
+
+            global_indices = np.where(range_mask)[0]
+            peak_index_global = int(global_indices[subset_index])
+
+            # 计算 FWHM（可由 calculate_fwhm_batch 预先整批算出）
+            if fwhm is None:
+                fwhm_results = calculate_fwhm(x_data, y_data, [peak_index_global])
+                if fwhm_results:
+                    metrics['fwhm'] = fwhm_results[0]
+            else:
+                metrics['fwhm'] = float(fwhm) if np.isfinite(fwhm) else 0
+
+            # 计算 Q Factor
+            if not np.isnan(metrics['peak_wl']) and metrics.get('fwhm', 0) > 0:
+                metrics['q_factor'] = metrics['peak_wl'] / metrics['fwhm']
+
+    # B. 噪声与基线分析
+    if np.count_nonzero(noise_mask) >= 3:
+        x_noise = x_data[noise_mask]
+        y_noise = y_data[noise_mask]
+
+        # 记录噪声区域的原始均值（用于 LOB/LOD/LOQ 计算）
+        metrics['noise_mean'] = float(np.mean(y_noise))
+
+        # 线性拟合计算基线斜率
+        if np.ptp(x_noise) > 0:
+            slope, intercept = np.polyfit(x_noise, y_noise, 1)
+            metrics['slope'] = float(slope)
+            detrended = y_noise - (slope * x_noise + intercept)
+        else:
+            detrended = y_noise - np.mean(y_noise)
+            metrics['slope'] = 0.0
+
+        # 计算噪声指标
+        metrics['rms_noise'] = float(np.sqrt(np.mean(detrended ** 2)))
+        metrics['c_noise'] = float(np.ptp(detrended))
+        metrics['ripple'] = float(np.std(detrended))
+
+    # C. 衍生指标 SNR
+    if not np.isnan(metrics['peak_int']) and metrics['rms_noise'] > 0:
+        metrics['snr'] = float(metrics['peak_int'] / metrics['rms_noise'])
+
+    # D. 峰面积积分
+    if np.count_nonzero(range_mask) >= 2:
+        interval = None
+        if peak_index_global is not None and not np.isnan(metrics['fwhm']) and not np.isnan(metrics['peak_wl']):
+            interval = (metrics['peak_wl'] - 1.5 * metrics['fwhm'],
+                        metrics['peak_wl'] + 1.5 * metrics['fwhm'])
+
+        if interval is None:
+            interval = (min_wl, max_wl)
+
+        left_x, right_x = sorted(interval)
+        left_x = max(left_x, np.min(x_data))
+        right_x = min(right_x, np.max(x_data))
+
+        area_mask = (x_data >= left_x) & (x_data <= right_x)
+        if np.count_nonzero(area_mask) >= 2:
+            metrics['peak_area'] = float(_trapezoid(y_data[area_mask], x_data[area_mask]))
+
+    return metrics
+
+
 def calculate_raman_shift(wavelengths, excitation_wavelength):
     """
     【计算拉曼位移】
@@ -393,10 +1137,14 @@ def calculate_raman_shift(wavelengths, excitation_wavelength):
     return raman_shift
 
 
-def identify_raman_peaks(wavenumbers, intensities, min_height=None, min_distance=None):
+def identify_raman_peaks(wavenumbers, intensities, min_height=None, min_distance=None, line_shape=None):
     """
     【拉曼特征峰识别】
     识别拉曼光谱中的特征峰。
+
+    line_shape 为 'gaussian' / 'lorentzian' / 'pseudo_voigt' 时，以寻峰结果为初值对所有峰（加线性基线）
+    同时拟合，重叠峰也能分开；每个峰的信息增加 'fit_wavenumber'、'fit_fwhm'、'fit_amplitude'、
+    'fit_area'、'fit_eta' 和 'fit_shape'。
     """
     # 使用通用寻峰函数找到所有可能的峰
     indices, properties = find_spectral_peaks(intensities, min_height, min_distance)
@@ -408,8 +1156,8 @@ def identify_raman_peaks(wavenumbers, intensities, min_height=None, min_distance
     peak_wavenumbers = wavenumbers[indices]
     peak_intensities = intensities[indices]
     
-    # 计算每个峰的FWHM
-    fwhms = calculate_fwhm(wavenumbers, intensities, indices)
+    # 计算每个峰的FWHM（拉曼峰常相互重叠且基线倾斜，以两侧谷底为基线）
+    fwhms = calculate_fwhm(wavenumbers, intensities, indices, baseline='local')
     
     # 构建峰信息列表
     peak_info = []
@@ -420,6 +1168,18 @@ def identify_raman_peaks(wavenumbers, intensities, min_height=None, min_distance
             'fwhm': float(fwhm),
             'index': int(indices[i])
         })
+
+    if line_shape is not None:
+        fit = fit_peaks(wavenumbers, intensities, peak_wavenumbers, shape=line_shape, baseline='linear')
+        for info, fitted in zip(peak_info, fit['peaks']):
+            info.update({
+                'fit_wavenumber': fitted['center'],
+                'fit_fwhm': fitted['fwhm'],
+                'fit_amplitude': fitted['amplitude'],
+                'fit_area': fitted['area'],
+                'fit_eta': fitted['eta'],
+                'fit_shape': line_shape,
+            })
     
     return indices, properties, peak_info
 
@@ -0,0 +1,282 @@
+# nanosense/algorithms/peak_fitting.py
+"""
+【峰拟合引擎】高斯 / 洛伦兹 / 赝 Voigt 线型，支持 N 个重叠峰加常数或线性基线。
+
+每个峰的参数为 (amplitude, center, fwhm)，赝 Voigt 另有混合系数 eta（0 为纯高斯，1 为纯洛伦兹）；
+基线参数排在所有峰之后。模型与雅可比均为解析式。
+
+fit_peaks_batch 把多条光谱堆叠在一起，用向量化的 Levenberg-Marquardt 同时求解：
+每次迭代对全部光谱一次性计算残差、雅可比和 (参数数 x 参数数) 的正规方程，各光谱有独立的阻尼系数和
+收敛判据，参数在每一步后投影到边界内。fit_peaks 是其单条光谱的情形。
+"""
+
+import numpy as np
+
+LINE_SHAPES = ('gaussian', 'lorentzian', 'pseudo_voigt')
+BASELINES = (None, 'constant', 'linear')
+
+_FOUR_LN2 = 4.0 * np.log(2.0)
+# 单位振幅、单位 FWHM 的峰面积
+_GAUSSIAN_AREA = np.sqrt(np.pi / _FOUR_LN2)
+_LORENTZIAN_AREA = np.pi / 2.0
+
+
+def _peak_size(shape):
+    if shape not in LINE_SHAPES:
+        raise ValueError(f"未知的线型: {shape}，可选 {LINE_SHAPES}")
+    return 4 if shape == 'pseudo_voigt' else 3
+
+
+def _baseline_size(baseline):
+    if baseline not in BASELINES:
+        raise ValueError(f"未知的基线类型: {baseline}，可选 {BASELINES}")
+    return {None: 0, 'constant': 1, 'linear': 2}[baseline]
+
+
+def _profiles(x, center, fwhm):
+    """单位振幅的高斯与洛伦兹分量及其对 center、fwhm 的偏导（按广播计算）。"""
+    d = x - center
+    d2_w2 = d * d / (fwhm * fwhm)
+    g = np.exp(-_FOUR_LN2 * d2_w2)
+    g_dc = g * 2.0 * _FOUR_LN2 * d / (fwhm * fwhm)
+    g_dw = g * 2.0 * _FOUR_LN2 * d2_w2 / fwhm
+    l = 1.0 / (1.0 + 4.0 * d2_w2)
+    l_dc = l * l * 8.0 * d / (fwhm * fwhm)
+    l_dw = l * l * 8.0 * d2_w2 / fwhm
+    return g, g_dc, g_dw, l, l_dc, l_dw
+
+
+def _evaluate(x, params, shape, n_peaks, baseline, with_jacobian=True):
+    """
+    params 为 (光谱数, 参数数)；返回模型 (光谱数, 点数) 与雅可比 (光谱数, 点数, 参数数)。
+    """
+    size = _peak_size(shape)
+    n_rows = params.shape[0]
+    model = np.zeros((n_rows, x.size))
+    jacobian = np.empty((n_rows, x.size, params.shape[1])) if with_jacobian else None
+    for k in range(n_peaks):
+        base = k * size
+        amplitude = params[:, base, None]
+        center = params[:, base + 1, None]
+        fwhm = params[:, base + 2, None]
+        g, g_dc, g_dw, l, l_dc, l_dw = _profiles(x, center, fwhm)
+        if shape == 'gaussian':
+            unit, unit_dc, unit_dw = g, g_dc, g_dw
+        elif shape == 'lorentzian':
+            unit, unit_dc, unit_dw = l, l_dc, l_dw
+        else:
+            eta = params[:, base + 3, None]
+            unit = (1.0 - eta) * g + eta * l
+            unit_dc = (1.0 - eta) * g_dc + eta * l_dc
+            unit_dw = (1.0 - eta) * g_dw + eta * l_dw
+            if with_jacobian:
+                jacobian[:, :, base + 3] = amplitude * (l - g)
+        model += amplitude * unit
+        if with_jacobian:
+            jacobian[:, :, base] = unit
+            jacobian[:, :, base + 1] = amplitude * unit_dc
+            jacobian[:, :, base + 2] = amplitude * unit_dw
+    offset = n_peaks * size
+    if baseline is not None:
+        model += params[:, offset, None]
+        if with_jacobian:
+            jacobian[:, :, offset] = 1.0
+        if baseline == 'linear':
+            model += params[:, offset + 1, None] * x
+            if with_jacobian:
+                jacobian[:, :, offset + 1] = x
+    return model, jacobian
+
+
+def multi_peak_model(x, params, shape='gaussian', n_peaks=1, baseline='constant'):
+    """按参数向量计算多峰模型（一维参数返回一维结果，二维参数按行计算）。"""
+    x = np.asarray(x, dtype=np.float64)
+    params = np.asarray(params, dtype=np.float64)
+    model, _ = _evaluate(x, np.atleast_2d(params), shape, n_peaks, baseline, with_jacobian=False)
+    return model[0] if params.ndim == 1 else model
+
+
+def _half_max_width(x, y, index):
+    """index 处峰的半高全宽估计（以 y 的最小值为基线）；失败时返回 NaN。"""
+    low = y.min()
+    half = low + (y[index] - low) / 2.0
+    left = np.flatnonzero(y[:index] < half)
+    right = np.flatnonzero(y[index:] < half)
+    if not left.size or not right.size:
+        return np.nan
+    return abs(x[right[0] + index] - x[left[-1]])
+
+
+def _initial_params(x, matrix, centers, shape, fwhm, baseline):
+    """按给定中心估计各光谱的初值：振幅取中心处高出最小值的部分，宽度取半高宽。"""
+    n_rows = matrix.shape[0]
+    n_peaks = centers.shape[1]
+    size = _peak_size(shape)
+    span = abs(x[-1] - x[0])
+    pitch = span / max(1, x.size - 1)
+    params = np.zeros((n_rows, n_peaks * size + _baseline_size(baseline)))
+    floor = matrix.min(axis=1)
+    order = np.argsort(x)
+    for row in range(n_rows):
+        y = matrix[row]
+        for k in range(n_peaks):
+            index = int(order[np.clip(np.searchsorted(x[order], centers[row, k]), 0, x.size - 1)])
+            width = fwhm if fwhm is not None else _half_max_width(x, y, index)
+            if not np.isfinite(width) or width <= 0:
+                width = span / 10.0
+            # 重叠峰的半高宽会把相邻峰算进去，限制在与最近峰的距离以内
+            others = np.delete(centers[row], k)
+            if others.size:
+                width = min(width, max(2.0 * pitch, np.min(np.abs(others - centers[row, k]))))
+            base = k * size
+            params[row, base] = max(y[index] - (floor[row] if baseline is not None else 0.0), 0.0)
+            params[row, base + 1] = centers[row, k]
+            params[row, base + 2] = max(width, 2.0 * pitch)
+            if shape == 'pseudo_voigt':
+                params[row, base + 3] = 0.5
+        if baseline is not None:
+            params[row, n_peaks * size] = floor[row]
+    return params
+
+
+def _default_bounds(x, n_params, shape, n_peaks):
+    """振幅非负、中心在数据范围内、FWHM 在像素间距与数据跨度之间、eta 在 [0, 1]，基线不限。"""
+    size = _peak_size(shape)
+    span = abs(x[-1] - x[0])
+    pitch = span / max(1, x.size - 1)
+    lower = np.full(n_params, -np.inf)
+    upper = np.full(n_params, np.inf)
+    for k in range(n_peaks):
+        base = k * size
+        lower[base] = 0.0
+        lower[base + 1], upper[base + 1] = x.min(), x.max()
+        lower[base + 2], upper[base + 2] = 0.5 * pitch, span
+        if shape == 'pseudo_voigt':
+            lower[base + 3], upper[base + 3] = 0.0, 1.0
+    return lower, upper
+
+
+def fit_peaks_batch(x, matrix, centers, shape='gaussian', fwhm=None, baseline='constant',
+                    bounds=None, p0=None, max_iter=100, ftol=1e-10):
+    """
+    【批量多峰拟合】对 (光谱数, 点数) 矩阵的每一行拟合 N 个同线型的峰。
+
+    参数:
+    centers: 初始峰中心，(N,) 为所有光谱共用，(光谱数, N) 为逐条指定。
+    fwhm: 初始半高全宽；为 None 时从各峰的半高宽估计。
+    bounds: (lower, upper) 参数边界，长度等于参数数；默认振幅非负、中心在数据范围内、
+            FWHM 在像素间距与数据跨度之间、eta 在 [0, 1]。
+    p0: (光谱数, 参数数) 初值，提供时忽略 centers/fwhm 的估计。
+
+    返回:
+    dict: 'amplitude' / 'center' / 'fwhm' / 'eta' / 'area' 为 (光谱数, N)，'baseline' 为 (光谱数, 基线参数数)，
+          'params' 为完整参数，'residual_rms' 与 'converged' 为 (光谱数,)。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    n_rows, n_points = matrix.shape
+    if x.shape != (n_points,):
+        raise ValueError("x 的长度必须与光谱点数一致。")
+    size = _peak_size(shape)
+    n_baseline = _baseline_size(baseline)
+    centers = np.asarray(centers, dtype=np.float64)
+    centers = np.broadcast_to(centers, (n_rows, centers.shape[-1])) if centers.ndim <= 1 else centers
+    n_peaks = centers.shape[1]
+    n_params = n_peaks * size + n_baseline
+    if n_points < n_params:
+        raise ValueError("数据点少于待拟合参数数。")
+
+    if p0 is None:
+        params = _initial_params(x, matrix, centers, shape, fwhm, baseline)
+    else:
+        params = np.array(np.broadcast_to(p0, (n_rows, n_params)), dtype=np.float64)
+    lower, upper = _default_bounds(x, n_params, shape, n_peaks) if bounds is None else (
+        np.asarray(bounds[0], dtype=np.float64), np.asarray(bounds[1], dtype=np.float64))
+    np.clip(params, lower, upper, out=params)
+
+    damping = np.full(n_rows, 1e-3)
+    converged = np.zeros(n_rows, dtype=bool)
+    model, _ = _evaluate(x, params, shape, n_peaks, baseline, with_jacobian=False)
+    cost = np.sum((model - matrix) ** 2, axis=1)
+    active = np.flatnonzero(np.isfinite(cost))
+    eye = np.eye(n_params)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        model, jacobian = _evaluate(x, params[active], shape, n_peaks, baseline)
+        residual = matrix[active] - model
+        normal = np.einsum('spi,spj->sij', jacobian, jacobian)
+        gradient = np.einsum('spi,sp->si', jacobian, residual)
+        # Marquardt 缩放：按 J^T J 对角线加阻尼
+        diagonal = np.einsum('sii->si', normal)
+        scaled = normal + damping[active, None, None] * (diagonal[:, :, None] * eye + 1e-12 * eye)
+        try:
+            step = np.linalg.solve(scaled, gradient[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            step = np.stack([np.linalg.lstsq(a, b, rcond=None)[0] for a, b in zip(scaled, gradient)])
+        trial = np.clip(params[active] + step, lower, upper)
+        trial_model, _ = _evaluate(x, trial, shape, n_peaks, baseline, with_jacobian=False)
+        trial_cost = np.sum((trial_model - matrix[active]) ** 2, axis=1)
+
+        better = trial_cost < cost[active]
+        improved = active[better]
+        reduction = cost[improved] - trial_cost[better]
+        params[improved] = trial[better]
+        damping[improved] = np.maximum(damping[improved] / 3.0, 1e-12)
+        done = reduction <= ftol * np.maximum(cost[improved], 1e-300)
+        cost[improved] = trial_cost[better]
+        worse = active[~better]
+        damping[worse] *= 4.0
+        # 阻尼过大说明已无法下降（已在极小值处）
+        stalled = worse[damping[worse] > 1e10]
+        converged[improved[done]] = True
+        converged[stalled] = True
+        active = active[~converged[active]]
+
+    peaks = params[:, :n_peaks * size].reshape(n_rows, n_peaks, size)
+    amplitude, center, width = peaks[:, :, 0], peaks[:, :, 1], peaks[:, :, 2]
+    eta = peaks[:, :, 3] if shape == 'pseudo_voigt' else np.full(
+        (n_rows, n_peaks), 1.0 if shape == 'lorentzian' else 0.0)
+    area = amplitude * width * ((1.0 - eta) * _GAUSSIAN_AREA + eta * _LORENTZIAN_AREA)
+    return {
+        'shape': shape,
+        'amplitude': amplitude.copy(),
+        'center': center.copy(),
+        'fwhm': width.copy(),
+        'eta': eta.copy(),
+        'area': area,
+        'baseline': params[:, n_peaks * size:].copy(),
+        'params': params,
+        'residual_rms': np.sqrt(cost / n_points),
+        'converged': converged,
+    }
+
+
+def fit_peaks(x, y, centers, shape='gaussian', fwhm=None, baseline='constant', bounds=None, p0=None,
+              max_iter=100):
+    """
+    【多峰拟合】单条光谱的 fit_peaks_batch。返回 dict：'peaks' 为每个峰的
+    {'amplitude', 'center', 'fwhm', 'eta', 'area'}，另含 'baseline'、'params'、'residual_rms'、'converged'。
+    """
+    centers = np.atleast_1d(np.asarray(centers, dtype=np.float64))
+    batch = fit_peaks_batch(x, np.asarray(y, dtype=np.float64)[None, :], centers, shape=shape, fwhm=fwhm,
+                            baseline=baseline, bounds=bounds, p0=None if p0 is None else np.asarray(p0)[None, :],
+                            max_iter=max_iter)
+    keys = ('amplitude', 'center', 'fwhm', 'eta', 'area')
+    return {
+        'shape': shape,
+        'peaks': [{key: float(batch[key][0, k]) for key in keys} for k in range(centers.size)],
+        'baseline': batch['baseline'][0],
+        'params': batch['params'][0],
+        'residual_rms': float(batch['residual_rms'][0]),
+        'converged': bool(batch['converged'][0]),
+    }
+
+
+__all__ = [
+    'BASELINES',
+    'LINE_SHAPES',
+    'fit_peaks',
+    'fit_peaks_batch',
+    'multi_peak_model',
+]
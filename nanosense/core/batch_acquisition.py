@@ -32,8 +32,11 @@ from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QThread, Qt, QEvent, QSi
 from PyQt5.QtGui import QColor, QIcon, QPainter, QPixmap
 from PyQt5.QtSvg import QSvgRenderer
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple, Union
 from .controller import FX2000Controller
+from .spectrum_writer import SpectrumWriteQueue
+from ..algorithms.preprocessing import preprocess_batch
 from ..utils.file_io import save_batch_spectrum_data, load_spectrum_from_path
 from ..gui.single_plot_window import SinglePlotWindow
 
@@ -93,6 +96,44 @@ def _calculate_absorbance(signal, background, reference):
     return absorbance
 
 
+def _batch_preprocessing_params(settings, length):
+    """把 processing_settings 转换为 preprocess_batch 参数（先平滑后基线，窗口规则同前）。"""
+    params = {'order': 'smoothing_first', 'smoothing': False, 'sg_two_stage': False}
+    method = settings.get('smoothing_method', 'Savitzky-Golay')
+    # 确保窗口是奇数且不超过数据长度
+    window = min(int(settings.get('smoothing_window', 11)), length)
+    if window % 2 == 0:
+        window -= 1
+    if method == 'Savitzky-Golay':
+        order = settings.get('smoothing_order', 3)
+        if window >= order + 2:
+            params.update(smoothing=True, smoothing_method=method,
+                          sg_window_coarse=window, sg_polyorder_coarse=order)
+    elif method == 'Moving Average' and window > 0:
+        params.update(smoothing=True, smoothing_method=method, ma_window=window)
+    if settings.get('baseline_enabled', False):
+        params.update(
+            baseline=True,
+            baseline_algorithm=settings.get('baseline_algorithm', 'ALS'),
+            als_lambda=settings.get('baseline_lambda', 5000000),
+            als_p=settings.get('baseline_p', 0.001),
+            als_niter=int(settings.get('baseline_niter', 10)),
+        )
+    return params
+
+
+def _preprocess_result(absorbance, settings):
+    """按 processing_settings 预处理一条或一批（二维）结果光谱，出错时返回原数据的副本。"""
+    processed = np.array(absorbance, dtype=float, copy=True)
+    if processed.size == 0:
+        return processed
+    try:
+        return preprocess_batch(None, processed, _batch_preprocessing_params(settings, processed.shape[-1]))
+    except Exception as e:
+        print(f"Preprocessing error: {e}")
+        return processed
+
+
 class MultiCurvePlotWindow(pg.QtWidgets.QMainWindow):
     closed = pyqtSignal(object)
 
@@ -1018,58 +1059,7 @@ class BatchRunDialog(QDialog):
     
     def _apply_preprocessing(self, absorbance, wavelengths):
         """根据processing_settings应用预处理（与Worker中的方法相同）"""
-        import numpy as np
-        from scipy.signal import savgol_filter
-        from nanosense.algorithms.preprocessing import baseline_als
-        
-        # 复制数据
-        processed = np.array(absorbance, copy=True)
-        
-        # 1. 应用平滑
-        smoothing_method = self.processing_settings.get('smoothing_method', 'Savitzky-Golay')
-        smoothing_window = self.processing_settings.get('smoothing_window', 11)
-        
-        try:
-            if smoothing_method == 'Savitzky-Golay':
-                smoothing_order = self.processing_settings.get('smoothing_order', 3)
-                # 确保窗口是奇数且小于数据长度
-                window = min(smoothing_window, len(processed))
-                if window % 2 == 0:
-                    window -= 1
-                if window >= smoothing_order + 2:
-                    processed = savgol_filter(processed, window, smoothing_order)
-            elif smoothing_method == 'Moving Average':
-                # 简单移动平均
-                window = min(smoothing_window, len(processed))
-                if window % 2 == 0:
-                    window -= 1
-                kernel = np.ones(window) / window
-                processed = np.convolve(processed, kernel, mode='same')
-        except Exception as e:
-            print(f"Smoothing error: {e}")
-        
-        # 2. 应用基线校正
-        baseline_enabled = self.processing_settings.get('baseline_enabled', False)
-        if baseline_enabled:
-            baseline_algorithm = self.processing_settings.get('baseline_algorithm', 'ALS')
-            
-            try:
-                if baseline_algorithm == 'ALS':
-                    lambda_param = self.processing_settings.get('baseline_lambda', 5000000)
-                    p_param = self.processing_settings.get('baseline_p', 0.001)
-                    niter = self.processing_settings.get('baseline_niter', 10)
-                    baseline = baseline_als(processed, lam=lambda_param, p=p_param, niter=int(niter))
-                    processed = processed - baseline
-                elif baseline_algorithm == 'SNIP':
-                    baseline = correct_baseline(wavelengths, processed, method='snip')
-                    processed = processed - baseline
-                elif baseline_algorithm == 'Linear':
-                    baseline = correct_baseline(wavelengths, processed, method='linear')
-                    processed = processed - baseline
-            except Exception as e:
-                print(f"Baseline correction error: {e}")
-        
-        return processed
+        return _preprocess_result(absorbance, self.processing_settings)
     
     def _progress_text(self) -> str:
         return self.tr("Total progress: {total}% | Current well: {point}%").format(
@@ -1176,6 +1166,7 @@ class BatchAcquisitionWorker(QObject):
         processing_info: Optional[Dict[str, Any]] = None,
         peak_method: str = "highest_point",
         processing_settings: Optional[Dict[str, Any]] = None,
+        scans_per_point: int = 1,
     ):
         super().__init__()
         self.controller = controller
@@ -1190,6 +1181,8 @@ class BatchAcquisitionWorker(QObject):
         self.intra_well_interval = intra_well_interval
         self.inter_well_interval = inter_well_interval
         self.peak_method = peak_method
+        # 每个采集点平均的扫描次数（>1 时走硬件平均或突发采集均值）
+        self.scans_per_point = max(1, int(scans_per_point or 1))
         
         # 处理设置（如果提供）
         self.processing_settings = processing_settings or {}
@@ -1208,6 +1201,8 @@ class BatchAcquisitionWorker(QObject):
         self.batch_run_id = batch_run_id
         self.batch_item_map = batch_item_map or {}
         self.operator = operator or ""
+        # 光谱写入走后台队列，按批提交，避免每次采集都在采集线程上等待 commit
+        self.spectrum_writer = SpectrumWriteQueue(db_manager) if db_manager else None
         if self.db_manager and self.project_id is not None:
             self._initialize_batch_records()
         self.well_experiments: Dict[str, int] = {}
@@ -1223,6 +1218,7 @@ class BatchAcquisitionWorker(QObject):
         config_meta.setdefault("crop_start_nm", crop_start_wl)
         config_meta.setdefault("crop_end_nm", crop_end_wl)
         config_meta.setdefault("auto_enabled", is_auto_enabled)
+        config_meta.setdefault("scans_per_point", self.scans_per_point)
         config_meta = {
             key: value for key, value in config_meta.items() if value is not None
         }
@@ -1284,58 +1280,7 @@ class BatchAcquisitionWorker(QObject):
     
     def _apply_preprocessing(self, absorbance, wavelengths):
         """根据processing_settings应用预处理"""
-        import numpy as np
-        from scipy.signal import savgol_filter
-        from nanosense.algorithms.preprocessing import baseline_als
-        
-        # 复制数据
-        processed = np.array(absorbance, copy=True)
-        
-        # 1. 应用平滑
-        smoothing_method = self.processing_settings.get('smoothing_method', 'Savitzky-Golay')
-        smoothing_window = self.processing_settings.get('smoothing_window', 11)
-        
-        try:
-            if smoothing_method == 'Savitzky-Golay':
-                smoothing_order = self.processing_settings.get('smoothing_order', 3)
-                # 确conserve窗口是奇数且小于数据长度
-                window = min(smoothing_window, len(processed))
-                if window % 2 == 0:
-                    window -= 1
-                if window >= smoothing_order + 2:
-                    processed = savgol_filter(processed, window, smoothing_order)
-            elif smoothing_method == 'Moving Average':
-                # 简单移动平均
-                window = min(smoothing_window, len(processed))
-                if window % 2 == 0:
-                    window -= 1
-                kernel = np.ones(window) / window
-                processed = np.convolve(processed, kernel, mode='same')
-        except Exception as e:
-            print(f"Smoothing error: {e}")
-        
-        # 2. 应用基线校正
-        baseline_enabled = self.processing_settings.get('baseline_enabled', False)
-        if baseline_enabled:
-            baseline_algorithm = self.processing_settings.get('baseline_algorithm', 'ALS')
-            
-            try:
-                if baseline_algorithm == 'ALS':
-                    lambda_param = self.processing_settings.get('baseline_lambda', 5000000)
-                    p_param = self.processing_settings.get('baseline_p', 0.001)
-                    niter = self.processing_settings.get('baseline_niter', 10)
-                    baseline = baseline_als(processed, lam=lambda_param, p=p_param, niter=int(niter))
-                    processed = processed - baseline
-                elif baseline_algorithm == 'SNIP':
-                    baseline = correct_baseline(wavelengths, processed, method='snip')
-                    processed = processed - baseline
-                elif baseline_algorithm == 'Linear':
-                    baseline = correct_baseline(wavelengths, processed, method='linear')
-                    processed = processed - baseline
-            except Exception as e:
-                print(f"Baseline correction error: {e}")
-        
-        return processed
+        return _preprocess_result(absorbance, self.processing_settings)
 
 
     def request_collect(self):
@@ -1366,6 +1311,13 @@ class BatchAcquisitionWorker(QObject):
         if self.command_queue.empty():
             self.command_queue.put(("IMPORT", payload))
 
+    def _capture_point_spectrum(self):
+        """Capture the spectrum stored for one point, averaged over `scans_per_point` scans."""
+        if self.scans_per_point > 1:
+            return self.controller.acquire_averaged(self.scans_per_point)
+        _, spectrum = self.controller.get_spectrum()
+        return spectrum
+
     def _timed_preview_wait(self, duration):
         """Wait for a duration while publishing preview spectra."""
         start_time = time.time()
@@ -1527,34 +1479,33 @@ class BatchAcquisitionWorker(QObject):
 
     def _save_spectrum_to_db(
         self, well_id: str, spec_label: str, wavelengths, intensities
-    ) -> Optional[int]:
+    ) -> Union[int, Future, None]:
+        """Persist one spectrum; returns a Future when the write-behind queue is used."""
         if not self.db_manager:
             return None
         exp_id = self._ensure_well_experiment(well_id)
         if exp_id is None:
             return None
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(wavelengths, np.ndarray):
-            wl_list = wavelengths.tolist()
-        else:
-            wl_list = list(wavelengths)
-        if isinstance(intensities, np.ndarray):
-            int_list = intensities.tolist()
-        else:
-            int_list = list(intensities)
+        # 拷贝一份，防止后续对采集缓冲区的原地修改影响排队中的数据
+        wavelengths = np.array(wavelengths, dtype=float)
+        intensities = np.array(intensities, dtype=float)
 
         try:
             item_id = self.batch_item_map.get(well_id) if self.batch_item_map else None
-            spectrum_id = self.db_manager.save_spectrum(
-                exp_id,
-                spec_label,
-                timestamp,
-                wl_list,
-                int_list,
-                batch_run_item_id=item_id,
-                instrument_info=self.instrument_info,
-                processing_info=self._processing_payload_for_label(spec_label),
-            )
+            save_kwargs = {
+                "batch_run_item_id": item_id,
+                "instrument_info": self.instrument_info,
+                "processing_info": self._processing_payload_for_label(spec_label),
+            }
+            if self.spectrum_writer:
+                spectrum_id = self.spectrum_writer.submit(
+                    exp_id, spec_label, timestamp, wavelengths, intensities, **save_kwargs
+                )
+            else:
+                spectrum_id = self.db_manager.save_spectrum(
+                    exp_id, spec_label, timestamp, wavelengths, intensities, **save_kwargs
+                )
             if spectrum_id:
                 bucket = (
                     "Result"
@@ -1572,6 +1523,22 @@ class BatchAcquisitionWorker(QObject):
             print(f"淇濆瓨鎵归噺鍏夎氨鍒版暟鎹簱澶辫触: {e}")
             return None
 
+    def _flush_spectrum_writes(self) -> None:
+        if self.spectrum_writer:
+            self.spectrum_writer.flush()
+
+    def _resolved_spectrum_ids(self, well_id: str) -> List[int]:
+        """Spectrum ids for a well in registry order, resolving queued writes."""
+        self._flush_spectrum_writes()
+        source_ids = []
+        registry = self.spectrum_registry[well_id]
+        for bucket in ("Background", "Reference", "Signal", "Result"):
+            for entry in registry.get(bucket, []):
+                spectrum_id = entry.result() if isinstance(entry, Future) else entry
+                if spectrum_id:
+                    source_ids.append(spectrum_id)
+        return source_ids
+
 
     def _align_imported_spectrum(
         self, imported_wavelengths: Any, imported_values: Any
@@ -1671,6 +1638,8 @@ class BatchAcquisitionWorker(QObject):
                 self.completed_wells.add(well_id)
 
     def _finalize_batch_run(self, status: str):
+        if self.spectrum_writer:
+            self.spectrum_writer.close()
         if not self.db_manager or not self.batch_run_id:
             return
         # 鏍囪鏈畬鎴愮殑鏄庣粏
@@ -1760,10 +1729,7 @@ class BatchAcquisitionWorker(QObject):
                             np.asarray(val).tolist() if val is not None else None
                             for val in absorbance_list
                         ]
-                        source_ids = []
-                        registry = self.spectrum_registry[well_id]
-                        for bucket in ("Background", "Reference", "Signal", "Result"):
-                            source_ids.extend(registry.get(bucket, []))
+                        source_ids = self._resolved_spectrum_ids(well_id)
                         summary_payload = {
                             "concentration": concentration,
                             "signals": serial_signals,
@@ -1776,6 +1742,7 @@ class BatchAcquisitionWorker(QObject):
                             result_data=summary_payload,
                             source_spectrum_ids=source_ids,
                         )
+                    self._flush_spectrum_writes()
                     self._record_batch_capture(well_id, status="completed")
                     self._finalize_batch_item(well_id, status="completed")
                     self.task_index += 1
@@ -1819,8 +1786,10 @@ class BatchAcquisitionWorker(QObject):
 
                 spectrum = None
                 payload = None
+                from_preview = False
                 if not self.is_auto_enabled:
                     spectrum, command, payload = self._get_command_while_previewing()
+                    from_preview = True
                 else:
                     delay = self.intra_well_interval
                     if task_type in ("background", "reference"):
@@ -1828,7 +1797,7 @@ class BatchAcquisitionWorker(QObject):
                     if not self._timed_preview_wait(delay):
                         command = "STOP"
                     else:
-                        _, spectrum = self.controller.get_spectrum()
+                        spectrum = self._capture_point_spectrum()
                         command = "COLLECT"
                         payload = None
 
@@ -1864,8 +1833,9 @@ class BatchAcquisitionWorker(QObject):
                     self.task_index += 1
                     continue
 
-                if spectrum is None:
-                    _, spectrum = self.controller.get_spectrum()
+                # 预览帧只是单次扫描；多次平均时需按设定重新采集（自动模式已在上面采集过）
+                if spectrum is None or (from_preview and self.scans_per_point > 1):
+                    spectrum = self._capture_point_spectrum()
                 self._ensure_well_experiment(well_id)
 
                 if task_type == "background":
@@ -0,0 +1,85 @@
+"""
+Per-thread SQLite connection pool.
+
+Each thread that reads through the pool gets its own connection, so explorer
+searches running on worker threads never share a cursor with the GUI thread
+or the batch worker. All writes go through a single dedicated writer
+connection guarded by a re-entrant lock; while a thread holds the write lock,
+`connection()` returns the writer so read-modify-write sequences see their
+own uncommitted rows.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class ConnectionPool:
+    """One read connection per thread plus one lock-guarded writer connection."""
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._writer: Optional[sqlite3.Connection] = factory()
+        self._closed = False
+
+    @property
+    def writer(self) -> Optional[sqlite3.Connection]:
+        return self._writer
+
+    def in_write(self) -> bool:
+        return getattr(self._local, "write_depth", 0) > 0
+
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """Writer inside `writing()`, otherwise the calling thread's reader."""
+        if self._closed:
+            return None
+        if self.in_write():
+            return self._writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_reader()
+        return conn
+
+    @contextmanager
+    def writing(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """Serialize writers; nested use on the same thread is allowed."""
+        with self._write_lock:
+            self._local.write_depth = getattr(self._local, "write_depth", 0) + 1
+            try:
+                yield self._writer
+            finally:
+                self._local.write_depth -= 1
+
+    def connections(self) -> List[sqlite3.Connection]:
+        with self._lock:
+            readers = list(self._readers.values())
+        return ([self._writer] if self._writer else []) + readers
+
+    def close(self) -> None:
+        with self._write_lock, self._lock:
+            self._closed = True
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = self._factory()
+        current = threading.current_thread()
+        with self._lock:
+            # Reclaim connections left behind by finished threads (e.g. QThreadPool workers).
+            for thread in [t for t in self._readers if not t.is_alive()]:
+                self._readers.pop(thread).close()
+            self._readers[current] = conn
+        self._local.conn = conn
+        return conn
+
+
+__all__ = ["ConnectionPool"]
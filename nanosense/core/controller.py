@@ -1,7 +1,12 @@
 import sys
 import os
+import time
 from pathlib import Path
 
+import numpy as np
+
+from ..algorithms.preprocessing import despike_frames
+
 
 class FX2000Controller:
     """
@@ -22,12 +27,13 @@ class FX2000Controller:
         self.is_real_hardware = use_real_hardware
 
         self.in_endpoint = None
+        self.scans_to_average = 1
 
         # 根据硬件模式获取设备属性
         if self.is_real_hardware:
             self._name = self.api_wrapper.getName(self.device_index)
             self._serial_number = self.api_wrapper.getSerialNumber(self.device_index)
-            self._wavelengths = list(self.api_wrapper.getWavelengths(self.device_index))
+            wavelengths = self.api_wrapper.getWavelengths(self.device_index)
 
             # for endpoint in self.api_wrapper.EndPoints:
             #     if endpoint.Address > 0x80 and "Bulk" in str(endpoint.GetType()):
@@ -37,7 +43,11 @@ class FX2000Controller:
         else:  # 模拟API的属性是直接访问的
             self._name = self.api_wrapper.getName(self.device_index)
             self._serial_number = self.api_wrapper.getSerialNumber(self.device_index)
-            self._wavelengths = self.api_wrapper.wavelengths
+            wavelengths = self.api_wrapper.wavelengths
+
+        # 波长轴只转换一次并设为只读，所有调用方共享同一数组
+        self._wavelengths = self._to_float_array(wavelengths).copy()
+        self._wavelengths.flags.writeable = False
 
         FX2000Controller._instance = self
 
@@ -145,6 +155,7 @@ class FX2000Controller:
         """【新增】设置平均扫描次数。"""
         if hasattr(self.api_wrapper, 'setScansToAverage'):
             self.api_wrapper.setScansToAverage(self.device_index, num_scans)
+            self.scans_to_average = int(num_scans)
         else:
             print("警告：当前API不支持设置平均扫描次数。")
 
@@ -172,9 +183,82 @@ class FX2000Controller:
         else:
             print(f"警告：当前API不支持控制激光状态。已记录状态: {'开启' if enabled else '关闭'}")
 
+    @staticmethod
+    def _to_float_array(data):
+        """将驱动返回的数据（numpy 数组或 .NET 数组）转换为 float64 数组，避免中间 list。"""
+        if isinstance(data, np.ndarray):
+            return np.asarray(data, dtype=np.float64)
+        return np.fromiter(data, dtype=np.float64, count=len(data))
+
     def get_spectrum(self):
-        """【已修正】获取一条光谱数据，确保返回值为Numpy数组。"""
-        import numpy as np  # Ensure numpy is imported
+        """获取一条光谱数据，返回 (只读的缓存波长轴, 新的强度数组)。"""
+        spectrum_data = self.api_wrapper.getSpectrum(self.device_index)
+        return self._wavelengths, self._to_float_array(spectrum_data)
+
+    def read_spectrum_into(self, out):
+        """【新增】将一条光谱直接写入预分配的数组 out（如 FrameRing 槽位），返回 out。"""
         spectrum_data = self.api_wrapper.getSpectrum(self.device_index)
-        # Ensure both wavelengths and spectrum data are consistently NumPy arrays
-        return np.array(self.wavelengths), np.array(list(spectrum_data))
\ No newline at end of file
+        if isinstance(spectrum_data, np.ndarray):
+            np.copyto(out, spectrum_data, casting='unsafe')
+        else:
+            out[:] = np.fromiter(spectrum_data, dtype=np.float64, count=len(spectrum_data))
+        return out
+
+    def acquire_burst(self, num_frames: int, interval_ms: float = 0.0, out=None):
+        """
+        【新增】连续采集 num_frames 条光谱，返回 (num_frames, 像素数) 的 float64 数组。
+
+        驱动提供 getSpectrumBurst 时整批交给驱动；否则在紧凑循环中把每帧直接写入
+        预分配数组的对应行。interval_ms > 0 时按绝对截止时间控制节拍，
+        不会像逐帧 sleep(interval) 那样把采集耗时累加到间隔上。
+        可传入形状匹配的 out 以复用缓冲区。
+        """
+        num_frames = int(num_frames)
+        if num_frames < 1:
+            raise ValueError("num_frames 必须为正整数。")
+        shape = (num_frames, len(self._wavelengths))
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        elif out.shape != shape:
+            raise ValueError(f"out 的形状应为 {shape}，实际为 {out.shape}。")
+
+        if hasattr(self.api_wrapper, 'getSpectrumBurst'):
+            frames = self.api_wrapper.getSpectrumBurst(self.device_index, num_frames, interval_ms)
+            if isinstance(frames, np.ndarray):
+                np.copyto(out, frames.reshape(shape), casting='unsafe')
+            else:
+                for row, frame in zip(out, frames):
+                    row[:] = self._to_float_array(frame)
+            return out
+
+        interval_s = max(0.0, float(interval_ms)) / 1000.0
+        start = time.perf_counter()
+        for index in range(num_frames):
+            if interval_s and index:
+                remaining = start + index * interval_s - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            self.read_spectrum_into(out[index])
+        return out
+
+    def acquire_averaged(self, num_scans: int, reject_spikes: bool = False):
+        """
+        【新增】采集 num_scans 次扫描的平均光谱。
+        驱动支持 setScansToAverage 时由硬件完成平均（完成后恢复原设置），
+        否则退回到一次突发采集后按帧求均值。
+        reject_spikes=True 时总是突发采集，先逐帧比较去除宇宙射线尖峰（despike_frames）再求均值；
+        硬件平均会把尖峰混入结果，因此此时不使用。
+        """
+        num_scans = int(num_scans)
+        if num_scans <= 1:
+            return self.get_spectrum()[1]
+        if reject_spikes:
+            return despike_frames(self.acquire_burst(num_scans)).mean(axis=0)
+        if hasattr(self.api_wrapper, 'setScansToAverage'):
+            previous = self.scans_to_average
+            self.set_scans_to_average(num_scans)
+            try:
+                return self.get_spectrum()[1]
+            finally:
+                self.set_scans_to_average(previous)
+        return self.acquire_burst(num_scans).mean(axis=0)
@@ -5,7 +5,11 @@ Batch-friendly data access helpers for the database explorer.
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .spectrum_codec import WavelengthAxisCache, decode_array
 
 
 class DataAccessError(RuntimeError):
@@ -18,8 +22,24 @@ class ExplorerDataAccess:
     All methods return plain Python data structures to avoid GUI dependencies.
     """
 
-    def __init__(self, conn: sqlite3.Connection):
-        self.conn = conn
+    def __init__(
+        self,
+        conn: Union[sqlite3.Connection, Callable[[], sqlite3.Connection]],
+        axis_cache: Optional[WavelengthAxisCache] = None,
+    ):
+        """
+        `conn` may be a connection or a zero-argument callable returning one
+        (e.g. a per-thread pool accessor), so queries issued from worker
+        threads never share a connection with the GUI thread.
+        """
+        self._conn = conn
+        self.axis_cache = axis_cache or WavelengthAxisCache()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if isinstance(self._conn, sqlite3.Connection):
+            return self._conn
+        return self._conn()
 
     def fetch_projects(self) -> List[Dict[str, Any]]:
         cursor = self.conn.execute(
@@ -371,3 +391,40 @@ class ExplorerDataAccess:
             "processing_name": row[12],
             "processing_version": row[13],
         }
+
+    def fetch_spectrum_payloads(self, spectrum_set_ids: Iterable[int]) -> Dict[int, Dict[str, np.ndarray]]:
+        """
+        Decode wavelength/intensity arrays for the given spectrum sets.
+        Shared wavelength axes are resolved through `axis_cache`, so each axis
+        is decoded once no matter how many spectra reference it.
+        """
+        ids = list(spectrum_set_ids)
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        cursor = self.conn.execute(
+            f"""
+            SELECT ss.spectrum_set_id,
+                   sd.axis_id,
+                   sd.wavelengths_blob,
+                   sd.intensities_blob,
+                   sd.storage_format
+            FROM spectrum_sets ss
+            JOIN spectrum_data sd ON sd.data_id = ss.data_id
+            WHERE ss.spectrum_set_id IN ({placeholders})
+            """,
+            tuple(ids),
+        )
+        payloads: Dict[int, Dict[str, np.ndarray]] = {}
+        for set_id, axis_id, wl_blob, int_blob, storage_format in cursor.fetchall():
+            try:
+                wavelengths = None
+                if axis_id is not None:
+                    wavelengths = self.axis_cache.get(self.conn, axis_id)
+                if wavelengths is None:
+                    wavelengths = decode_array(wl_blob, storage_format)
+                intensities = decode_array(int_blob, storage_format)
+            except ValueError as exc:
+                raise DataAccessError(f"Invalid payload for spectrum set {set_id}: {exc}") from exc
+            payloads[set_id] = {"wavelengths": wavelengths, "intensities": intensities}
+        return payloads
@@ -5,16 +5,68 @@ import os
 import json
 import time
 import hashlib
+import functools
 import numpy as np
 from collections import defaultdict
+from .connection_pool import ConnectionPool
 from .migration_runner import run_migrations
 from .snapshot_utils import (
     canonicalize_instrument_info,
     canonicalize_processing_info,
     serialize_payload,
 )
+from .spectrum_codec import (
+    AXIS_STORAGE_FORMAT,
+    DEFAULT_STORAGE_FORMAT,
+    WavelengthAxisCache,
+    decode_array,
+    encode_array,
+    encode_axis,
+    is_binary_format,
+)
+from .spectrum_handles import LazySpectrum, SpectrumPayloadSource
+from .sqlite_profile import (
+    ConnectionProfile,
+    MaintenanceScheduler,
+    apply_connection_profile,
+    run_maintenance,
+)
 from typing import Any, Dict, List, Optional, Tuple
 
+# 旧版 spectra 表的写入模式：
+#   mirror    - 每条光谱同时写入结构化表与旧表（默认，兼容旧读取端）
+#   off       - 仅写结构化表
+#   lazy-view - 仅写结构化表，并在本进程连接上按需把二进制载荷解码为旧格式 JSON
+# 任何模式下，持久视图 legacy_spectra_view 都给出旧表行与未镜像的结构化光谱的并集；
+# 合成行的 spectrum_id 为 -spectrum_set_id，不会与旧表的 spectrum_id 冲突。
+LEGACY_WRITE_MIRROR = 'mirror'
+LEGACY_WRITE_OFF = 'off'
+LEGACY_WRITE_LAZY_VIEW = 'lazy-view'
+LEGACY_WRITE_MODES = (LEGACY_WRITE_MIRROR, LEGACY_WRITE_OFF, LEGACY_WRITE_LAZY_VIEW)
+
+
+def _spectrum_payload_json(payload: Optional[bytes], storage_format: Optional[str]) -> Optional[str]:
+    """SQLite 自定义函数：将 spectrum_data 载荷还原为旧表使用的 JSON 文本。"""
+    if payload is None:
+        return None
+    if storage_format in (None, 'json'):
+        return bytes(payload).decode('utf-8') if isinstance(payload, bytes) else payload
+    return json.dumps(decode_array(payload, storage_format).tolist())
+
+
+def _writes(method):
+    """写操作装饰器：持有写锁执行，方法内的 self.conn 解析为专用写连接。"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        pool = getattr(self, 'pool', None)
+        if pool is None:
+            return method(self, *args, **kwargs)
+        with pool.writing():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 def _merge_nested_dict(target: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
     for key, value in updates.items():
@@ -29,33 +81,141 @@ def _merge_nested_dict(target: Dict[str, Any], updates: Dict[str, Any]) -> Dict[
 
 class DatabaseManager:
     _instance = None
+    # 新写入光谱的存储格式（'f64le' / 'f32le' / 'json'）
+    spectrum_storage_format = DEFAULT_STORAGE_FORMAT
+    legacy_write_mode = LEGACY_WRITE_MIRROR
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, profile: Optional[ConnectionProfile] = None):
         if hasattr(self, '_init_complete') and self.db_path == db_path:
             return
         if db_path:
             self.db_path = db_path
-            self.conn = None
+            self.pool = None
+            self._schema_ready = False
+            self.profile = profile or ConnectionProfile()
+            self.maintenance = MaintenanceScheduler(self.profile.maintenance_interval_s)
+            self.axis_cache = WavelengthAxisCache()
+            self.payload_source = SpectrumPayloadSource(lambda: self.conn)
             self._connect()
             self._create_tables()
             self._run_pending_migrations()
             self._create_compatibility_views()
+            self._schema_ready = True
+            if self.legacy_write_mode == LEGACY_WRITE_LAZY_VIEW:
+                self._refresh_lazy_legacy_views()
             self._init_complete = True
             print(f"数据库已连接并初始化: {db_path}")
 
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """
+        当前线程使用的连接：写操作（持有写锁）期间为专用写连接，
+        否则为线程独享的读连接。
+        """
+        pool = getattr(self, 'pool', None)
+        return pool.connection() if pool else None
+
     def _connect(self):
         try:
             db_dir = os.path.dirname(self.db_path)
             os.makedirs(db_dir, exist_ok=True)
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.pool = ConnectionPool(self.create_connection)
+            journal_mode = self.pool.writer.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal_mode != self.profile.journal_mode.lower():
+                print(f"[Database] journal_mode={journal_mode}（请求 {self.profile.journal_mode}）")
         except Exception as e:
+            self.pool = None
             print(f"数据库连接失败: {e}")
 
+    def create_connection(self) -> sqlite3.Connection:
+        """打开一个应用了连接配置的新连接（连接池与独立工具脚本共用）。"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        apply_connection_profile(conn, self.profile)
+        self._configure_connection(conn)
+        return conn
+
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        conn.create_function("spectrum_payload_json", 2, _spectrum_payload_json, deterministic=True)
+        if self.legacy_write_mode == LEGACY_WRITE_LAZY_VIEW and self._schema_ready:
+            self._create_lazy_legacy_view(conn)
+
+    def set_legacy_write_mode(self, mode: str) -> None:
+        """切换旧版 spectra 表写入模式（见 LEGACY_WRITE_MODES）。"""
+        if mode not in LEGACY_WRITE_MODES:
+            raise ValueError(f"Unknown legacy write mode: {mode}")
+        self.legacy_write_mode = mode
+        if mode == LEGACY_WRITE_LAZY_VIEW:
+            self._refresh_lazy_legacy_views()
+
+    def _refresh_lazy_legacy_views(self) -> None:
+        if not self.pool:
+            return
+        for conn in self.pool.connections():
+            self._create_lazy_legacy_view(conn)
+
+    @staticmethod
+    def _legacy_spectra_view_sql(temp: bool) -> str:
+        """
+        legacy_spectra_view：旧表行（原 spectrum_id）并上尚无镜像行的结构化光谱（spectrum_id = -spectrum_set_id）。
+        持久视图只能还原 JSON 格式的载荷，二进制载荷为 NULL；TEMP 版本借助连接级函数
+        spectrum_payload_json 解码全部格式，并在本连接内遮蔽同名的持久视图。
+        """
+        if temp:
+            wavelengths = ("spectrum_payload_json(COALESCE(wa.axis_blob, sd.wavelengths_blob), "
+                           "COALESCE(wa.storage_format, sd.storage_format))")
+            intensities = "spectrum_payload_json(sd.intensities_blob, sd.storage_format)"
+        else:
+            wavelengths = "CASE WHEN sd.storage_format = 'json' THEN CAST(sd.wavelengths_blob AS TEXT) END"
+            intensities = "CASE WHEN sd.storage_format = 'json' THEN CAST(sd.intensities_blob AS TEXT) END"
+        return f"""
+            CREATE {'TEMP ' if temp else ''}VIEW IF NOT EXISTS {'' if temp else 'main.'}legacy_spectra_view AS
+            SELECT
+                s.spectrum_id,
+                s.experiment_id,
+                s.type,
+                s.timestamp,
+                s.wavelengths,
+                s.intensities,
+                s.spectrum_set_id,
+                s.data_id
+            FROM main.spectra s
+            UNION ALL
+            SELECT
+                -ss.spectrum_set_id AS spectrum_id,
+                ss.experiment_id,
+                CASE
+                    WHEN ss.spectrum_role = 'Result' AND ss.result_variant IS NOT NULL
+                        THEN 'Result_' || ss.result_variant
+                    ELSE COALESCE(ss.capture_label, ss.spectrum_role, 'Unknown')
+                END AS type,
+                ss.captured_at AS timestamp,
+                {wavelengths} AS wavelengths,
+                {intensities} AS intensities,
+                ss.spectrum_set_id,
+                ss.data_id
+            FROM main.spectrum_sets ss
+            JOIN main.spectrum_data sd ON sd.data_id = ss.data_id
+            LEFT JOIN main.wavelength_axes wa ON wa.axis_id = sd.axis_id
+            WHERE NOT EXISTS (SELECT 1 FROM main.spectra m WHERE m.spectrum_set_id = ss.spectrum_set_id)
+            """
+
+    @classmethod
+    def _create_lazy_legacy_view(cls, conn: sqlite3.Connection) -> None:
+        """
+        lazy-view 模式：创建解码全部载荷格式的 TEMP 版 legacy_spectra_view。视图依赖连接级自定义函数，
+        因此只对本进程打开的连接可见。
+        """
+        try:
+            conn.execute(cls._legacy_spectra_view_sql(temp=True))
+        except sqlite3.OperationalError as e:
+            print(f"创建旧表按需视图失败: {e}")
+
+    @_writes
     def _create_tables(self):
         """【重大修改】重新定义数据库结构，增加项目、分析结果等表。"""
 
@@ -121,6 +281,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"创建数据表失败: {e}")
 
+    @_writes
     def _create_compatibility_views(self):
         if not self.conn:
             return
@@ -146,6 +307,8 @@ class DatabaseManager:
             JOIN spectrum_data sd ON sd.data_id = ss.data_id
             """)
 
+            cursor.execute(self._legacy_spectra_view_sql(temp=False))
+
             cursor.execute("""
             CREATE VIEW IF NOT EXISTS legacy_analysis_runs_view AS
             SELECT
@@ -171,6 +334,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"创建兼容视图失败: {e}")
 
+    @_writes
     def _run_pending_migrations(self):
         if not self.conn:
             return
@@ -192,29 +356,28 @@ class DatabaseManager:
         try:
             cursor = self.conn.cursor()
             cursor.execute("""
-                SELECT spectrum_set_id, type, timestamp, wavelengths, intensities
-                FROM legacy_spectrum_sets_view
-                WHERE experiment_id = ?
-                ORDER BY timestamp, spectrum_set_id
+                SELECT ss.spectrum_set_id, ss.capture_label, ss.spectrum_role, ss.result_variant, ss.captured_at,
+                       sd.axis_id, sd.wavelengths_blob, sd.intensities_blob, sd.storage_format
+                FROM spectrum_sets ss
+                JOIN spectrum_data sd ON sd.data_id = ss.data_id
+                WHERE ss.experiment_id = ?
+                ORDER BY ss.captured_at, ss.spectrum_set_id
                 """, (experiment_id,))
             rows = cursor.fetchall()
             if not rows:
                 return None
             spectra_by_timestamp: Dict[str, Dict[str, Any]] = defaultdict(dict)
-            for _set_id, spec_type, timestamp_value, wl_json, int_json in rows:
+            for (_set_id, capture_label, spectrum_role, result_variant, timestamp_value,
+                 axis_id, wl_blob, int_blob, storage_format) in rows:
                 try:
-                    wavelengths = json.loads(wl_json or '[]')
-                except json.JSONDecodeError:
-                    wavelengths = []
-                try:
-                    intensities = json.loads(int_json or '[]')
-                except json.JSONDecodeError:
-                    intensities = []
+                    wavelengths = self._decode_wavelengths(axis_id, wl_blob, storage_format)
+                    intensities = decode_array(int_blob, storage_format)
+                except ValueError:
+                    continue
                 bucket = spectra_by_timestamp.setdefault(timestamp_value, {})
                 if 'wavelengths' not in bucket:
                     bucket['wavelengths'] = wavelengths
-                normalized_type = spec_type or 'Unknown'
-                bucket[normalized_type] = intensities
+                bucket[self._legacy_spectrum_type(capture_label, spectrum_role, result_variant)] = intensities
             return list(spectra_by_timestamp.values())
         except sqlite3.OperationalError:
             return None
@@ -222,6 +385,25 @@ class DatabaseManager:
             print(f"读取结构化光谱数据失败: {e}")
             return None
 
+    def _decode_wavelengths(self, axis_id: Optional[int], wl_blob: Optional[bytes],
+                            storage_format: Optional[str]) -> np.ndarray:
+        if axis_id is not None:
+            axis = self.axis_cache.get(self.conn, axis_id)
+            if axis is not None:
+                return axis
+        return decode_array(wl_blob, storage_format)
+
+    @staticmethod
+    def _legacy_spectrum_type(
+            capture_label: Optional[str],
+            spectrum_role: Optional[str],
+            result_variant: Optional[str],
+    ) -> str:
+        """与 legacy_spectrum_sets_view 中的 type 列保持一致。"""
+        if spectrum_role == 'Result' and result_variant is not None:
+            return f"Result_{result_variant}"
+        return capture_label or spectrum_role or 'Unknown'
+
     def _coerce_metric_value(self, raw_value: Optional[str]) -> Any:
         if raw_value is None:
             return None
@@ -392,29 +574,59 @@ class DatabaseManager:
             print(f"记录处理配置失败: {e}")
             return None
 
+    def _get_or_create_wavelength_axis(self, cursor: sqlite3.Cursor, wavelengths: np.ndarray) -> Optional[int]:
+        axis_hash, axis_blob = encode_axis(wavelengths)
+        select_sql = "SELECT axis_id FROM wavelength_axes WHERE axis_hash = ?"
+        try:
+            row = cursor.execute(select_sql, (axis_hash,)).fetchone()
+            if row:
+                return row[0]
+            # 其他连接可能在查询与插入之间写入了同一波长轴：忽略唯一约束冲突后重新查询
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO wavelength_axes (axis_hash, points_count, storage_format, axis_blob)
+                VALUES (?, ?, ?, ?)
+                """,
+                (axis_hash, len(wavelengths), AXIS_STORAGE_FORMAT, sqlite3.Binary(axis_blob)),
+            )
+            row = cursor.execute(select_sql, (axis_hash,)).fetchone()
+            return row[0] if row else None
+        except sqlite3.OperationalError:
+            return None
+
     def _store_structured_spectrum(
             self,
             cursor: sqlite3.Cursor,
             experiment_id: int,
             spec_type: Optional[str],
             timestamp: str,
-            wavelengths: List[float],
-            intensities: List[float],
+            wavelengths: np.ndarray,
+            intensities: np.ndarray,
             *,
             batch_run_item_id: Optional[int] = None,
             instrument_info: Optional[Dict[str, Any]] = None,
             processing_info: Optional[Dict[str, Any]] = None,
-    ) -> Optional[int]:
+    ) -> Optional[Tuple[int, int]]:
+        """写入 spectrum_data / spectrum_sets，成功时返回 (spectrum_set_id, data_id)。"""
         try:
-            wave_blob = json.dumps(wavelengths, separators=(',', ':')).encode('utf-8')
-            inten_blob = json.dumps(intensities, separators=(',', ':')).encode('utf-8')
+            storage_format = self.spectrum_storage_format
+            wave_blob = encode_array(wavelengths, storage_format)
+            inten_blob = encode_array(intensities, storage_format)
             checksum = hashlib.sha256(wave_blob + b'|' + inten_blob).hexdigest()
+            # 二进制格式共享 wavelength_axes 中的波长轴，行内不再重复存储
+            axis_id = None
+            if is_binary_format(storage_format):
+                axis_id = self._get_or_create_wavelength_axis(cursor, wavelengths)
+                if axis_id is not None:
+                    wave_blob = b''
             cursor.execute(
                 """
-                INSERT INTO spectrum_data (wavelengths_blob, intensities_blob, points_count, hash, storage_format, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO spectrum_data (
+                    wavelengths_blob, intensities_blob, points_count, hash, storage_format, created_at, axis_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
-                (sqlite3.Binary(wave_blob), sqlite3.Binary(inten_blob), len(wavelengths), checksum, 'json', timestamp),
+                (sqlite3.Binary(wave_blob), sqlite3.Binary(inten_blob), len(wavelengths), checksum, storage_format,
+                 timestamp, axis_id),
             )
             data_id = cursor.lastrowid
             instrument_state_id = self._get_or_create_instrument_state(cursor, instrument_info)
@@ -453,7 +665,7 @@ class DatabaseManager:
                     'good'
                 ),
             )
-            return cursor.lastrowid
+            return cursor.lastrowid, data_id
         except sqlite3.OperationalError:
             return None
         except Exception as e:
@@ -592,6 +804,7 @@ class DatabaseManager:
 
             return None
 
+    @_writes
     def create_batch_run(self, project_id: int, name: str, layout_reference: str = "",
 
                          operator: str = "", notes: str = "") -> Optional[int]:
@@ -667,6 +880,7 @@ class DatabaseManager:
 
             return None
 
+    @_writes
     def update_batch_run(self, batch_run_id: int, status: Optional[str] = None,
 
                          end_time: Optional[str] = None) -> bool:
@@ -723,6 +937,7 @@ class DatabaseManager:
 
             return False
 
+    @_writes
     def create_batch_items(self, batch_run_id: int, layout_data: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
 
         mapping: Dict[str, int] = {}
@@ -783,6 +998,7 @@ class DatabaseManager:
 
         return mapping
 
+    @_writes
     def attach_experiment_to_batch_item(self, item_id: int, experiment_id: int):
 
         if not self.conn:
@@ -814,6 +1030,7 @@ class DatabaseManager:
 
             print(f"关联批量明细与实验失败: {e}")
 
+    @_writes
     def update_batch_item_progress(self, item_id: int, capture_count: Optional[int] = None,
 
                                    status: Optional[str] = None):
@@ -867,6 +1084,7 @@ class DatabaseManager:
 
         self.update_batch_item_progress(item_id, status=status)
 
+    @_writes
     def update_batch_item_metadata(self, item_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
 
         if not self.conn:
@@ -918,6 +1136,7 @@ class DatabaseManager:
 
             return None
 
+    @_writes
     def find_or_create_project(self, name, description=""):
         if not self.conn:
             print("数据库连接未建立")
@@ -977,6 +1196,7 @@ class DatabaseManager:
 
             return []
 
+    @_writes
     def create_experiment(self, project_id, name, exp_type, timestamp, operator="", notes="", config_snapshot="{}"):
 
         if not self.conn: return None
@@ -1003,92 +1223,130 @@ class DatabaseManager:
 
             return None
 
+    @_writes
     def save_spectrum(
-
             self,
-
             experiment_id,
-
             spec_type,
-
             timestamp,
-
             wavelengths,
-
             intensities,
-
             *,
-
             batch_run_item_id: Optional[int] = None,
-
             instrument_info: Optional[Dict[str, Any]] = None,
-
             processing_info: Optional[Dict[str, Any]] = None,
-
     ):
-
         if not self.conn:
             return None
 
         try:
-
             cursor = self.conn.cursor()
-
-            wavelengths_array = np.asarray(wavelengths)
-
-            intensities_array = np.asarray(intensities)
-
-            wl_list = wavelengths_array.tolist()
-
-            int_list = intensities_array.tolist()
-
-            # Structured storage (fallback to legacy table on failure)
-
-            self._store_structured_spectrum(
-
+            spectrum_id = self._insert_spectrum(
                 cursor,
-
                 experiment_id,
-
                 spec_type,
-
                 timestamp,
-
-                wl_list,
-
-                int_list,
-
+                wavelengths,
+                intensities,
                 batch_run_item_id=batch_run_item_id,
-
                 instrument_info=instrument_info,
-
                 processing_info=processing_info,
-
-            )
-
-            wl_str = json.dumps(wl_list)
-
-            int_str = json.dumps(int_list)
-
-            cursor.execute(
-                """
-                INSERT INTO spectra (experiment_id, type, timestamp, wavelengths, intensities)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (experiment_id, spec_type, timestamp, wl_str, int_str)
             )
             self.conn.commit()
-
-            return cursor.lastrowid
-
+            return spectrum_id
         except Exception as e:
-
             self.conn.rollback()
-
             print(f"光谱数据入库失败: {e}")
-
             return None
 
+    @_writes
+    def save_spectra_batch(
+            self,
+            records: List[Dict[str, Any]],
+            conn: Optional[sqlite3.Connection] = None,
+    ) -> List[Optional[int]]:
+        """
+        在单个事务中写入多条光谱（每条记录的键与 save_spectrum 参数一致），只提交一次。
+        整批失败时回滚并逐条重试，避免一条坏数据拖累整批。
+        `conn` 可指定其他连接，默认使用连接池的专用写连接。
+        """
+        conn = conn or self.conn
+        if not conn or not records:
+            return []
+
+        try:
+            cursor = conn.cursor()
+            spectrum_ids = [self._insert_spectrum(cursor, **record) for record in records]
+            conn.commit()
+            self.maintenance.maybe_run(conn)
+            return spectrum_ids
+        except Exception as e:
+            conn.rollback()
+            print(f"批量光谱入库失败，改为逐条写入: {e}")
+
+        spectrum_ids: List[Optional[int]] = []
+        for record in records:
+            try:
+                cursor = conn.cursor()
+                spectrum_ids.append(self._insert_spectrum(cursor, **record))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"光谱数据入库失败: {e}")
+                spectrum_ids.append(None)
+        return spectrum_ids
+
+    def _insert_spectrum(
+            self,
+            cursor: sqlite3.Cursor,
+            experiment_id,
+            spec_type,
+            timestamp,
+            wavelengths,
+            intensities,
+            *,
+            batch_run_item_id: Optional[int] = None,
+            instrument_info: Optional[Dict[str, Any]] = None,
+            processing_info: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        写入结构化表（mirror 模式下同时写旧版 spectra 表），不提交事务。
+        各模式均返回 spectrum_set_id；mirror 模式下结构化写入失败时仍保留旧表行，但返回 None。
+        """
+        wavelengths_array = np.asarray(wavelengths, dtype=np.float64)
+        intensities_array = np.asarray(intensities, dtype=np.float64)
+
+        # Structured storage (fallback to legacy table on failure)
+        structured = self._store_structured_spectrum(
+            cursor,
+            experiment_id,
+            spec_type,
+            timestamp,
+            wavelengths_array,
+            intensities_array,
+            batch_run_item_id=batch_run_item_id,
+            instrument_info=instrument_info,
+            processing_info=processing_info,
+        )
+
+        if self.legacy_write_mode != LEGACY_WRITE_MIRROR:
+            if structured is None:
+                raise RuntimeError("结构化光谱写入失败，且未启用旧表镜像")
+            return structured[0]
+
+        spectrum_set_id, data_id = structured if structured else (None, None)
+        wl_str = json.dumps(wavelengths_array.tolist())
+        int_str = json.dumps(intensities_array.tolist())
+        cursor.execute(
+            """
+            INSERT INTO spectra (experiment_id, type, timestamp, wavelengths, intensities, spectrum_set_id, data_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (experiment_id, spec_type, timestamp, wl_str, int_str, spectrum_set_id, data_id)
+        )
+        return spectrum_set_id
+
+    @_writes
     def save_analysis_result(self, experiment_id, analysis_type, result_data, source_spectrum_ids=None):
 
         if not self.conn:
@@ -1267,74 +1525,79 @@ class DatabaseManager:
 
             return []
 
-    def get_spectra_for_experiments(self, experiment_ids):
-
+    def get_spectra_for_experiments(self, experiment_ids, lazy: bool = False):
         """
-
         根据一个或多个实验ID，获取所有相关的光谱数据。
-
         返回一个适合 AnalysisWindow 使用的字典列表。
-
+        优先读取结构化存储，仅对尚未迁移的实验回退到旧版 spectra 表。
+        lazy=True 时结构化光谱以 LazySpectrum 返回，强度数据在首次访问时才读取解码
+        （经 payload_source 的 LRU 缓存）；旧表数据仍立即解析为字典。
         """
-
         if not self.conn or not experiment_ids:
             return []
-
         try:
-
             cursor = self.conn.cursor()
-
             # 使用占位符来安全地查询多个ID
-
             placeholders = ','.join('?' for _ in experiment_ids)
-
-            query = f"""
-
-                SELECT e.name, s.type, s.wavelengths, s.intensities
-
-                FROM spectra s
-
-                JOIN experiments e ON s.experiment_id = e.experiment_id
-
-                WHERE s.experiment_id IN ({placeholders})
-
-                ORDER BY s.experiment_id, s.spectrum_id
-
-            """
-
-            cursor.execute(query, experiment_ids)
+            spectra_by_experiment: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+            try:
+                intensities_column = "NULL" if lazy else "sd.intensities_blob"
+                cursor.execute(f"""
+                    SELECT ss.experiment_id, e.name, ss.capture_label, ss.spectrum_role, ss.result_variant,
+                           ss.spectrum_set_id, sd.data_id, sd.axis_id, sd.wavelengths_blob,
+                           {intensities_column}, sd.storage_format
+                    FROM spectrum_sets ss
+                    JOIN spectrum_data sd ON sd.data_id = ss.data_id
+                    JOIN experiments e ON ss.experiment_id = e.experiment_id
+                    WHERE ss.experiment_id IN ({placeholders})
+                    ORDER BY ss.experiment_id, ss.spectrum_set_id
+                """, experiment_ids)
+                for (exp_id, exp_name, capture_label, spectrum_role, result_variant,
+                     set_id, data_id, axis_id, wl_blob, int_blob, storage_format) in cursor.fetchall():
+                    try:
+                        wavelengths = self._decode_wavelengths(axis_id, wl_blob, storage_format)
+                        intensities = None if lazy else decode_array(int_blob, storage_format)
+                    except ValueError:
+                        continue
+                    spec_type = self._legacy_spectrum_type(capture_label, spectrum_role, result_variant)
+                    # 创建一个唯一的、可读的名称
+                    name = f"{exp_name}_{spec_type}"
+                    if lazy:
+                        spectra_by_experiment[exp_id].append(LazySpectrum(
+                            data_id, name, wavelengths, self.payload_source,
+                            experiment_id=exp_id, spectrum_type=spec_type, spectrum_set_id=set_id,
+                        ))
+                    else:
+                        spectra_by_experiment[exp_id].append({'x': wavelengths, 'y': intensities, 'name': name})
+            except sqlite3.OperationalError:
+                spectra_by_experiment.clear()
+
+            legacy_ids = [exp_id for exp_id in experiment_ids if exp_id not in spectra_by_experiment]
+            if legacy_ids:
+                legacy_placeholders = ','.join('?' for _ in legacy_ids)
+                cursor.execute(f"""
+                    SELECT s.experiment_id, e.name, s.type, s.wavelengths, s.intensities
+                    FROM spectra s
+                    JOIN experiments e ON s.experiment_id = e.experiment_id
+                    WHERE s.experiment_id IN ({legacy_placeholders})
+                    ORDER BY s.experiment_id, s.spectrum_id
+                """, legacy_ids)
+                for exp_id, exp_name, spec_type, wl_json, int_json in cursor.fetchall():
+                    spectra_by_experiment[exp_id].append({
+                        'x': np.array(json.loads(wl_json)),
+                        'y': np.array(json.loads(int_json)),
+                        'name': f"{exp_name}_{spec_type}"
+                    })
 
             spectra_list = []
-
-            for exp_name, spec_type, wl_json, int_json in cursor.fetchall():
-                wavelengths = np.array(json.loads(wl_json))
-
-                intensities = np.array(json.loads(int_json))
-
-                # 创建一个唯一的、可读的名称
-
-                unique_name = f"{exp_name}_{spec_type}"
-
-                spectra_list.append({
-
-                    'x': wavelengths,
-
-                    'y': intensities,
-
-                    'name': unique_name
-
-                })
-
+            for exp_id in sorted(spectra_by_experiment):
+                spectra_list.extend(spectra_by_experiment[exp_id])
             return spectra_list
-
-
-
         except Exception as e:
-
             print(f"获取光谱数据时发生错误: {e}")
-
             return []
 
+    @_writes
     def delete_experiments(self, experiment_ids):
 
         """
@@ -1494,7 +1757,13 @@ class DatabaseManager:
 
     def close(self):
 
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            with self.pool.writing() as writer:
+                try:
+                    # 关闭前刷新查询统计并截断 WAL 文件
+                    run_maintenance(writer, "TRUNCATE")
+                except sqlite3.Error as e:
+                    print(f"[Database] 关闭前维护失败: {e}")
+            self.pool.close()
 
-            self.conn = None
+            self.pool = None
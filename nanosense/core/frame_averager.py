@@ -0,0 +1,184 @@
+# nanosense/core/frame_averager.py
+"""
+Streaming frame averaging with spike rejection for the live acquisition path.
+
+`StreamingFrameAverager` keeps per-pixel running statistics over roughly the
+last N frames without storing any of them:
+
+- mean and variance use Welford's update with an exponential forgetting
+  factor alpha = max(1 / n, 2 / (N + 1)). The first (N + 1) / 2 frames are
+  weighted equally (plain Welford). After that the steady-state noise
+  reduction matches an N-frame boxcar (variance / N).
+- the median is a frugal stochastic estimate. Each frame moves it by
+  alpha * sqrt(pi/2) * sigma toward the frame, so it tracks like the mean but
+  ignores how far an outlier lies.
+
+Once a few frames have been seen, a frame's pixels that rise more than
+`spike_threshold` sigma above the median are treated as cosmic-ray spikes and
+replaced by the median before the update. Sigma is the per-pixel standard
+deviation median-filtered over a few neighbouring pixels, so a spike that got
+into the statistics cannot inflate its own threshold. Spikes only ever add
+counts, so a few pixels falling that far *below* the median mean an earlier
+spike (e.g. in the first frame, before rejection starts) poisoned them; those
+pixels restart from the current frame. Spikes are narrow, so this only
+applies when at most `max_spike_fraction` of the pixels are flagged. A frame
+that departs from the statistics on most pixels (integration time change,
+sample swap) restarts the averaging from that frame instead of lagging for N
+frames.
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.ndimage import median_filter
+
+AVERAGE_METHODS = ("mean", "median")
+# Frames needed before variance estimates are trusted for spike rejection.
+_WARMUP_FRAMES = 3
+_MEDIAN_GAIN = math.sqrt(math.pi / 2.0)
+# Neighbourhood for the noise estimate; wider than a cosmic-ray hit (1-3 pixels).
+_NOISE_WINDOW = 7
+
+
+class StreamingFrameAverager:
+    """Running mean / variance / approximate median of the last ~`frames` spectra."""
+
+    def __init__(
+        self,
+        pixels: int,
+        frames: int = 8,
+        method: str = "mean",
+        spike_rejection: bool = True,
+        spike_threshold: float = 6.0,
+        max_spike_fraction: float = 0.01,
+        reset_fraction: float = 0.5,
+    ):
+        if frames < 1:
+            raise ValueError("frames must be at least 1.")
+        if method not in AVERAGE_METHODS:
+            raise ValueError(f"Unknown averaging method '{method}'; expected one of {AVERAGE_METHODS}.")
+        self.pixels = int(pixels)
+        self.frames = int(frames)
+        self.method = method
+        self.spike_rejection = bool(spike_rejection)
+        self.spike_threshold = float(spike_threshold)
+        self.max_spike_fraction = float(max_spike_fraction)
+        self.reset_fraction = float(reset_fraction)
+        self._alpha_min = 2.0 / (self.frames + 1)
+        self._mean = np.zeros(self.pixels)
+        self._var = np.zeros(self.pixels)
+        self._median = np.zeros(self.pixels)
+        self._sigma = np.zeros(self.pixels)
+        self._work = np.zeros(self.pixels)
+        self._delta = np.zeros(self.pixels)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all frames; the next frame starts a new average."""
+        self.count = 0
+        self.rejected_pixels = 0
+        self.rejected_frames = 0
+        self.resets = 0
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self._var
+
+    @property
+    def median(self) -> np.ndarray:
+        return self._median
+
+    def _restart(self, frame: np.ndarray) -> None:
+        np.copyto(self._mean, frame)
+        np.copyto(self._median, frame)
+        self._var.fill(0.0)
+        self.count = 1
+
+    def _update_sigma(self) -> np.ndarray:
+        np.sqrt(self._var, out=self._work)
+        median_filter(self._work, size=_NOISE_WINDOW, mode="nearest", output=self._sigma)
+        return self._sigma
+
+    def _reject_spikes(self, frame: np.ndarray, sigma: np.ndarray) -> Optional[np.ndarray]:
+        """Return the frame with spikes replaced (or as is); None means the scene changed."""
+        # Pixels that have been flat so far (dark, saturated) must not flag every small change.
+        np.maximum(sigma, 0.1 * sigma.mean() + 1e-12, out=self._work)
+        sigma = self._work
+        np.subtract(frame, self._median, out=self._delta)
+        np.divide(self._delta, sigma, out=self._delta)
+        if np.count_nonzero(np.abs(self._delta) > self.spike_threshold) > self.reset_fraction * self.pixels:
+            return None
+        limit = self.max_spike_fraction * self.pixels
+        dips = self._delta < -self.spike_threshold
+        if 0 < np.count_nonzero(dips) <= limit:
+            self._mean[dips] = frame[dips]
+            self._median[dips] = frame[dips]
+            self._var[dips] = np.square(sigma[dips])
+        spikes = self._delta > self.spike_threshold
+        flagged = int(np.count_nonzero(spikes))
+        if flagged == 0 or flagged > limit:
+            return frame
+        np.copyto(self._work, frame)
+        np.copyto(self._work, self._median, where=spikes)
+        self.rejected_pixels += flagged
+        self.rejected_frames += 1
+        return self._work
+
+    def update(self, frame, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Add one frame and return the current denoised frame (written to `out` if given)."""
+        frame = np.asarray(frame, dtype=np.float64)
+        if frame.shape != (self.pixels,):
+            raise ValueError(f"Expected a frame of {self.pixels} pixels, got shape {frame.shape}.")
+        if out is None:
+            out = np.empty(self.pixels)
+        if self.frames == 1:
+            np.copyto(out, frame)
+            return out
+
+        if self.count == 0:
+            self._restart(frame)
+        else:
+            sigma = self._update_sigma()
+            if self.spike_rejection and self.count >= _WARMUP_FRAMES:
+                cleaned = self._reject_spikes(frame, sigma)
+                if cleaned is None:
+                    self._restart(frame)
+                    self.resets += 1
+                    np.copyto(out, frame)
+                    return out
+                frame = cleaned
+            self.count += 1
+            alpha = max(1.0 / self.count, self._alpha_min)
+            # Median step uses sigma before this frame's update.
+            np.subtract(frame, self._median, out=self._delta)
+            np.sign(self._delta, out=self._delta)
+            self._delta *= sigma
+            self._delta *= alpha * _MEDIAN_GAIN
+            self._median += self._delta
+            # Exponentially weighted Welford: var = (1 - a) * (var + a * d^2), d = x - mean.
+            np.subtract(frame, self._mean, out=self._delta)
+            self._mean += alpha * self._delta
+            np.square(self._delta, out=self._delta)
+            self._delta *= alpha
+            self._var += self._delta
+            self._var *= 1.0 - alpha
+
+        np.copyto(out, self._median if self.method == "median" else self._mean)
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames": self.frames,
+            "count": self.count,
+            "rejected_pixels": self.rejected_pixels,
+            "rejected_frames": self.rejected_frames,
+            "resets": self.resets,
+        }
+
+
+__all__ = ["AVERAGE_METHODS", "StreamingFrameAverager"]
@@ -0,0 +1,213 @@
+# nanosense/core/frame_ring.py
+"""
+Preallocated ring buffer for live spectrometer frames.
+
+The acquisition thread fills `next_slot()` in place and publishes it with
+`commit()`; readers on the GUI thread obtain read-only views of published
+frames without copying. There is exactly one writer. A view stays valid
+until the writer laps the ring, which `is_valid(seq)` lets readers check.
+
+Display uses latest-frame-wins (`latest()`), so render latency stays bounded
+by one timer tick. `FrameConsumer` is the full-rate path: it follows the
+ring on its own thread and hands every frame to a callback. `FrameCounters`
+tracks frames acquired, processed, rendered and dropped.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_RING_CAPACITY = 32
+
+
+class FrameRing:
+    """Single-writer ring of `capacity` frames, each `pixels` samples wide."""
+
+    def __init__(self, capacity: int, pixels: int, dtype=np.float64):
+        if capacity < 2:
+            raise ValueError("FrameRing capacity must be at least 2.")
+        self.capacity = int(capacity)
+        self.pixels = int(pixels)
+        self._frames = np.zeros((self.capacity, self.pixels), dtype=dtype)
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        # Sequence number of the newest published frame (1-based; 0 means empty).
+        # Only the writer assigns it, and a single int store is atomic under the GIL.
+        self._sequence = 0
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def _slot(self, seq: int) -> int:
+        return (seq - 1) % self.capacity
+
+    def next_slot(self) -> np.ndarray:
+        """Writable view of the slot the next `commit()` will publish."""
+        return self._frames[self._slot(self._sequence + 1)]
+
+    def commit(self, timestamp: Optional[float] = None) -> int:
+        """Publish the slot returned by `next_slot()` and return its sequence number."""
+        seq = self._sequence + 1
+        self._timestamps[self._slot(seq)] = time.monotonic() if timestamp is None else timestamp
+        self._sequence = seq
+        return seq
+
+    def write(self, frame, timestamp: Optional[float] = None) -> int:
+        np.copyto(self.next_slot(), frame)
+        return self.commit(timestamp)
+
+    def is_valid(self, seq: int) -> bool:
+        """True while frame `seq` has been published and not yet overwritten."""
+        current = self._sequence
+        # The writer may be filling the slot of current + 1, i.e. of current - capacity + 1.
+        return 0 < seq <= current and seq > current - self.capacity + 1
+
+    def get(self, seq: int) -> Optional[np.ndarray]:
+        if not self.is_valid(seq):
+            return None
+        view = self._frames[self._slot(seq)]
+        view.flags.writeable = False
+        return view
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray]]:
+        """`(seq, read-only view)` of the newest frame, or `(0, None)` when empty."""
+        seq = self._sequence
+        if seq == 0:
+            return 0, None
+        return seq, self.get(seq)
+
+    def timestamp(self, seq: int) -> Optional[float]:
+        if not self.is_valid(seq):
+            return None
+        return float(self._timestamps[self._slot(seq)])
+
+    def read_since(self, last_seq: int) -> Tuple[List[int], int]:
+        """
+        Sequence numbers published after `last_seq` that are still readable, and
+        how many newer frames were already overwritten (lost to this reader).
+        """
+        current = self._sequence
+        oldest = max(1, current - self.capacity + 2)
+        start = max(last_seq + 1, oldest)
+        lost = max(0, start - (last_seq + 1))
+        return list(range(start, current + 1)), lost
+
+    def reset(self) -> None:
+        self._sequence = 0
+
+
+class FrameCounters:
+    """
+    Thread-safe frame counters for the live pipeline.
+
+    `dropped` counts frames the display skipped under latest-frame-wins;
+    `lost` counts frames the full-rate consumer could not read before the
+    writer overwrote them.
+    """
+
+    FIELDS = ("acquired", "processed", "rendered", "dropped", "lost")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field: str, count: int = 1) -> None:
+        with self._lock:
+            self._values[field] += count
+
+    def set(self, field: str, value: int) -> None:
+        with self._lock:
+            self._values[field] = value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = dict.fromkeys(self.FIELDS, 0)
+
+
+class FrameConsumer:
+    """
+    Full-rate reader: calls `callback(seq, frame, timestamp)` for every frame
+    published to `ring`, in order, on a dedicated thread.
+
+    `frame` is a read-only view into the ring. Non-None return values are
+    appended to `results` for another thread to drain. If the writer
+    overwrites the slot while the callback runs, the result is discarded and
+    the frame is counted as lost.
+    """
+
+    def __init__(
+        self,
+        ring: FrameRing,
+        callback: Callable[[int, np.ndarray, float], Any],
+        counters: Optional[FrameCounters] = None,
+        poll_interval: float = 0.002,
+        max_results: int = 100_000,
+    ):
+        self.ring = ring
+        self.callback = callback
+        self.counters = counters or FrameCounters()
+        self.poll_interval = poll_interval
+        self.results: "deque[Any]" = deque(maxlen=max_results)
+        self.last_seq = ring.sequence
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="FrameConsumer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def drain(self) -> int:
+        """Process every pending frame on the calling thread; returns frames handled."""
+        seqs, lost = self.ring.read_since(self.last_seq)
+        if lost:
+            self.counters.add("lost", lost)
+        handled = 0
+        for seq in seqs:
+            self.last_seq = seq
+            frame = self.ring.get(seq)
+            timestamp = self.ring.timestamp(seq)
+            if frame is None or timestamp is None:
+                self.counters.add("lost")
+                continue
+            result = self.callback(seq, frame, timestamp)
+            if not self.ring.is_valid(seq):
+                self.counters.add("lost")
+                continue
+            if result is not None:
+                self.results.append(result)
+            self.counters.add("processed")
+            handled += 1
+        return handled
+
+    def take_results(self) -> List[Any]:
+        """Pop every result produced so far (safe against the consumer thread)."""
+        taken = []
+        while True:
+            try:
+                taken.append(self.results.popleft())
+            except IndexError:
+                return taken
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.drain():
+                self._stop.wait(self.poll_interval)
+
+
+__all__ = ["DEFAULT_RING_CAPACITY", "FrameConsumer", "FrameCounters", "FrameRing"]
@@ -10,7 +10,12 @@ and register itself by appending `(migration_id, apply)` to `MIGRATIONS`.
 from typing import Callable, List, Tuple
 import sqlite3
 
-from . import migration_0001_prepare_phase1_schema
+from . import (
+    migration_0001_prepare_phase1_schema,
+    migration_0002_snapshot_soft_delete,
+    migration_0003_binary_spectrum_storage,
+    migration_0004_wavelength_axes,
+)
 
 MigrationFunc = Callable[[sqlite3.Connection], None]
 MigrationDescriptor = Tuple[str, MigrationFunc]
@@ -20,6 +25,18 @@ MIGRATIONS: List[MigrationDescriptor] = [
         migration_0001_prepare_phase1_schema.MIGRATION_ID,
         migration_0001_prepare_phase1_schema.apply,
     ),
+    (
+        migration_0002_snapshot_soft_delete.MIGRATION_ID,
+        migration_0002_snapshot_soft_delete.apply,
+    ),
+    (
+        migration_0003_binary_spectrum_storage.MIGRATION_ID,
+        migration_0003_binary_spectrum_storage.apply,
+    ),
+    (
+        migration_0004_wavelength_axes.MIGRATION_ID,
+        migration_0004_wavelength_axes.apply,
+    ),
 ]
 
 __all__ = ["MIGRATIONS", "MigrationFunc", "MigrationDescriptor"]
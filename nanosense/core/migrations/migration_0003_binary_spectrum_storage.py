@@ -0,0 +1,82 @@
+"""
+Migration 0003: convert JSON-encoded `spectrum_data` payloads to raw
+little-endian float64 buffers (`storage_format = 'f64le'`).
+"""
+
+import hashlib
+import sqlite3
+from typing import List, Tuple
+
+from ..spectrum_codec import STORAGE_FORMAT_F64LE, STORAGE_FORMAT_JSON, decode_array, encode_array
+
+MIGRATION_ID = "0003_binary_spectrum_storage"
+
+BATCH_SIZE = 500
+
+
+def _table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table_name,),
+    )
+    return cursor.fetchone() is not None
+
+
+def _convert_rows(rows: List[Tuple[int, bytes, bytes]]) -> List[Tuple[bytes, bytes, str, str, int]]:
+    updates: List[Tuple[bytes, bytes, str, str, int]] = []
+    for data_id, wave_payload, inten_payload in rows:
+        try:
+            wavelengths = decode_array(wave_payload, STORAGE_FORMAT_JSON)
+            intensities = decode_array(inten_payload, STORAGE_FORMAT_JSON)
+        except (TypeError, ValueError):
+            continue
+        wave_blob = encode_array(wavelengths, STORAGE_FORMAT_F64LE)
+        inten_blob = encode_array(intensities, STORAGE_FORMAT_F64LE)
+        checksum = hashlib.sha256(wave_blob + b"|" + inten_blob).hexdigest()
+        updates.append(
+            (
+                sqlite3.Binary(wave_blob),
+                sqlite3.Binary(inten_blob),
+                checksum,
+                STORAGE_FORMAT_F64LE,
+                data_id,
+            )
+        )
+    return updates
+
+
+def apply(conn: sqlite3.Connection) -> None:
+    if not _table_exists(conn, "spectrum_data"):
+        return
+
+    converted = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT data_id, wavelengths_blob, intensities_blob
+            FROM spectrum_data
+            WHERE storage_format = ? AND data_id > ?
+            ORDER BY data_id
+            LIMIT ?
+            """,
+            (STORAGE_FORMAT_JSON, last_id, BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = _convert_rows(rows)
+        conn.executemany(
+            """
+            UPDATE spectrum_data
+            SET wavelengths_blob = ?, intensities_blob = ?, hash = ?, storage_format = ?
+            WHERE data_id = ?
+            """,
+            updates,
+        )
+        converted += len(updates)
+
+    print(f"[Database] Binary spectrum conversion completed: converted={converted}")
+
+
+__all__ = ["MIGRATION_ID", "apply"]
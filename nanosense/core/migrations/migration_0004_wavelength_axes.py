@@ -0,0 +1,120 @@
+"""
+Migration 0004: deduplicate wavelength axes.
+
+Introduces the `wavelength_axes` table (one row per distinct axis, keyed by
+the SHA-256 of its float64 buffer) and `spectrum_data.axis_id`. Existing binary
+rows are re-pointed to a shared axis and their per-row wavelength blob is
+emptied; JSON rows are left untouched for the legacy compatibility view.
+"""
+
+import sqlite3
+from typing import Dict
+
+from ..spectrum_codec import AXIS_STORAGE_FORMAT, BINARY_DTYPES, decode_array, encode_axis
+
+MIGRATION_ID = "0004_wavelength_axes"
+
+BATCH_SIZE = 500
+
+
+def _table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table_name,),
+    )
+    return cursor.fetchone() is not None
+
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    cursor = conn.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def _get_or_create_axis(
+    conn: sqlite3.Connection, axis_ids: Dict[str, int], wavelengths, points_count: int
+) -> int:
+    axis_hash, axis_blob = encode_axis(wavelengths)
+    axis_id = axis_ids.get(axis_hash)
+    if axis_id is not None:
+        return axis_id
+    row = conn.execute(
+        "SELECT axis_id FROM wavelength_axes WHERE axis_hash = ?", (axis_hash,)
+    ).fetchone()
+    if row:
+        axis_id = row[0]
+    else:
+        axis_id = conn.execute(
+            """
+            INSERT INTO wavelength_axes (axis_hash, points_count, storage_format, axis_blob)
+            VALUES (?, ?, ?, ?)
+            """,
+            (axis_hash, points_count, AXIS_STORAGE_FORMAT, sqlite3.Binary(axis_blob)),
+        ).lastrowid
+    axis_ids[axis_hash] = axis_id
+    return axis_id
+
+
+def _backfill_axes(conn: sqlite3.Connection) -> None:
+    axis_ids: Dict[str, int] = {}
+    linked = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT data_id, wavelengths_blob, storage_format
+            FROM spectrum_data
+            WHERE axis_id IS NULL
+              AND storage_format IN (?, ?)
+              AND LENGTH(wavelengths_blob) > 0
+              AND data_id > ?
+            ORDER BY data_id
+            LIMIT ?
+            """,
+            (*BINARY_DTYPES.keys(), last_id, BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = []
+        for data_id, wave_payload, storage_format in rows:
+            try:
+                wavelengths = decode_array(wave_payload, storage_format)
+            except ValueError:
+                continue
+            axis_id = _get_or_create_axis(conn, axis_ids, wavelengths, len(wavelengths))
+            updates.append((axis_id, data_id))
+        conn.executemany(
+            "UPDATE spectrum_data SET axis_id = ?, wavelengths_blob = X'' WHERE data_id = ?",
+            updates,
+        )
+        linked += len(updates)
+
+    print(f"[Database] Wavelength axis deduplication completed: linked={linked}, axes={len(axis_ids)}")
+
+
+def apply(conn: sqlite3.Connection) -> None:
+    if not _table_exists(conn, "spectrum_data"):
+        return
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS wavelength_axes (
+            axis_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            axis_hash TEXT NOT NULL UNIQUE,
+            points_count INTEGER NOT NULL,
+            storage_format TEXT NOT NULL DEFAULT 'f64le',
+            axis_blob BLOB NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    if not _column_exists(conn, "spectrum_data", "axis_id"):
+        conn.execute(
+            "ALTER TABLE spectrum_data ADD COLUMN axis_id INTEGER REFERENCES wavelength_axes(axis_id)"
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_spectrum_data_axis ON spectrum_data(axis_id)")
+
+    _backfill_axes(conn)
+
+
+__all__ = ["MIGRATION_ID", "apply"]
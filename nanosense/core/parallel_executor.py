@@ -0,0 +1,209 @@
+# nanosense/core/parallel_executor.py
+"""
+Process-pool fan-out for per-spectrum work on large imports.
+
+`map_spectra(task, matrix, args)` splits an (n_spectra, n_points) matrix into
+row chunks and runs `task(rows, *args)` for each chunk on a shared process
+pool. The matrix is copied once into a `multiprocessing.shared_memory` block
+that workers attach to by name, so only the chunk bounds and the small
+`args` are pickled per task. Results come back in input order regardless of
+completion order, and `progress(done, total)` is called on the calling
+thread as chunks finish, so a QThread can forward it to its `progress`
+signal.
+
+Small inputs, single-worker configurations and environments where a pool
+cannot be started run the same tasks serially in-process. Tasks must be
+module-level functions (the pool uses the "spawn" start method, which is
+safe from the GUI's multi-threaded process); the ones used by the GUI live
+at the bottom of this module, which imports no Qt. A spawned worker also
+re-imports the launching script's `__main__` module, so entry points keep
+their GUI imports under the `if __name__ == '__main__'` guard (main.py does)
+or every worker pays the full Qt start-up cost.
+"""
+
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from ..algorithms.peak_analysis import calculate_fwhm_batch, compute_spectrum_metrics, estimate_peak_positions_batch
+from ..algorithms.preprocessing import preprocess_batch
+
+# Below this many spectra the pool start-up and transfer cost outweighs the gain.
+PARALLEL_MIN_SPECTRA = 256
+# Chunks per worker: enough for load balancing and smooth progress, few enough to amortize dispatch.
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_SIZE = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Worker count for the shared pool: all cores but one, at least one."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+            _pool_workers = max_workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared pool (registered at exit; safe to call repeatedly)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def _chunk_bounds(count: int, workers: int, chunk_size: Optional[int]) -> List[tuple]:
+    if chunk_size is None:
+        chunk_size = max(MIN_CHUNK_SIZE, math.ceil(count / (workers * CHUNKS_PER_WORKER)))
+    chunk_size = max(1, int(chunk_size))
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def _run_shared_chunk(shm_name: str, shape: tuple, dtype: str, start: int, stop: int, task, args):
+    """Worker entry point: attach to the shared matrix and run `task` on rows [start, stop)."""
+    block = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        rows = matrix[start:stop]
+        rows.flags.writeable = False
+        result = list(task(rows, *args))
+        del matrix, rows
+        return result
+    finally:
+        block.close()
+
+
+def _run_serial(task, matrix, args, bounds, progress):
+    results = []
+    for start, stop in bounds:
+        results.extend(task(matrix[start:stop], *args))
+        if progress is not None:
+            progress(stop, len(matrix))
+    return results
+
+
+def map_spectra(
+    task: Callable,
+    matrix,
+    args: Sequence = (),
+    progress: Optional[Callable[[int, int], None]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    min_parallel: int = PARALLEL_MIN_SPECTRA,
+) -> list:
+    """
+    Run `task(rows, *args)` over row chunks of `matrix` and return the
+    concatenated per-row results in input order. `task` must return one
+    result per row of the chunk it is given.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    if matrix.ndim != 2:
+        raise ValueError("map_spectra expects an (n_spectra, n_points) matrix.")
+    count = matrix.shape[0]
+    if count == 0:
+        return []
+    workers = default_workers() if max_workers is None else max(1, int(max_workers))
+    bounds = _chunk_bounds(count, workers, chunk_size)
+    if workers == 1 or count < min_parallel or len(bounds) == 1:
+        return _run_serial(task, matrix, args, bounds, progress)
+
+    try:
+        pool = _get_pool(workers)
+        block = shared_memory.SharedMemory(create=True, size=max(1, matrix.nbytes))
+    except (OSError, ValueError, NotImplementedError) as exc:
+        print(f"并行执行不可用，改为串行处理: {exc}")
+        return _run_serial(task, matrix, args, bounds, progress)
+
+    pending = {}
+    try:
+        np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=block.buf)[:] = matrix
+        chunks = [None] * len(bounds)
+        pending = {
+            pool.submit(_run_shared_chunk, block.name, matrix.shape, matrix.dtype.str, start, stop, task, tuple(args)): index
+            for index, (start, stop) in enumerate(bounds)
+        }
+        done_rows = 0
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                chunks[index] = future.result()
+                start, stop = bounds[index]
+                done_rows += stop - start
+                if progress is not None:
+                    progress(done_rows, count)
+    except BrokenProcessPool as exc:
+        print(f"进程池异常终止，改为串行处理: {exc}")
+        shutdown_pool()
+        return _run_serial(task, matrix, args, bounds, progress)
+    finally:
+        # On an early exit (task or progress raised) drop queued chunks and let running ones
+        # finish before the block goes away, so no worker attaches to an unlinked name.
+        for future in pending:
+            future.cancel()
+        if pending:
+            wait(pending)
+        block.close()
+        block.unlink()
+    return [item for chunk in chunks for item in chunk]
+
+
+# --------------------------------------------------------------- Tasks ---
+def peak_positions_task(rows, wavelengths, params, peak_mask, method):
+    """Preprocess `rows` and return the peak wavelength (NaN if none) inside `peak_mask`."""
+    processed = preprocess_batch(wavelengths, rows, params)
+    _, peaks = estimate_peak_positions_batch(wavelengths[peak_mask], processed[:, peak_mask], method)
+    return peaks.tolist()
+
+
+def spectrum_metrics_task(rows, x_data, params, find_range, noise_range, method):
+    """Preprocess `rows` (skipped when `params` is None) and return `(processed, metrics)` per row."""
+    processed = rows if params is None else preprocess_batch(None, rows, params)
+    x_data = np.asarray(x_data)
+    low, high = sorted(find_range)
+    range_mask = (x_data >= low) & (x_data <= high)
+    peaks = [None] * len(processed)
+    fwhms = [None] * len(processed)
+    if np.count_nonzero(range_mask) >= 3:
+        indices, wavelengths = estimate_peak_positions_batch(x_data[range_mask], processed[:, range_mask], method)
+        peaks = list(zip(indices.tolist(), wavelengths.tolist()))
+        # FWHM on the full spectrum at the global peak index, one pass for the whole chunk
+        global_indices = np.flatnonzero(range_mask)[indices.clip(min=0)]
+        fwhms = calculate_fwhm_batch(x_data, processed, np.where(indices >= 0, global_indices, -1)[:, None])[:, 0]
+    return [
+        (np.array(row), compute_spectrum_metrics(x_data, row, find_range, noise_range, method, peak=peak, fwhm=fwhm))
+        for row, peak, fwhm in zip(processed, peaks, fwhms)
+    ]
+
+
+__all__ = [
+    "PARALLEL_MIN_SPECTRA",
+    "default_workers",
+    "map_spectra",
+    "peak_positions_task",
+    "shutdown_pool",
+    "spectrum_metrics_task",
+]
@@ -0,0 +1,260 @@
+# nanosense/core/preprocessing_pipeline.py
+"""
+Compiled per-frame preprocessing for `SpectrumProcessor`.
+
+`PreprocessingPipeline` is built once from the current analysis range,
+smoothing and baseline settings: the processing window becomes a slice, the
+Savitzky-Golay filter becomes a correlation kernel plus edge-fit matrices
+(equivalent to `savgol_filter(..., mode='interp')`), and the baseline
+algorithm is resolved from the registry. `run()` then processes a frame
+into per-thread preallocated buffers, so the live path and the full-rate
+kinetics consumer can share one pipeline without allocating per frame.
+The smoothed dark spectrum and the reference denominator are memoized per
+captured spectrum (`prepare()`). With despiking enabled, Raman signal and
+dark spectra have cosmic-ray spikes removed (`remove_spikes`) before
+smoothing, so a spike is not smeared into a fake peak. `run_roi()` skips the full-length
+reconstruction and returns only the analysis range (the ROI) as a view into
+the processed window, together with its offset in the full spectrum.
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+from scipy.ndimage import correlate1d, median_filter, uniform_filter1d
+from scipy.signal import savgol_coeffs
+
+from ..algorithms.preprocessing import get_baseline_algorithm, remove_spikes
+
+RATIO_MODES = ("Reflectance", "Transmission", "Absorbance")
+EMISSION_MODES = ("Raman", "Fluorescence")
+
+_NO_SMOOTHING = ("No Smoothing", "不平滑")
+_MOVING_AVERAGE = ("Moving Average", "移动平均")
+_MEDIAN = ("Median Filter", "中值滤波")
+
+# Replaces zero denominators and non-positive log arguments, as before.
+_EPSILON = 1e-9
+
+
+class _Smoother:
+    """One smoothing method compiled for a fixed frame length; `apply(x, out)` writes into `out`."""
+
+    def __init__(self, method: str, window: int, order: int, length: int):
+        self.kind = "none"
+        self.window = int(window)
+        self.order = int(order)
+        if method in _NO_SMOOTHING or length == 0:
+            return
+        if method in _MOVING_AVERAGE:
+            self.kind = "mean"
+        elif method in _MEDIAN:
+            self.kind = "median"
+        elif self.window % 2 == 1 and self.order < self.window <= length:
+            # Savitzky-Golay (also the fallback for unknown methods, as before).
+            self.kind = "savgol"
+            half = self.window // 2
+            self.half = half
+            self.kernel = savgol_coeffs(self.window, self.order, use="dot")
+            # Rows evaluate the polynomial fitted to the first/last window at each edge point.
+            self.left = np.vstack([savgol_coeffs(self.window, self.order, pos=i, use="dot") for i in range(half)])
+            self.right = np.vstack([
+                savgol_coeffs(self.window, self.order, pos=self.window - half + i, use="dot") for i in range(half)
+            ])
+
+    def apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        if self.kind == "savgol":
+            correlate1d(x, self.kernel, output=out, mode="constant")
+            if self.half:
+                np.dot(self.left, x[:self.window], out=out[:self.half])
+                np.dot(self.right, x[-self.window:], out=out[-self.half:])
+        elif self.kind == "mean":
+            uniform_filter1d(x, size=self.window, output=out)
+        elif self.kind == "median":
+            # Same zero padding as scipy.signal.medfilt.
+            median_filter(x, size=self.window, output=out, mode="constant")
+        else:
+            np.copyto(out, x)
+        return out
+
+
+class PreprocessingPipeline:
+    """Smoothing, mode arithmetic and baseline correction compiled for one parameter set."""
+
+    def __init__(
+        self,
+        wavelengths,
+        analysis_start: float,
+        analysis_end: float,
+        margin: float,
+        smoothing_method: str = "Savitzky-Golay",
+        smoothing_window: int = 11,
+        smoothing_order: int = 3,
+        baseline_enabled: bool = False,
+        baseline_algorithm: str = "ALS",
+        baseline_params: Optional[dict] = None,
+        despike_enabled: bool = False,
+        despike_threshold: float = 7.0,
+    ):
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.length = len(self.wavelengths)
+        self.window = None
+        if self.length:
+            proc_start = max(self.wavelengths[0], analysis_start - margin)
+            proc_end = min(self.wavelengths[-1], analysis_end + margin)
+            indices = np.flatnonzero((self.wavelengths >= proc_start) & (self.wavelengths <= proc_end))
+            if len(indices):
+                if indices[-1] - indices[0] + 1 == len(indices):
+                    self.window = slice(int(indices[0]), int(indices[-1]) + 1)
+                else:
+                    self.window = indices
+        self.size = 0 if self.window is None else len(self.wavelengths[self.window])
+
+        # ROI = analysis range without the margin; `_roi_local` indexes it inside the window.
+        self.roi = None
+        self._roi_local = None
+        self.roi_offset = 0
+        if self.window is not None:
+            window_indices = np.arange(self.length)[self.window]
+            local = np.flatnonzero((self.wavelengths[self.window] >= analysis_start)
+                                   & (self.wavelengths[self.window] <= analysis_end))
+            if len(local):
+                self.roi_offset = int(window_indices[local[0]])
+                if isinstance(self.window, slice) and local[-1] - local[0] + 1 == len(local):
+                    self._roi_local = slice(int(local[0]), int(local[-1]) + 1)
+                    self.roi = slice(self.roi_offset, self.roi_offset + len(local))
+                else:
+                    self._roi_local = local
+                    self.roi = window_indices[local]
+        self.roi_wavelengths = self.wavelengths[self.roi] if self.roi is not None else self.wavelengths[:0]
+
+        self.smoother = _Smoother(smoothing_method, smoothing_window, smoothing_order, self.size)
+        self.baseline = None
+        self.baseline_params = dict(baseline_params or {})
+        if baseline_enabled:
+            try:
+                self.baseline = get_baseline_algorithm(baseline_algorithm)
+            except ValueError:
+                # Unknown algorithm: no baseline correction, as before.
+                self.baseline = None
+        self.despike_enabled = bool(despike_enabled)
+        self.despike_threshold = float(despike_threshold)
+        self._local = threading.local()
+        self._prepared = None
+
+    def _buffer(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = np.empty(self.size, dtype=np.float64)
+            self._local.buffer = buffer
+        return buffer
+
+    def smooth(self, spectrum, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Smooth the processing window of a full-length spectrum."""
+        if out is None:
+            out = np.empty(self.size, dtype=np.float64)
+        return self.smoother.apply(np.asarray(spectrum, dtype=np.float64)[self.window], out)
+
+    def _condition(self, mode: str, spectrum, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """`smooth()`, preceded by spike removal for Raman frames when despiking is enabled."""
+        if not (self.despike_enabled and mode == "Raman"):
+            return self.smooth(spectrum, out)
+        if out is None:
+            out = np.empty(self.size, dtype=np.float64)
+        window = np.asarray(spectrum, dtype=np.float64)[self.window]
+        return self.smoother.apply(remove_spikes(window, threshold=self.despike_threshold), out)
+
+    def prepare(self, mode: str, dark=None, reference=None):
+        """
+        `(smoothed dark, safe denominator)` for `mode`, memoized on the identity
+        of `dark` and `reference`. Both are static between captures, so they
+        are smoothed once per capture instead of once per frame; recompiling
+        the pipeline (new smoothing or range) starts a fresh cache.
+        Either entry is None when the mode does not use it.
+        """
+        group = "ratio" if mode in RATIO_MODES else mode
+        cached = self._prepared
+        if cached is not None and cached[0] is dark and cached[1] is reference and cached[2] == group:
+            return cached[3], cached[4]
+
+        smoothed_dark = self._condition(mode, dark) if dark is not None else None
+        denominator = None
+        if reference is not None and (group == "ratio" or mode == "Raman"):
+            denominator = self.smooth(reference)
+            if group == "ratio" and smoothed_dark is not None:
+                np.subtract(denominator, smoothed_dark, out=denominator)
+            np.copyto(denominator, _EPSILON, where=denominator == 0)
+        for array in (smoothed_dark, denominator):
+            if array is not None:
+                array.flags.writeable = False
+        # Replaced as one tuple, so concurrent readers never see a mixed entry.
+        self._prepared = (dark, reference, group, smoothed_dark, denominator)
+        return smoothed_dark, denominator
+
+    def _process_window(self, mode: str, signal, dark, reference, result: np.ndarray) -> Optional[np.ndarray]:
+        """Processing-window result written into `result`, or None when dark/reference are missing."""
+        is_ratio = mode in RATIO_MODES
+        if is_ratio and (dark is None or reference is None):
+            return None
+
+        smoothed_dark, denominator = self.prepare(mode, dark, reference)
+        self._condition(mode, signal, result)
+        if is_ratio:
+            np.subtract(result, smoothed_dark, out=result)
+            np.divide(result, denominator, out=result)
+            if mode == "Absorbance":
+                np.copyto(result, _EPSILON, where=result <= 0)
+                np.log10(result, out=result)
+                np.negative(result, out=result)
+        elif mode in EMISSION_MODES:
+            if smoothed_dark is not None:
+                np.subtract(result, smoothed_dark, out=result)
+            # Raman uses the reference spectrum for normalization if available.
+            if denominator is not None:
+                np.divide(result, denominator, out=result)
+
+        if self.baseline is not None:
+            np.subtract(result, self.baseline(result, **self.baseline_params), out=result)
+        return result
+
+    def run(self, mode: str, signal, dark=None, reference=None, out: Optional[np.ndarray] = None):
+        """
+        Full-length result for one frame, or None when the mode lacks its
+        dark/reference spectra. Outside the processing window the result
+        holds the raw signal. Pass `out` to reuse a result buffer.
+        """
+        if self.window is None:
+            return None
+        result = self._process_window(mode, signal, dark, reference, self._buffer())
+        if result is None:
+            return None
+
+        if out is None:
+            out = np.array(signal, dtype=np.float64)
+        else:
+            np.copyto(out, signal, casting="unsafe")
+        out[self.window] = result
+        return out
+
+    def run_roi(self, mode: str, signal, dark=None, reference=None, out: Optional[np.ndarray] = None):
+        """
+        ROI-only result: a view of the analysis range inside the processed
+        window (`roi_wavelengths` is the matching x axis; `roi_offset` its
+        start index in the full spectrum). Returns None when the mode lacks
+        its dark/reference spectra or the ROI is empty.
+
+        The view's base is `out` (length `size`) if given, otherwise a new
+        window-sized array, so a result can be handed to another thread
+        without being overwritten by the next frame.
+        """
+        if self.roi is None:
+            return None
+        if out is None:
+            out = np.empty(self.size, dtype=np.float64)
+        result = self._process_window(mode, signal, dark, reference, out)
+        if result is None:
+            return None
+        return result[self._roi_local]
+
+
+__all__ = ["EMISSION_MODES", "PreprocessingPipeline", "RATIO_MODES"]
@@ -0,0 +1,148 @@
+# nanosense/core/processing_worker.py
+"""
+Latest-frame mailbox and worker thread for off-GUI-thread processing.
+
+Producers `post()` frames and `request()` recomputes; the worker thread
+always processes the newest frame, and frames posted while it was busy are
+superseded rather than queued. `request(delay)` debounces: repeated calls
+within `delay` seconds push the deadline out, so a slider drag produces one
+recompute once it settles instead of one per tick. Frames never wait for a
+pending debounce.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class LatestFrameMailbox:
+    """Double-buffered single-slot mailbox: the newest frame wins."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Optional[np.ndarray] = None
+        self._working: Optional[np.ndarray] = None
+        self._has_frame = False
+        self._dirty = False
+        self._deadline: Optional[float] = None
+        self._closed = False
+        self._stats = {"posted": 0, "superseded": 0, "delivered": 0, "requests": 0}
+
+    def post(self, frame) -> None:
+        """Copy `frame` into the mailbox, replacing any frame not yet taken."""
+        frame = np.asarray(frame)
+        with self._cond:
+            if self._pending is None or self._pending.shape != frame.shape:
+                self._pending = np.empty(frame.shape, dtype=np.float64)
+            np.copyto(self._pending, frame, casting="unsafe")
+            if self._has_frame:
+                self._stats["superseded"] += 1
+            self._has_frame = True
+            self._stats["posted"] += 1
+            self._cond.notify()
+
+    def request(self, delay: float = 0.0) -> None:
+        """Ask for a recompute of the last frame, no sooner than `delay` seconds from now."""
+        with self._cond:
+            self._stats["requests"] += 1
+            # An immediate request also cancels any debounce deadline still pending.
+            self._deadline = time.monotonic() + delay if delay > 0 else None
+            self._dirty = True
+            self._cond.notify()
+
+    def take(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Block until there is work; returns `(True, frame)` where `frame` is the
+        newest frame (or the previous one for a bare recompute, possibly None),
+        or `(False, None)` once closed or after `timeout`. The returned array
+        belongs to the caller until its next `take()`.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    return False, None
+                now = time.monotonic()
+                if self._has_frame:
+                    break
+                if self._dirty and (self._deadline is None or now >= self._deadline):
+                    break
+                waits = [t - now for t in (self._deadline if self._dirty else None, end) if t is not None]
+                if end is not None and now >= end:
+                    return False, None
+                self._cond.wait(min(waits) if waits else None)
+            if self._has_frame:
+                self._pending, self._working = self._working, self._pending
+                self._has_frame = False
+            # A new frame picks up any pending parameter change as well.
+            self._dirty = False
+            self._deadline = None
+            self._stats["delivered"] += 1
+            return True, self._working
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._stats)
+
+
+class ProcessingWorker:
+    """
+    Runs `process(frame)` on a dedicated thread for every frame taken from a
+    `LatestFrameMailbox` and passes non-exception results to `deliver`.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Optional[np.ndarray]], Any],
+        deliver: Callable[[Any], None],
+        name: str = "ProcessingWorker",
+    ):
+        self.process = process
+        self.deliver = deliver
+        self.name = name
+        self.mailbox = LatestFrameMailbox()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.mailbox.closed:
+            self.mailbox = LatestFrameMailbox()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        self.mailbox.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            ok, frame = self.mailbox.take()
+            if not ok:
+                return
+            try:
+                result = self.process(frame)
+            except Exception as exc:  # keep the worker alive on a bad frame
+                print(f"{self.name}: processing failed: {exc}")
+                continue
+            self.deliver(result)
+
+
+__all__ = ["LatestFrameMailbox", "ProcessingWorker"]
@@ -0,0 +1,123 @@
+"""
+Encoding helpers for the `spectrum_data` payload columns.
+
+Spectra are stored as raw little-endian float buffers tagged by
+`storage_format`. Legacy rows written before the binary format keep the
+`json` tag and are still decoded transparently. Wavelength axes are shared
+through the `wavelength_axes` table and always stored as float64.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+STORAGE_FORMAT_JSON = "json"
+STORAGE_FORMAT_F64LE = "f64le"
+STORAGE_FORMAT_F32LE = "f32le"
+
+DEFAULT_STORAGE_FORMAT = STORAGE_FORMAT_F64LE
+AXIS_STORAGE_FORMAT = STORAGE_FORMAT_F64LE
+
+BINARY_DTYPES = {
+    STORAGE_FORMAT_F64LE: np.dtype("<f8"),
+    STORAGE_FORMAT_F32LE: np.dtype("<f4"),
+}
+
+
+def is_binary_format(storage_format: Optional[str]) -> bool:
+    return storage_format in BINARY_DTYPES
+
+
+def encode_array(values: Any, storage_format: str = DEFAULT_STORAGE_FORMAT) -> bytes:
+    """Serialize a 1-D numeric sequence into the payload for `storage_format`."""
+    if storage_format == STORAGE_FORMAT_JSON:
+        data = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    dtype = BINARY_DTYPES.get(storage_format)
+    if dtype is None:
+        raise ValueError(f"Unsupported storage format: {storage_format}")
+    return np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+
+def decode_array(payload: Optional[bytes], storage_format: Optional[str]) -> np.ndarray:
+    """
+    Decode a stored payload into a 1-D float array.
+
+    Binary formats are wrapped with `np.frombuffer` without copying, so the
+    returned array is read-only. Callers that need to modify it must copy.
+    Raises ValueError for unknown formats or malformed JSON payloads.
+    """
+    if payload is None:
+        return np.empty(0, dtype=np.float64)
+    dtype = BINARY_DTYPES.get(storage_format)
+    if dtype is not None:
+        return np.frombuffer(payload, dtype=dtype)
+    if storage_format in (None, STORAGE_FORMAT_JSON):
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            payload = bytes(payload).decode("utf-8")
+        return np.asarray(json.loads(payload or "[]"), dtype=np.float64)
+    raise ValueError(f"Unsupported storage format: {storage_format}")
+
+
+def encode_axis(wavelengths: Any) -> Tuple[str, bytes]:
+    """Return `(axis_hash, axis_blob)` for a wavelength axis."""
+    axis_blob = encode_array(wavelengths, AXIS_STORAGE_FORMAT)
+    return hashlib.sha256(axis_blob).hexdigest(), axis_blob
+
+
+class WavelengthAxisCache:
+    """
+    Bounded LRU of decoded wavelength axes keyed by `axis_id`.
+
+    Cached arrays are read-only and shared between all spectra that reference
+    the same axis, so a plate read decodes each axis only once.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._axes: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conn: sqlite3.Connection, axis_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            axis = self._axes.get(axis_id)
+            if axis is not None:
+                self._axes.move_to_end(axis_id)
+                return axis
+        row = conn.execute(
+            "SELECT axis_blob, storage_format FROM wavelength_axes WHERE axis_id = ?",
+            (axis_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        axis = decode_array(row[0], row[1])
+        with self._lock:
+            self._axes[axis_id] = axis
+            self._axes.move_to_end(axis_id)
+            while len(self._axes) > self.maxsize:
+                self._axes.popitem(last=False)
+        return axis
+
+    def clear(self) -> None:
+        with self._lock:
+            self._axes.clear()
+
+
+__all__ = [
+    "AXIS_STORAGE_FORMAT",
+    "BINARY_DTYPES",
+    "DEFAULT_STORAGE_FORMAT",
+    "STORAGE_FORMAT_F32LE",
+    "STORAGE_FORMAT_F64LE",
+    "STORAGE_FORMAT_JSON",
+    "WavelengthAxisCache",
+    "decode_array",
+    "encode_array",
+    "encode_axis",
+    "is_binary_format",
+]
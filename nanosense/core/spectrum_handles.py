@@ -0,0 +1,175 @@
+"""
+Lazy spectrum handles for database-backed views.
+
+`DatabaseManager.get_spectra_for_experiments(..., lazy=True)` returns
+`LazySpectrum` objects that carry only metadata, the shared wavelength axis
+and the `spectrum_data.data_id`. Intensities are decoded on first access
+through a bounded `SpectrumPayloadCache`, so opening many experiments no
+longer decodes every capture up front.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .spectrum_codec import decode_array
+
+DEFAULT_PAYLOAD_CACHE_SIZE = 256
+
+# SQLite's default host parameter limit is 999 on older builds.
+_PREFETCH_CHUNK = 500
+
+
+class SpectrumPayloadCache:
+    """Bounded LRU of decoded intensity arrays keyed by `data_id`."""
+
+    def __init__(self, maxsize: int = DEFAULT_PAYLOAD_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._payloads: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, data_id: int) -> bool:
+        with self._lock:
+            return data_id in self._payloads
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._payloads)
+
+    def get(self, conn: sqlite3.Connection, data_id: int) -> np.ndarray:
+        with self._lock:
+            payload = self._payloads.get(data_id)
+            if payload is not None:
+                self._payloads.move_to_end(data_id)
+                return payload
+        row = conn.execute(
+            "SELECT intensities_blob, storage_format FROM spectrum_data WHERE data_id = ?",
+            (data_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(data_id)
+        payload = decode_array(row[0], row[1])
+        self._store(data_id, payload)
+        return payload
+
+    def prefetch(self, conn: sqlite3.Connection, data_ids: Iterable[int]) -> None:
+        """Decode every missing id with one query per chunk."""
+        with self._lock:
+            missing = [data_id for data_id in dict.fromkeys(data_ids) if data_id not in self._payloads]
+        for start in range(0, len(missing), _PREFETCH_CHUNK):
+            chunk = missing[start:start + _PREFETCH_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"""
+                SELECT data_id, intensities_blob, storage_format
+                FROM spectrum_data
+                WHERE data_id IN ({placeholders})
+                """,
+                chunk,
+            ).fetchall()
+            for data_id, blob, storage_format in rows:
+                try:
+                    self._store(data_id, decode_array(blob, storage_format))
+                except ValueError:
+                    continue
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payloads.clear()
+
+    def _store(self, data_id: int, payload: np.ndarray) -> None:
+        with self._lock:
+            self._payloads[data_id] = payload
+            self._payloads.move_to_end(data_id)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+
+class SpectrumPayloadSource:
+    """Binds a payload cache to a connection accessor (e.g. the per-thread pool)."""
+
+    def __init__(
+        self,
+        connection: Callable[[], sqlite3.Connection],
+        cache: Optional[SpectrumPayloadCache] = None,
+    ):
+        self.connection = connection
+        self.cache = cache or SpectrumPayloadCache()
+
+    def load(self, data_id: int) -> np.ndarray:
+        return self.cache.get(self.connection(), data_id)
+
+    def prefetch(self, data_ids: Iterable[int]) -> None:
+        self.cache.prefetch(self.connection(), data_ids)
+
+
+class LazySpectrum:
+    """
+    Spectrum metadata plus a deferred intensity payload.
+
+    Supports the `spec['x']` / `spec['y']` / `spec['name']` access used by
+    `AnalysisWindow`, so it can stand in for the eager dictionaries.
+    """
+
+    __slots__ = ("data_id", "name", "x", "experiment_id", "spectrum_type", "spectrum_set_id", "source")
+
+    def __init__(
+        self,
+        data_id: int,
+        name: str,
+        x: np.ndarray,
+        source: SpectrumPayloadSource,
+        experiment_id: Optional[int] = None,
+        spectrum_type: Optional[str] = None,
+        spectrum_set_id: Optional[int] = None,
+    ):
+        self.data_id = data_id
+        self.name = name
+        self.x = x
+        self.experiment_id = experiment_id
+        self.spectrum_type = spectrum_type
+        self.spectrum_set_id = spectrum_set_id
+        self.source = source
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.source.load(self.data_id)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in ("x", "y", "name"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"x": self.x, "y": self.y, "name": self.name}
+
+    def __repr__(self) -> str:
+        return f"LazySpectrum(data_id={self.data_id}, name={self.name!r})"
+
+
+def prefetch_spectra(spectra: Iterable[Any]) -> None:
+    """Batch-load the payloads of every `LazySpectrum` in `spectra`; other items are ignored."""
+    by_source: Dict[SpectrumPayloadSource, List[int]] = {}
+    for spectrum in spectra:
+        if isinstance(spectrum, LazySpectrum):
+            by_source.setdefault(spectrum.source, []).append(spectrum.data_id)
+    for source, data_ids in by_source.items():
+        source.prefetch(data_ids)
+
+
+__all__ = [
+    "DEFAULT_PAYLOAD_CACHE_SIZE",
+    "LazySpectrum",
+    "SpectrumPayloadCache",
+    "SpectrumPayloadSource",
+    "prefetch_spectra",
+]
@@ -1,24 +1,44 @@
 # nanosense/core/spectrum_processor.py
 
+import threading
+
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal
-from scipy.signal import savgol_filter
+
+from ..algorithms.preprocessing import get_baseline_algorithm
+from .preprocessing_pipeline import PreprocessingPipeline
+from .processing_worker import ProcessingWorker
 
 
 class SpectrumProcessor(QObject):
     """
     光谱数据处理器 (模型)。
     负责存储、管理和计算光谱数据，与GUI分离。
+
+    调用 start_worker() 后计算在专用线程上进行：新帧投递到“最新帧优先”的信箱，
+    参数变化在 PARAM_COALESCE_S 内合并为一次重算，结果仍通过 result_updated 发射。
+    未启动工作线程时保持同步计算。
+
+    result_mode 为 "roi" 时只计算分析范围（ROI），通过 roi_result_updated 发射
+    ROI 的波长、结果视图和 ROI 在全谱中的起始下标，不再重建全长结果谱。
     """
+    # 参数变化的合并窗口（秒）：拖动滑块时只在停顿后重算一次
+    PARAM_COALESCE_S = 0.05
+
     # 定义信号，当计算结果更新时发射
     result_updated = pyqtSignal(object, object)  # 发射 x_data, y_data
+    roi_result_updated = pyqtSignal(object, object, int)  # 发射 roi_x, roi_y, 起始下标
     background_updated = pyqtSignal(object, object)
     reference_updated = pyqtSignal(object, object)
 
     def __init__(self, wavelengths):
         super().__init__()
-        self.wavelengths = np.array(wavelengths)  # 确保是numpy数组
+        self._pipeline = None
+        self._params_lock = threading.RLock()
+        self._worker = None
+        self.wavelengths = wavelengths
         self.mode_name = "N/A"
+        self.result_mode = "full"  # "full"：全长结果谱；"roi"：只输出分析范围
 
         # 光谱数据状态
         self.background_spectrum = None
@@ -36,39 +56,112 @@ class SpectrumProcessor(QObject):
         self.baseline_lambda = 1e6  # ALS lambda参数
         self.baseline_p = 0.01  # ALS p参数
         self.baseline_niter = 10  # ALS迭代次数
+
+        # 宇宙射线尖峰去除参数（仅拉曼模式）
+        self.despike_enabled = False
+        self.despike_threshold = 7.0  # 修正Z分数阈值
         
         # 分析范围参数
         self.analysis_start = 500.0  # nm
         self.analysis_end = 900.0    # nm
         self.processing_margin = 30.0  # nm, 边界扩展
 
+    @property
+    def wavelengths(self):
+        return self._wavelengths
+
+    @wavelengths.setter
+    def wavelengths(self, value):
+        with self._params_lock:
+            self._wavelengths = np.array(value)  # 确保是numpy数组
+            self.invalidate_pipeline()
+
+    @property
+    def pipeline(self):
+        """
+        【新增】按当前波长轴、分析范围、平滑和基线参数编译的预处理流水线。
+        参数变化后首次访问时重新编译；整体替换引用，后台线程持有的旧流水线仍可安全使用。
+        """
+        pipeline = self._pipeline
+        if pipeline is not None:
+            return pipeline
+        # 与参数设置互斥，避免工作线程用改到一半的参数编译
+        with self._params_lock:
+            if self._pipeline is not None:
+                return self._pipeline
+            pipeline = PreprocessingPipeline(
+                self._wavelengths,
+                self.analysis_start,
+                self.analysis_end,
+                self.processing_margin,
+                smoothing_method=self.smoothing_method,
+                smoothing_window=self.smoothing_window,
+                smoothing_order=self.smoothing_order,
+                baseline_enabled=self.baseline_correction_enabled,
+                baseline_algorithm=self.baseline_algorithm,
+                baseline_params={
+                    'lam': self.baseline_lambda,
+                    'p': self.baseline_p,
+                    'als_niter': self.baseline_niter,
+                },
+                despike_enabled=self.despike_enabled,
+                despike_threshold=self.despike_threshold,
+            )
+            self._pipeline = pipeline
+            return pipeline
+
+    def invalidate_pipeline(self):
+        self._pipeline = None
+
     def set_smoothing_params(self, method, window, order=3):
         """设置平滑参数。"""
-        self.smoothing_method = method
-        self.smoothing_window = window
-        self.smoothing_order = order
+        with self._params_lock:
+            self.smoothing_method = method
+            self.smoothing_window = window
+            self.smoothing_order = order
+            self.invalidate_pipeline()
         print(f"平滑参数已更新: {method}, window={window}, order={order}")
-        # 参数改变后重新计算
-        self.process_and_emit()
+        # 参数改变后重新计算（工作线程模式下合并连续的修改）
+        self._request_recompute(coalesce=True)
     
     def set_baseline_params(self, enabled, algorithm="ALS", lam=1e6, p=0.01, niter=10):
         """设置基线校正参数。"""
-        self.baseline_correction_enabled = enabled
-        self.baseline_algorithm = algorithm
-        self.baseline_lambda = lam
-        self.baseline_p = p
-        self.baseline_niter = niter
+        with self._params_lock:
+            self.baseline_correction_enabled = enabled
+            self.baseline_algorithm = algorithm
+            self.baseline_lambda = lam
+            self.baseline_p = p
+            self.baseline_niter = niter
+            self.invalidate_pipeline()
         print(f"基线校正参数已更新: enabled={enabled}, algorithm={algorithm}, lambda={lam}, p={p}, niter={niter}")
-        # 参数改变后重新计算
-        self.process_and_emit()
+        # 参数改变后重新计算（工作线程模式下合并连续的修改）
+        self._request_recompute(coalesce=True)
     
+    def set_despike_params(self, enabled, threshold=7.0):
+        """【新增】设置拉曼模式的宇宙射线尖峰去除参数。"""
+        with self._params_lock:
+            self.despike_enabled = enabled
+            self.despike_threshold = threshold
+            self.invalidate_pipeline()
+        print(f"尖峰去除参数已更新: enabled={enabled}, threshold={threshold}")
+        self._request_recompute(coalesce=True)
+
     def set_analysis_range(self, start, end):
         """设置分析范围。"""
-        self.analysis_start = start
-        self.analysis_end = end
+        with self._params_lock:
+            self.analysis_start = start
+            self.analysis_end = end
+            self.invalidate_pipeline()
         print(f"分析范围已更新: {start}-{end} nm")
-        # 参数改变后重新计算
-        self.process_and_emit()
+        # 参数改变后重新计算（工作线程模式下合并连续的修改）
+        self._request_recompute(coalesce=True)
+
+    def set_result_mode(self, result_mode):
+        """【新增】切换结果输出方式："full" 发射全长结果谱，"roi" 只发射分析范围。"""
+        if result_mode not in ("full", "roi"):
+            raise ValueError(f"未知的结果模式: {result_mode}")
+        self.result_mode = result_mode
+        self._request_recompute()
 
     def set_mode(self, mode_name):
         """设置当前的测量模式。"""
@@ -105,142 +198,101 @@ class SpectrumProcessor(QObject):
         self.process_and_emit()
 
     def update_signal(self, new_signal_spectrum):
-        """用新的实时信号光谱更新状态并触发计算。"""
+        """用新的实时信号光谱更新状态并触发计算（工作线程模式下投递到信箱后立即返回）。"""
         self.latest_signal_spectrum = new_signal_spectrum
-        self.process_and_emit()
+        worker = self._worker
+        if worker is not None and new_signal_spectrum is not None:
+            worker.mailbox.post(new_signal_spectrum)
+        else:
+            self.process_and_emit()
 
-    def _apply_smoothing(self, spectrum):
-        """
-        根据设置的参数应用平滑。
-        支持多种平滑方法：No Smoothing, Savitzky-Golay, Moving Average, Median Filter
-        """
-        if spectrum is None:
-            return None
-        
-        if self.smoothing_method == "No Smoothing" or self.smoothing_method == "不平滑":
-            return spectrum
-        
-        elif self.smoothing_method == "Savitzky-Golay":
-            from scipy.signal import savgol_filter
-            return savgol_filter(spectrum, self.smoothing_window, self.smoothing_order)
-        
-        elif self.smoothing_method == "Moving Average" or self.smoothing_method == "移动平均":
-            from scipy.ndimage import uniform_filter1d
-            return uniform_filter1d(spectrum, size=self.smoothing_window)
-        
-        elif self.smoothing_method == "Median Filter" or self.smoothing_method == "中值滤波":
-            from scipy.signal import medfilt
-            return medfilt(spectrum, kernel_size=self.smoothing_window)
-        
+    def start_worker(self):
+        """【新增】把计算移到专用线程；之后 update_signal 和参数设置都不再阻塞调用线程。"""
+        if self._worker is None:
+            self._worker = ProcessingWorker(self._process_frame, self._emit_result, name="SpectrumProcessor")
+            self._worker.start()
+            if self.latest_signal_spectrum is not None:
+                self._worker.mailbox.post(self.latest_signal_spectrum)
+
+    def stop_worker(self):
+        """【新增】停止工作线程，恢复同步计算。"""
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.stop()
+
+    def _request_recompute(self, coalesce=False):
+        worker = self._worker
+        if worker is None:
+            self.process_and_emit()
         else:
-            # 未知方法，使用默认SG滤波
-            return savgol_filter(spectrum, self.smoothing_window, self.smoothing_order)
-    
-    def _apply_baseline_correction(self, spectrum):
-        """
-        应用基线校正。
-        支持ALS算法，未来可扩展ArPLS、多项式拟合等。
-        """
-        if spectrum is None or not self.baseline_correction_enabled:
-            return spectrum
-        
-        if self.baseline_algorithm == "ALS":
-            from ..algorithms.preprocessing import baseline_als
-            # 计算基线
-            baseline = baseline_als(
-                spectrum, 
-                lam=self.baseline_lambda, 
-                p=self.baseline_p, 
-                niter=self.baseline_niter
-            )
-            # 扣除基线
-            return spectrum - baseline
-        
+            worker.mailbox.request(self.PARAM_COALESCE_S if coalesce else 0.0)
+
+    def _process_frame(self, frame):
+        """工作线程：frame 为信箱中的最新帧（仅重算时可能为 None，此时使用最近的信号）。"""
+        signal = frame if frame is not None else self.latest_signal_spectrum
+        if self.result_mode == "roi":
+            return "roi", self._compute_roi_payload(signal)
+        pipeline = self.pipeline
+        if signal is None:
+            return "full", (pipeline.wavelengths, None)
+        return "full", (pipeline.wavelengths, pipeline.run(
+            self.mode_name, signal, self.background_spectrum, self.reference_spectrum
+        ))
+
+    def _compute_roi_payload(self, signal):
+        pipeline = self.pipeline
+        result = self.compute_roi(signal, pipeline=pipeline)
+        return pipeline.roi_wavelengths, result, pipeline.roi_offset
+
+    def _emit_result(self, result):
+        kind, payload = result
+        if kind == "roi":
+            self.roi_result_updated.emit(*payload)
         else:
-            # 未知算法，不进行基线校正
-            return spectrum
+            self.result_updated.emit(*payload)
+
+    def baseline_timing(self):
+        """【新增】当前基线算法的耗时统计（ms），算法未知时返回 None。"""
+        try:
+            return get_baseline_algorithm(self.baseline_algorithm).timing()
+        except ValueError:
+            return None
 
     def process_and_emit(self):
         """
         【已修改 - 基于分析范围的预处理】
         只对分析范围 ± margin 进行平滑和基线校正，避免高噪声区域影响处理质量。
+        工作线程运行时只提交一次重算请求，结果由工作线程发射。
         """
-        if self.latest_signal_spectrum is None:
-            self.result_updated.emit(self.wavelengths, None)
+        if self._worker is not None:
+            self._worker.mailbox.request()
             return
-
-        # 步骤 1: 计算有效处理范围
-        margin = self.processing_margin
-        proc_start = max(self.wavelengths[0], self.analysis_start - margin)
-        proc_end = min(self.wavelengths[-1], self.analysis_end + margin)
-        
-        # 步骤 2: 找到对应的索引范围
-        mask = (self.wavelengths >= proc_start) & (self.wavelengths <= proc_end)
-        proc_indices = np.where(mask)[0]
-        
-        # 如果没有有效索引，返回None
-        if len(proc_indices) == 0:
-            self.result_updated.emit(self.wavelengths, None)
+        if self.result_mode == "roi":
+            self.roi_result_updated.emit(*self._compute_roi_payload(self.latest_signal_spectrum))
             return
-        
-        # 步骤 3: 裁剪光谱到处理范围
-        proc_signal = self.latest_signal_spectrum[proc_indices]
-        proc_dark = self.background_spectrum[proc_indices] if self.background_spectrum is not None else None
-        proc_ref = self.reference_spectrum[proc_indices] if self.reference_spectrum is not None else None
-
-        # 步骤 4: 应用平滑（只对裁剪后的光谱）
-        processed_signal = self._apply_smoothing(proc_signal)
-        dark = self._apply_smoothing(proc_dark) if proc_dark is not None else np.zeros_like(processed_signal)
-        smoothed_ref = self._apply_smoothing(proc_ref) if proc_ref is not None else np.ones_like(processed_signal)
-
-        result_spectrum_cropped = None
-
-        # 步骤 5: 根据模式计算结果（裁剪后的数据）
-        if self.mode_name in ["Reflectance", "Transmission", "Absorbance"]:
-            if self.background_spectrum is None or self.reference_spectrum is None:
-                self.result_updated.emit(self.wavelengths, None)
-                return
-
-            effective_signal = processed_signal - dark
-            effective_ref = smoothed_ref - dark
-
-            safe_denominator = np.copy(effective_ref)
-            safe_denominator[safe_denominator == 0] = 1e-9
-
-            trans_or_refl = effective_signal / safe_denominator
-
-            if self.mode_name == 'Absorbance':
-                safe_log_argument = np.copy(trans_or_refl)
-                safe_log_argument[safe_log_argument <= 0] = 1e-9
-                result_spectrum_cropped = -1 * np.log10(safe_log_argument)
-            else:  # Reflectance or Transmission
-                result_spectrum_cropped = trans_or_refl
-
-        elif self.mode_name in ["Raman", "Fluorescence"]:
-            if self.background_spectrum is not None:
-                result_spectrum_cropped = processed_signal - dark
-            else:
-                result_spectrum_cropped = processed_signal
-            
-            # For Raman, use reference spectrum for normalization if available
-            if self.mode_name == "Raman" and self.reference_spectrum is not None:
-                safe_denominator = np.copy(smoothed_ref)
-                safe_denominator[safe_denominator == 0] = 1e-9
-                result_spectrum_cropped = result_spectrum_cropped / safe_denominator
-        else:  # 原始信号模式
-            result_spectrum_cropped = processed_signal
-        
-        # 步骤 6: 应用基线校正（只对裁剪后的光谱）
-        if result_spectrum_cropped is not None:
-            result_spectrum_cropped = self._apply_baseline_correction(result_spectrum_cropped)
-        
-        # 步骤 7: 重建完整光谱（在处理范围外填充原始未处理值）
-        # 创建完整结果数组，初始化为原始信号
-        full_result = self.latest_signal_spectrum.copy()
-        
-        # 将处理后的数据填充到对应位置
-        if result_spectrum_cropped is not None:
-            full_result[proc_indices] = result_spectrum_cropped
+        self.result_updated.emit(self.wavelengths, self.compute_result(self.latest_signal_spectrum))
 
-        # 发射完整光谱
-        self.result_updated.emit(self.wavelengths, full_result)
\ No newline at end of file
+    def compute_result(self, signal, out=None):
+        """
+        【新增】按当前模式与参数计算一条信号的完整结果谱，不修改状态、不发射信号，
+        可供全帧率处理路径（如动力学峰位跟踪）在后台线程调用。无法计算时返回 None。
+        只对分析范围 ± margin 做平滑和基线校正，范围外保留原始信号；
+        传入 out 时结果写入该数组，不再分配新数组。
+        """
+        if signal is None:
+            return None
+        return self.pipeline.run(self.mode_name, signal, self.background_spectrum, self.reference_spectrum, out=out)
+
+    def compute_roi(self, signal, out=None, pipeline=None):
+        """
+        【新增】只计算分析范围（ROI）：返回 ROI 结果视图（x 轴为 pipeline.roi_wavelengths，
+        起始下标为 pipeline.roi_offset），不重建全长结果谱、不需要逐帧掩码。
+        传入 out（长度为 pipeline.size）时视图指向该缓冲区，否则每次新建窗口大小的数组，
+        可安全交给其他线程。无法计算时返回 None。
+        """
+        if signal is None:
+            return None
+        pipeline = pipeline or self.pipeline
+        if out is not None and out.shape != (pipeline.size,):
+            out = None
+        return pipeline.run_roi(self.mode_name, signal, self.background_spectrum, self.reference_spectrum, out=out)
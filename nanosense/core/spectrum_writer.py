@@ -0,0 +1,148 @@
+# nanosense/core/spectrum_writer.py
+"""
+Write-behind persistence queue for captured spectra.
+
+`SpectrumWriteQueue` owns a dedicated writer thread that persists through the
+`DatabaseManager` writer connection. Captures submitted from the acquisition thread are grouped into a single
+transaction every `max_batch_rows` rows or `max_batch_interval_ms`
+milliseconds, whichever comes first, so the acquisition loop no longer waits
+on a commit per spectrum. Each submission returns a `Future` that resolves to
+the stored spectrum id (or None when the write failed).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BATCH_ROWS = 32
+DEFAULT_MAX_BATCH_INTERVAL_MS = 250
+DEFAULT_QUEUE_SIZE = 256
+
+_STOP = object()
+
+
+class SpectrumWriteQueue:
+    """Bounded write-behind queue in front of `DatabaseManager.save_spectra_batch`."""
+
+    def __init__(
+        self,
+        db_manager,
+        max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+        max_batch_interval_ms: int = DEFAULT_MAX_BATCH_INTERVAL_MS,
+        max_queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.db_manager = db_manager
+        self.max_batch_rows = max(1, int(max_batch_rows))
+        self.max_batch_interval = max(0.0, max_batch_interval_ms / 1000.0)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="SpectrumWriteQueue", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        experiment_id,
+        spec_type,
+        timestamp,
+        wavelengths,
+        intensities,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        Queue one spectrum for persistence; blocks while the queue is full.
+        Keyword arguments are forwarded to `DatabaseManager.save_spectrum`.
+        """
+        if self._closed:
+            raise RuntimeError("SpectrumWriteQueue is closed.")
+        self.start()
+        record: Dict[str, Any] = {
+            "experiment_id": experiment_id,
+            "spec_type": spec_type,
+            "timestamp": timestamp,
+            "wavelengths": wavelengths,
+            "intensities": intensities,
+        }
+        record.update(kwargs)
+        future: Future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commit everything queued so far; returns False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        marker: Future = Future()
+        self._queue.put(marker)
+        try:
+            marker.result(timeout=timeout)
+        except Exception:
+            return False
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush pending writes and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        pending: List[Tuple[Dict[str, Any], Future]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._commit(pending)
+                continue
+
+            if item is _STOP:
+                self._commit(pending)
+                break
+            if isinstance(item, Future):
+                self._commit(pending)
+                item.set_result(True)
+                continue
+
+            if not pending:
+                deadline = time.monotonic() + self.max_batch_interval
+            pending.append(item)
+            if len(pending) >= self.max_batch_rows:
+                self._commit(pending)
+
+    def _commit(self, pending: List[Tuple[Dict[str, Any], Future]]) -> None:
+        if not pending:
+            return
+        records = [record for record, _ in pending]
+        futures = [future for _, future in pending]
+        pending.clear()
+        try:
+            spectrum_ids = self.db_manager.save_spectra_batch(records)
+        except Exception as exc:
+            for future in futures:
+                future.set_exception(exc)
+            return
+        for future, spectrum_id in zip(futures, spectrum_ids):
+            future.set_result(spectrum_id)
+
+
+__all__ = [
+    "DEFAULT_MAX_BATCH_INTERVAL_MS",
+    "DEFAULT_MAX_BATCH_ROWS",
+    "DEFAULT_QUEUE_SIZE",
+    "SpectrumWriteQueue",
+]
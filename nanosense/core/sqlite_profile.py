@@ -0,0 +1,95 @@
+"""
+Connection profile for the nanosense SQLite database.
+
+Every connection opened by `DatabaseManager` goes through
+`apply_connection_profile`, which switches the file to WAL journaling so that
+explorer reads proceed while batch acquisition commits, relaxes fsync to
+`synchronous=NORMAL` (safe under WAL) and sizes the page cache and mmap
+window. `MaintenanceScheduler` runs `PRAGMA optimize` and a passive WAL
+checkpoint at most once per interval from the write path.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_SIZE_MB = 64
+DEFAULT_MMAP_SIZE_MB = 256
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_MAINTENANCE_INTERVAL_S = 300.0
+
+
+@dataclass
+class ConnectionProfile:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_mb: int = DEFAULT_CACHE_SIZE_MB
+    mmap_size_mb: int = DEFAULT_MMAP_SIZE_MB
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS
+    maintenance_interval_s: float = DEFAULT_MAINTENANCE_INTERVAL_S
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "ConnectionProfile":
+        """Build a profile from the `sqlite_*` keys of the application settings."""
+        settings = settings or {}
+        return cls(
+            cache_size_mb=int(settings.get("sqlite_cache_size_mb", DEFAULT_CACHE_SIZE_MB)),
+            mmap_size_mb=int(settings.get("sqlite_mmap_size_mb", DEFAULT_MMAP_SIZE_MB)),
+        )
+
+
+def apply_connection_profile(conn: sqlite3.Connection, profile: ConnectionProfile) -> str:
+    """
+    Apply `profile` to an open connection and return the effective journal mode.
+
+    `journal_mode` is persistent in the database file; the remaining pragmas are
+    per connection. In-memory databases report `memory` and keep working.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}")
+    row = conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}").fetchone()
+    conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+    # Negative cache_size is interpreted as KiB.
+    conn.execute(f"PRAGMA cache_size = {-int(profile.cache_size_mb) * 1024}")
+    conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size_mb) * 1024 * 1024}")
+    conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+    return str(row[0]).lower() if row else ""
+
+
+def run_maintenance(conn: sqlite3.Connection, checkpoint_mode: str = "PASSIVE") -> None:
+    """Refresh planner statistics and fold the WAL back into the main file."""
+    conn.execute("PRAGMA optimize")
+    conn.execute(f"PRAGMA wal_checkpoint({checkpoint_mode})").fetchall()
+
+
+class MaintenanceScheduler:
+    """Rate-limits `run_maintenance` to once per `interval_s` seconds."""
+
+    def __init__(self, interval_s: float = DEFAULT_MAINTENANCE_INTERVAL_S):
+        self.interval_s = interval_s
+        self._last_run = time.monotonic()
+
+    def maybe_run(self, conn: sqlite3.Connection) -> bool:
+        now = time.monotonic()
+        if now - self._last_run < self.interval_s:
+            return False
+        self._last_run = now
+        try:
+            run_maintenance(conn)
+        except sqlite3.Error as e:
+            print(f"[Database] Periodic maintenance skipped: {e}")
+            return False
+        return True
+
+
+__all__ = [
+    "ConnectionProfile",
+    "DEFAULT_BUSY_TIMEOUT_MS",
+    "DEFAULT_CACHE_SIZE_MB",
+    "DEFAULT_MAINTENANCE_INTERVAL_S",
+    "DEFAULT_MMAP_SIZE_MB",
+    "MaintenanceScheduler",
+    "apply_connection_profile",
+    "run_maintenance",
+]
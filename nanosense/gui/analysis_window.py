@@ -12,25 +12,55 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLi
                              QMessageBox, QFileDialog, QInputDialog, QScrollArea, QCheckBox, QDialog,
                              QButtonGroup, QTableWidget, QTableWidgetItem, QHeaderView, QToolTip)
 from PyQt5.QtGui import QCursor
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QEvent
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QEvent
 from PyQt5.QtGui import QPalette
 
 from nanosense.algorithms.peak_analysis import (
     calculate_fwhm,
+    calculate_fwhm_batch,
     PEAK_METHOD_KEYS,
     PEAK_METHOD_LABELS,
     estimate_peak_position,
+    estimate_peak_positions_batch,
 )
-from nanosense.algorithms.preprocessing import (
-    baseline_als, 
-    smooth_savitzky_golay,
-    smooth_moving_average,
-    smooth_median
-)
+from nanosense.algorithms.preprocessing import preprocess_batch
+from nanosense.core.parallel_executor import map_spectra, spectrum_metrics_task
+from nanosense.core.spectrum_handles import prefetch_spectra
 from .collapsible_box import CollapsibleBox
 from .preprocessing_dialog import PreprocessingDialog
 
 
+def _batch_params(preprocessing_params, apply_baseline, apply_smoothing):
+    """把分析窗口的预处理参数转换为 preprocess_batch 的参数（保留本窗口原有的默认值）。"""
+    return {
+        "als_lambda": 1e9,
+        "sg_window_coarse": 14,
+        "sg_window_fine": 8,
+        **(preprocessing_params or {}),
+        "baseline": bool(apply_baseline),
+        "smoothing": bool(apply_smoothing),
+    }
+
+
+def _preprocess_spectra(intensities, params):
+    """
+    批量预处理多条光谱：按点数分组堆叠成二维数组，每组调用一次 preprocess_batch。
+    返回与输入顺序一致的一维数组列表。
+    """
+    intensities = [np.asarray(y, dtype=np.float64) for y in intensities]
+    results = list(intensities)
+    groups = {}
+    for index, y in enumerate(intensities):
+        groups.setdefault(y.shape, []).append(index)
+    for shape, indices in groups.items():
+        if len(shape) != 1 or shape[0] == 0:
+            continue
+        processed = preprocess_batch(None, np.vstack([intensities[i] for i in indices]), params)
+        for index, row in zip(indices, processed):
+            results[index] = row
+    return results
+
+
 class SummaryReportWorker(QThread):
     """一个专门在后台批量分析并生成汇总报告的工作线程。"""
     progress = pyqtSignal(int, str)  # 发射进度（百分比，消息）
@@ -52,40 +82,36 @@ class SummaryReportWorker(QThread):
         self.peak_method = peak_method
         self.min_height = min_height
 
-    def _preprocess_intensity(self, intensity):
-        """应用预处理（基线校正和平滑）"""
-        if not self.preprocessing_enabled:
-            return np.asarray(intensity)
-        working = np.asarray(intensity)
-        if self.apply_baseline:
-            als_lambda = self.preprocessing_params.get("als_lambda", 1e9)
-            als_p = self.preprocessing_params.get("als_p", 0.01)
-            baseline = baseline_als(working, lam=als_lambda, p=als_p)
-            working = working - baseline
-        if self.apply_smoothing:
-            method = self.preprocessing_params.get("smoothing_method", "Savitzky-Golay")
-            
-            if method == "Savitzky-Golay":
-                sg_window_coarse = self.preprocessing_params.get("sg_window_coarse", 14)
-                sg_poly_coarse = self.preprocessing_params.get("sg_polyorder_coarse", 3)
-                sg_window_fine = self.preprocessing_params.get("sg_window_fine", 8)
-                sg_poly_fine = self.preprocessing_params.get("sg_polyorder_fine", 3)
-                sg_two_stage = self.preprocessing_params.get("sg_two_stage", True)
-                coarse = smooth_savitzky_golay(working, window_length=sg_window_coarse, polyorder=sg_poly_coarse)
-                if sg_two_stage:
-                    working = smooth_savitzky_golay(coarse, window_length=sg_window_fine, polyorder=sg_poly_fine)
-                else:
-                    working = coarse
-            
-            elif method == "Moving Average":
-                window_size = self.preprocessing_params.get("ma_window", 5)
-                working = smooth_moving_average(working, window_size=window_size)
-                
-            elif method == "Median Filter":
-                kernel_size = self.preprocessing_params.get("med_kernel", 5)
-                working = smooth_median(working, kernel_size=kernel_size)
-                
-        return working
+    def _analyze_all(self, find_range, noise_range):
+        """
+        按波长轴分组堆叠全部光谱，经 map_spectra 完成预处理与指标计算。
+        返回 {名称: (处理后强度, 指标字典)}，顺序与输入一致。
+        """
+        params = None
+        if self.preprocessing_enabled and (self.apply_baseline or self.apply_smoothing):
+            params = _batch_params(self.preprocessing_params, self.apply_baseline, self.apply_smoothing)
+
+        groups = {}
+        for name, data in self.spectra.items():
+            x_data = np.asarray(data['x'], dtype=np.float64)
+            groups.setdefault((x_data.shape, x_data.tobytes()), (x_data, []))[1].append(name)
+
+        total = max(1, len(self.spectra))
+        results = {}
+        for x_data, names in groups.values():
+            offset = len(results)
+
+            def report(done, _count, offset=offset):
+                self.progress.emit(5 + int((offset + done) / total * 60), f"Analyzed {offset + done}/{total} spectra")
+
+            matrix = np.vstack([np.asarray(self.spectra[name]['y'], dtype=np.float64) for name in names])
+            rows = map_spectra(
+                spectrum_metrics_task, matrix,
+                args=(x_data, params, find_range, noise_range, self.peak_method),
+                progress=report,
+            )
+            results.update(zip(names, rows))
+        return {name: results[name] for name in self.spectra}
 
     def _format_value(self, value, precision=4):
         """格式化数值显示"""
@@ -104,126 +130,28 @@ class SummaryReportWorker(QThread):
             os.makedirs(report_folder, exist_ok=True)
             self.progress.emit(5, "Output folder created")
 
-            total_spectra = len(self.spectra)
-            
             # 获取寻峰范围和噪声范围
             min_wl, max_wl = self.find_range if self.find_range else (450.0, 750.0)
             if min_wl > max_wl:
                 min_wl, max_wl = max_wl, min_wl
-            
+
             noise_start, noise_end = self.noise_range
             if noise_start > noise_end:
                 noise_start, noise_end = noise_end, noise_start
 
-            # 5-65%: 计算所有光谱的完整指标
+            # 5-65%: 预处理并计算所有光谱的完整指标（大批量时分发到进程池）
+            results = self._analyze_all((min_wl, max_wl), (noise_start, noise_end))
+            self._processed = {name: processed for name, (processed, _) in results.items()}
+
             all_peak_wls = []  # 用于计算重复性
             all_peak_ints = []
             row_calculations = []
-
-            for i, (name, data) in enumerate(self.spectra.items()):
-                progress_pct = 5 + int((i / total_spectra) * 60)
-                self.progress.emit(progress_pct, f"Analyzing: {name}")
-                
-                x_data = np.asarray(data['x'])
-                y_data = self._preprocess_intensity(data['y'])
-
-                # 初始化指标字典
-                metrics = {
-                    "Spectrum": data.get("name", name),
-                    "peak_wl": np.nan, "peak_int": np.nan, "fwhm": np.nan,
-                    "rms_noise": np.nan, "c_noise": np.nan, "snr": np.nan,
-                    "q_factor": np.nan, "peak_area": np.nan,
-                    "skewness": np.nan, "slope": np.nan, "ripple": np.nan,
-                    "noise_mean": np.nan  # 噪声区域均值，用于 LOB/LOD/LOQ
-                }
-
-                # 定义掩码
-                range_mask = (x_data >= min_wl) & (x_data <= max_wl)
-                noise_mask = (x_data >= noise_start) & (x_data <= noise_end)
-
-                # A. 寻峰与峰形分析
-                peak_index_global = None
-                if np.count_nonzero(range_mask) >= 3:
-                    x_subset = x_data[range_mask]
-                    y_subset = np.asarray(y_data)[range_mask]
-
-                    # 计算偏度
-                    try:
-                        metrics['skewness'] = float(skew(y_subset)) if len(y_subset) > 0 else np.nan
-                    except Exception:
-                        pass
-
-                    # 寻峰
-                    subset_index, peak_wavelength = estimate_peak_position(x_subset, y_subset, self.peak_method)
-                    if peak_wavelength is not None:
-                        if subset_index is None or subset_index < 0 or subset_index >= len(x_subset):
-                            subset_index = int(np.argmin(np.abs(x_subset - peak_wavelength)))
-
-                        peak_value = float(y_subset[subset_index])
-                        # 【已删除阈值检查】不再过滤低强度峰值
-                        metrics['peak_wl'] = float(peak_wavelength)
-                        metrics['peak_int'] = peak_value
-
-                        global_indices = np.where(range_mask)[0]
-                        peak_index_global = int(global_indices[subset_index])
-
-                        # 计算 FWHM
-                        fwhm_results = calculate_fwhm(x_data, y_data, [peak_index_global])
-                        if fwhm_results:
-                            metrics['fwhm'] = fwhm_results[0]
-
-                        # 计算 Q Factor
-                        if not np.isnan(metrics['peak_wl']) and metrics.get('fwhm', 0) > 0:
-                            metrics['q_factor'] = metrics['peak_wl'] / metrics['fwhm']
-
-                        # 收集数据用于重复性统计
-                        all_peak_wls.append(metrics['peak_wl'])
-                        all_peak_ints.append(metrics['peak_int'])
-
-                # B. 噪声与基线分析
-                if np.count_nonzero(noise_mask) >= 3:
-                    x_noise = x_data[noise_mask]
-                    y_noise = np.asarray(y_data)[noise_mask]
-                    
-                    # 记录噪声区域的原始均值（用于 LOB/LOD/LOQ 计算）
-                    metrics['noise_mean'] = float(np.mean(y_noise))
-
-                    # 线性拟合计算基线斜率
-                    if np.ptp(x_noise) > 0:
-                        slope, intercept = np.polyfit(x_noise, y_noise, 1)
-                        metrics['slope'] = float(slope)
-                        detrended = y_noise - (slope * x_noise + intercept)
-                    else:
-                        detrended = y_noise - np.mean(y_noise)
-                        metrics['slope'] = 0.0
-
-                    # 计算噪声指标
-                    metrics['rms_noise'] = float(np.sqrt(np.mean(detrended ** 2)))
-                    metrics['c_noise'] = float(np.ptp(detrended))
-                    metrics['ripple'] = float(np.std(detrended))
-
-                # C. 衍生指标 SNR
-                if not np.isnan(metrics['peak_int']) and metrics['rms_noise'] > 0:
-                    metrics['snr'] = float(metrics['peak_int'] / metrics['rms_noise'])
-
-                # D. 峰面积积分
-                if np.count_nonzero(range_mask) >= 2:
-                    interval = None
-                    if peak_index_global is not None and not np.isnan(metrics['fwhm']) and not np.isnan(metrics['peak_wl']):
-                        interval = (metrics['peak_wl'] - 1.5 * metrics['fwhm'], 
-                                   metrics['peak_wl'] + 1.5 * metrics['fwhm'])
-                    
-                    if interval is None:
-                        interval = (min_wl, max_wl)
-
-                    left_x, right_x = sorted(interval)
-                    left_x = max(left_x, np.min(x_data))
-                    right_x = min(right_x, np.max(x_data))
-
-                    area_mask = (x_data >= left_x) & (x_data <= right_x)
-                    if np.count_nonzero(area_mask) >= 2:
-                        metrics['peak_area'] = float(np.trapz(y_data[area_mask], x_data[area_mask]))
-
+            for name, data in self.spectra.items():
+                metrics = {"Spectrum": data.get("name", name), **results[name][1]}
+                if not np.isnan(metrics['peak_wl']):
+                    # 收集数据用于重复性统计
+                    all_peak_wls.append(metrics['peak_wl'])
+                    all_peak_ints.append(metrics['peak_int'])
                 row_calculations.append(metrics)
 
             # 65-70%: 计算群体统计指标（重复性）
@@ -290,11 +218,11 @@ class SummaryReportWorker(QThread):
             avg_x = next(iter(self.spectra.values()))['x']
             all_spectra_dict = {'Wavelength (nm)': avg_x}
             for name, data in self.spectra.items():
-                all_spectra_dict[data.get('name', name)] = self._preprocess_intensity(data['y'])
+                all_spectra_dict[data.get('name', name)] = self._processed[name]
             all_spectra_df = pd.DataFrame(all_spectra_dict)
 
             # Sheet 4: Average Spectrum - 平均光谱
-            avg_y = np.mean([self._preprocess_intensity(data['y']) for data in self.spectra.values()], axis=0)
+            avg_y = np.mean(list(self._processed.values()), axis=0)
             avg_spectrum_df = pd.DataFrame({
                 'Wavelength (nm)': avg_x,
                 'Average Intensity': avg_y
@@ -340,7 +268,7 @@ class SummaryReportWorker(QThread):
             colors = plt.cm.tab20(np.linspace(0, 1, len(self.spectra)))
             for idx, (name, data) in enumerate(self.spectra.items()):
                 x_vals = np.asarray(data['x'])
-                y_vals = self._preprocess_intensity(data['y'])
+                y_vals = self._processed[name]
                 
                 # 只绘制在范围内的数据
                 mask = (x_vals >= min_wl) & (x_vals <= max_wl)
@@ -384,8 +312,26 @@ class AverageCalculator(QThread):
             self.finished.emit(None)
 
 DEFAULT_CURVES_TO_DISPLAY = 20
+# 超出首屏的光谱按批次在事件循环中逐步加载，避免一次性解码全部强度数据
+STREAM_CHUNK_SIZE = 25
 AVERAGE_CURVE_KEY = "__average_curve__"
 
+
+class _SpectrumEntry(dict):
+    """
+    self.spectra 中的一项。强度不在窗口中常驻：'y' 每次从 'source'（LazySpectrum 或普通字典）读取，
+    LazySpectrum 经 payload_source 的 LRU 缓存解码，内存占用由缓存上限决定。
+    """
+
+    def __getitem__(self, key):
+        if key == 'y':
+            return dict.__getitem__(self, 'source')['y']
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key == 'y' else dict.get(self, key, default)
+
+
 class AnalysisWindow(QMainWindow):
 
     def __init__(self, spectra_data=None, parent=None):
@@ -431,6 +377,10 @@ class AnalysisWindow(QMainWindow):
         self.current_category_filter = "absorbance"
         self.metrics_table = None
         self.metrics_headers = []
+        self._pending_spectra = []
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setInterval(0)
+        self._stream_timer.timeout.connect(self._load_next_spectra_chunk)
 
         self.init_ui()
         self.connect_signals()
@@ -463,6 +413,8 @@ class AnalysisWindow(QMainWindow):
         elif isinstance(spectra_data, dict):
             spectra_list_of_dicts.append(spectra_data)
 
+        self._stream_timer.stop()
+        self._pending_spectra = []
         self.plot_widget.clear()
         self.plot_widget.addItem(self.main_peak_marker)
         # self.plot_widget.addItem(self.region_selector)
@@ -480,41 +432,12 @@ class AnalysisWindow(QMainWindow):
         self.total_spectra_count = len(spectra_list_of_dicts)
         self._update_display_count_and_title()
 
-        # 【核心修改】为所有光谱创建曲线，但只显示一部分
-        for i, spec_dict in enumerate(spectra_list_of_dicts):
-            x, y, name = spec_dict['x'], spec_dict['y'], spec_dict['name']
-            # 创建一个唯一的内部key，例如 "测试02_Signal___1"
-            key = f"{name}___{i}"
-
-            item = QListWidgetItem(name)
-            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
-
-            # 将这个唯一的key存入列表项中，作为它的“身份证”
-            item.setData(Qt.UserRole, key)
-
-            # 默认只勾选并显示前 DEFAULT_CURVES_TO_DISPLAY 条
-            should_be_visible = (i < DEFAULT_CURVES_TO_DISPLAY)
-            item.setCheckState(Qt.Checked if should_be_visible else Qt.Unchecked)
-
-            color = pg.Color((i * 30 + 50) % 255, (i * 50 + 100) % 255, (i * 70 + 150) % 255)
-            pen = pg.mkPen(color=color, width=1)
-
-            # 为所有光谱都创建曲线对象
-            curve_item = self.plot_widget.plot(x, y, pen=pen, name=name)
-            curve_item.setVisible(should_be_visible)  # 根据标志位设置初始可见性
-
-            category = spec_dict.get('category') or "absorbance"
-            self.spectra[key] = {
-                'x': x,
-                'y': y,
-                'name': name,
-                'curve': curve_item,
-                'list_item': item,
-                'category': category
-            }
-            self.spectra_list_widget.addItem(item)
-            self.analysis_target_combo.addItem(name)
-            self.analysis_target_combo.setItemData(self.analysis_target_combo.count() - 1, key)
+        # 【核心修改】立即加载并显示前 DEFAULT_CURVES_TO_DISPLAY 条，其余交给定时器分批加载
+        head = spectra_list_of_dicts[:DEFAULT_CURVES_TO_DISPLAY]
+        prefetch_spectra(head)
+        for i, spec_dict in enumerate(head):
+            self._add_spectrum_entry(i, spec_dict)
+        self._pending_spectra = list(enumerate(spectra_list_of_dicts))[DEFAULT_CURVES_TO_DISPLAY:]
 
         if spectra_list_of_dicts:
             self.analysis_target_combo.setCurrentIndex(0)
@@ -533,6 +456,72 @@ class AnalysisWindow(QMainWindow):
 
         self._refresh_plot_curves()
 
+        if self._pending_spectra:
+            self._stream_timer.start()
+
+    def _add_spectrum_entry(self, i, spec_dict):
+        """为一条光谱创建列表项；曲线在首次显示时才创建（见 _ensure_curves），强度数据按需读取。"""
+        x, name = spec_dict['x'], spec_dict['name']
+        # 创建一个唯一的内部key，例如 "测试02_Signal___1"
+        key = f"{name}___{i}"
+
+        item = QListWidgetItem(name)
+        item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+
+        # 将这个唯一的key存入列表项中，作为它的“身份证”
+        item.setData(Qt.UserRole, key)
+
+        # 默认只勾选并显示前 DEFAULT_CURVES_TO_DISPLAY 条
+        should_be_visible = (i < DEFAULT_CURVES_TO_DISPLAY)
+        item.setCheckState(Qt.Checked if should_be_visible else Qt.Unchecked)
+
+        color = pg.Color((i * 30 + 50) % 255, (i * 50 + 100) % 255, (i * 70 + 150) % 255)
+        pen = pg.mkPen(color=color, width=1)
+
+        category = spec_dict.get('category') or "absorbance"
+        self.spectra[key] = _SpectrumEntry(
+            x=x,
+            source=spec_dict,
+            name=name,
+            curve=None,
+            pen=pen,
+            list_item=item,
+            category=category,
+        )
+        self.spectra_list_widget.addItem(item)
+        self.analysis_target_combo.addItem(name)
+        self.analysis_target_combo.setItemData(self.analysis_target_combo.count() - 1, key)
+        return item
+
+    def _load_next_spectra_chunk(self):
+        """定时器回调：加载下一批光谱，全部完成后刷新计数与指标表。"""
+        chunk = self._pending_spectra[:STREAM_CHUNK_SIZE]
+        self._pending_spectra = self._pending_spectra[STREAM_CHUNK_SIZE:]
+        prefetch_spectra(spec_dict for _, spec_dict in chunk)
+
+        self.analysis_target_combo.blockSignals(True)
+        items = [self._add_spectrum_entry(i, spec_dict) for i, spec_dict in chunk]
+        for item in items:
+            item.setHidden(self.spectra[item.data(Qt.UserRole)]['category'] != self.current_category_filter)
+        self._ensure_curves(self.spectra[item.data(Qt.UserRole)] for item in items)
+        self.analysis_target_combo.blockSignals(False)
+
+        if not self._pending_spectra:
+            self._stream_timer.stop()
+            self._update_display_count_and_title()
+            self._refresh_metrics_table()
+
+    def _ensure_curves(self, entries):
+        """为其中勾选且未被分类隐藏、还没有曲线的光谱创建曲线（按当前显示模式整批计算强度）。"""
+        missing = [data for data in entries
+                   if data['curve'] is None
+                   and data['list_item'].checkState() == Qt.Checked and not data['list_item'].isHidden()]
+        if not missing:
+            return
+        display = self._get_display_intensities([data['y'] for data in missing])
+        for data, display_y in zip(missing, display):
+            data['curve'] = self.plot_widget.plot(data['x'], display_y, pen=data['pen'], name=data['name'])
+
     def _update_display_count_and_title(self):
         """
         【新增】重新计算当前显示的曲线数量，并更新图表标题。
@@ -685,11 +674,35 @@ class AnalysisWindow(QMainWindow):
         # 临时存储每行的单体指标
         row_calculations = []
 
+        processed = self._get_display_intensities([data['y'] for _, data in filtered_items])
+
+        # 按波长轴分组，整批寻峰
+        peak_groups = {}
+        for position, ((_, data), y_data) in enumerate(zip(filtered_items, processed)):
+            x_data = np.asarray(data['x'], dtype=np.float64)
+            if x_data.shape != np.shape(y_data):
+                continue
+            key = (x_data.shape, x_data.tobytes())
+            peak_groups.setdefault(key, (x_data, []))[1].append(position)
+        batch_peaks = {}
+        batch_fwhms = {}
+        for x_data, positions in peak_groups.values():
+            range_mask = (x_data >= min_wl) & (x_data <= max_wl)
+            if np.count_nonzero(range_mask) < 3:
+                continue
+            matrix = np.vstack([np.asarray(processed[position], dtype=np.float64)[range_mask] for position in positions])
+            indices, wavelengths = estimate_peak_positions_batch(x_data[range_mask], matrix, method_key)
+            # 在完整光谱上按全局峰位整批计算 FWHM
+            full_matrix = np.vstack([np.asarray(processed[position], dtype=np.float64) for position in positions])
+            global_indices = np.where(indices >= 0, np.flatnonzero(range_mask)[indices.clip(min=0)], -1)
+            fwhms = calculate_fwhm_batch(x_data, full_matrix, global_indices[:, None])[:, 0]
+            for position, index, wavelength, fwhm in zip(positions, indices, wavelengths, fwhms):
+                batch_peaks[position] = (None, None) if np.isnan(wavelength) else (int(index), float(wavelength))
+                batch_fwhms[position] = float(fwhm) if np.isfinite(fwhm) else 0
+
         # --- 第一步：遍历所有光谱，计算单体指标 ---
-        for key, data in filtered_items:
+        for position, ((key, data), y_data) in enumerate(zip(filtered_items, processed)):
             x_data = np.asarray(data['x'])
-            raw_y = data['y']
-            y_data = self._get_intensity_for_processing(raw_y)
 
             # 初始化指标字典 (原文件使用的是分散变量，这里统一用字典管理)
             metrics = {
@@ -719,7 +732,10 @@ class AnalysisWindow(QMainWindow):
                 except ImportError:
                     pass
 
-                subset_index, peak_wavelength = estimate_peak_position(x_subset, y_subset, method_key)
+                if position in batch_peaks:
+                    subset_index, peak_wavelength = batch_peaks[position]
+                else:
+                    subset_index, peak_wavelength = estimate_peak_position(x_subset, y_subset, method_key)
                 if peak_wavelength is not None:
                     if subset_index is None or subset_index < 0 or subset_index >= len(x_subset):
                         subset_index = int(np.argmin(np.abs(x_subset - peak_wavelength)))
@@ -732,9 +748,12 @@ class AnalysisWindow(QMainWindow):
                     global_indices = np.where(range_mask)[0]
                     peak_index_global = int(global_indices[subset_index])
 
-                    fwhm_results = calculate_fwhm(x_data, y_data, [peak_index_global])
-                    if fwhm_results:
-                        metrics['fwhm'] = fwhm_results[0]
+                    if position in batch_fwhms:
+                        metrics['fwhm'] = batch_fwhms[position]
+                    else:
+                        fwhm_results = calculate_fwhm(x_data, y_data, [peak_index_global])
+                        if fwhm_results:
+                            metrics['fwhm'] = fwhm_results[0]
 
                     # ================= [新增代码] 计算 Q Factor =================
                     # 公式: Q = Peak Wavelength / FWHM
@@ -857,6 +876,8 @@ class AnalysisWindow(QMainWindow):
                 spectrum_category = spectrum_data.get("category") or "absorbance"
             should_show = spectrum_category == category
             item.setHidden(not should_show)
+            if spectrum_data:
+                self._ensure_curves([spectrum_data])
 
             if spectrum_data and spectrum_data.get('curve'):
                 curve = spectrum_data['curve']
@@ -967,6 +988,10 @@ class AnalysisWindow(QMainWindow):
             'parabolic': self.tr('Parabolic Interpolation'),
             'wavelet': self.tr('Wavelet Transform'),
             'threshold': self.tr('Threshold-based'),
+            'gaussian_3point': self.tr('Gaussian 3-Point'),
+            'centroid_window': self.tr('Windowed Centroid'),
+            'lorentzian_fit': self.tr('Lorentzian Fit'),
+            'voigt_fit': self.tr('Pseudo-Voigt Fit'),
         }
         for method_key in PEAK_METHOD_KEYS:
             label = peak_labels[method_key]
@@ -1257,10 +1282,10 @@ class AnalysisWindow(QMainWindow):
         if self.calc_thread and self.calc_thread.isRunning():
             QMessageBox.information(self, self.tr("Info"), self.tr("Calculation in progress, please wait..."))
             return
-        checked_spectra_y = [
-            self._get_display_intensity(data['y']) for key, data in self.spectra.items()
+        checked_spectra_y = self._get_display_intensities([
+            data['y'] for key, data in self.spectra.items()
             if data['list_item'].checkState() == Qt.Checked
-        ]
+        ])
         if not checked_spectra_y:
             QMessageBox.warning(self, self.tr("Info"), self.tr("Please check at least one spectrum."))
             return
@@ -1329,38 +1354,22 @@ class AnalysisWindow(QMainWindow):
             return intensity
         return self._apply_preprocessing(intensity)[0]
 
+    def _batch_preprocessing_params(self):
+        return _batch_params(
+            self.preprocessing_params, self.baseline_checkbox.isChecked(), self.smoothing_checkbox.isChecked()
+        )
+
     def _apply_preprocessing(self, intensity):
         working = np.asarray(intensity)
-        baseline = None
-        if self.baseline_checkbox.isChecked():
-            als_lambda = self.preprocessing_params.get("als_lambda", 1e9)
-            als_p = self.preprocessing_params.get("als_p", 0.01)
-            baseline = baseline_als(working, lam=als_lambda, p=als_p)
-            working = working - baseline
-        if self.smoothing_checkbox.isChecked():
-            method = self.preprocessing_params.get("smoothing_method", "Savitzky-Golay")
-            
-            if method == "Savitzky-Golay":
-                sg_window_coarse = self.preprocessing_params.get("sg_window_coarse", 14)
-                sg_poly_coarse = self.preprocessing_params.get("sg_polyorder_coarse", 3)
-                sg_window_fine = self.preprocessing_params.get("sg_window_fine", 8)
-                sg_poly_fine = self.preprocessing_params.get("sg_polyorder_fine", 3)
-                sg_two_stage = self.preprocessing_params.get("sg_two_stage", True)
-                coarse = smooth_savitzky_golay(working, window_length=sg_window_coarse, polyorder=sg_poly_coarse)
-                if sg_two_stage:
-                    working = smooth_savitzky_golay(coarse, window_length=sg_window_fine, polyorder=sg_poly_fine)
-                else:
-                    working = coarse
-            
-            elif method == "Moving Average":
-                window_size = self.preprocessing_params.get("ma_window", 5)
-                working = smooth_moving_average(working, window_size=window_size)
-            
-            elif method == "Median Filter":
-                kernel_size = self.preprocessing_params.get("med_kernel", 5)
-                working = smooth_median(working, kernel_size=kernel_size)
+        if not (self.baseline_checkbox.isChecked() or self.smoothing_checkbox.isChecked()):
+            return working, None
+        return preprocess_batch(None, working, self._batch_preprocessing_params(), return_baseline=True)
 
-        return working, baseline
+    def _get_display_intensities(self, intensities):
+        """批量版本的 _get_display_intensity：同长度的光谱一次性处理。"""
+        if not self._is_preprocessing_enabled():
+            return list(intensities)
+        return _preprocess_spectra(intensities, self._batch_preprocessing_params())
 
     def _on_preprocessing_toggle_changed(self):
         if isinstance(self.app_settings, dict):
@@ -1431,12 +1440,10 @@ class AnalysisWindow(QMainWindow):
             self._refresh_metrics_table()
 
     def _refresh_plot_curves(self):
-        for data in self.spectra.values():
-            curve = data.get('curve')
-            if curve is None:
-                continue
-            display_y = self._get_display_intensity(data['y'])
-            curve.setData(data['x'], display_y)
+        entries = [data for data in self.spectra.values() if data.get('curve') is not None]
+        display = self._get_display_intensities([data['y'] for data in entries])
+        for data, display_y in zip(entries, display):
+            data['curve'].setData(data['x'], display_y)
 
     def _on_display_mode_changed(self):
         self._refresh_plot_curves()
@@ -1661,15 +1668,13 @@ class AnalysisWindow(QMainWindow):
             mask = (x_vals >= range_min) & (x_vals <= range_max)
             if not np.any(mask):
                 continue
-            curve = data.get('curve')
             color = None
-            if curve is not None:
-                try:
-                    pen = curve.opts.get('pen', None)
-                    if pen is not None and hasattr(pen, 'color'):
-                        color = pen.color().getRgbF()
-                except Exception:
-                    color = None
+            try:
+                pen = data.get('pen')
+                if pen is not None and hasattr(pen, 'color'):
+                    color = pen.color().getRgbF()
+            except Exception:
+                color = None
             ax.plot(x_vals[mask], y_vals[mask], linewidth=0.8, color=color)
 
         ax.set_xlim(range_min, range_max)
@@ -1691,6 +1696,7 @@ class AnalysisWindow(QMainWindow):
         # 使用 unique_key 从字典中安全地获取正确的光谱数据
         if unique_key and unique_key in self.spectra:
             spectrum_data = self.spectra[unique_key]
+            self._ensure_curves([spectrum_data])
             if spectrum_data['curve']:
                 is_checked = (item.checkState() == Qt.Checked)
                 if item.isHidden():
@@ -1714,6 +1720,7 @@ class AnalysisWindow(QMainWindow):
             item.setCheckState(Qt.Checked)
         self.spectra_list_widget.blockSignals(False)
         # 手动触发一次更新
+        self._ensure_curves(self.spectra.values())
         for item in self.spectra.values():
             if item['curve']:
                 if not item['list_item'].isHidden():
@@ -1760,6 +1767,7 @@ class AnalysisWindow(QMainWindow):
                 unique_key = item.data(Qt.UserRole)
                 if unique_key and unique_key in self.spectra:
                     spectrum_data = self.spectra[unique_key]
+                    self._ensure_curves([spectrum_data])
                     if spectrum_data['curve']:
                         spectrum_data['curve'].setVisible(should_be_checked)
 
@@ -1772,6 +1780,8 @@ class AnalysisWindow(QMainWindow):
                 self.plot_widget.autoRange()
 
     def closeEvent(self, event):
+        self._stream_timer.stop()
+        self._pending_spectra = []
         pg.setConfigOption('background', '#F0F0F0');
         pg.setConfigOption('foreground', 'k')
         if self.parent() and hasattr(self.parent(), 'analysis_windows') and self in self.parent().analysis_windows:
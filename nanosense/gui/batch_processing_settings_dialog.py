@@ -7,6 +7,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import pyqtSignal, QEvent
 
+from nanosense.algorithms.preprocessing import available_baselines, get_baseline_algorithm
+
 
 class BatchProcessingSettingsDialog(QDialog):
     """
@@ -96,9 +98,8 @@ class BatchProcessingSettingsDialog(QDialog):
         self.baseline_enabled_checkbox.toggled.connect(self._on_baseline_enabled_toggled)
         
         self.baseline_algorithm_combo = QComboBox()
-        self.baseline_algorithm_combo.addItem("ALS", "ALS")
-        self.baseline_algorithm_combo.addItem("SNIP", "SNIP")
-        self.baseline_algorithm_combo.addItem("Linear", "Linear")
+        for name in available_baselines():
+            self.baseline_algorithm_combo.addItem(name, name)
         self.baseline_algorithm_combo.currentIndexChanged.connect(self._on_baseline_algorithm_changed)
         
         self.baseline_lambda_spinbox = QDoubleSpinBox()
@@ -193,14 +194,14 @@ class BatchProcessingSettingsDialog(QDialog):
             self._on_baseline_algorithm_changed()
     
     def _on_baseline_algorithm_changed(self):
-        """基线算法改变时，显示/隐藏ALS参数"""
-        is_als = self.baseline_algorithm_combo.currentData() == "ALS"
-        self.baseline_lambda_spinbox.setVisible(is_als)
-        self.baseline_p_spinbox.setVisible(is_als)
-        self.baseline_niter_spinbox.setVisible(is_als)
-        self.baseline_lambda_label.setVisible(is_als)
-        self.baseline_p_label.setVisible(is_als)
-        self.baseline_niter_label.setVisible(is_als)
+        """基线算法改变时，只显示该算法实际使用的参数"""
+        parameters = get_baseline_algorithm(self.baseline_algorithm_combo.currentData()).parameters
+        self.baseline_lambda_spinbox.setVisible('lam' in parameters)
+        self.baseline_p_spinbox.setVisible('p' in parameters)
+        self.baseline_niter_spinbox.setVisible('als_niter' in parameters)
+        self.baseline_lambda_label.setVisible('lam' in parameters)
+        self.baseline_p_label.setVisible('p' in parameters)
+        self.baseline_niter_label.setVisible('als_niter' in parameters)
     
     def _load_settings(self):
         """加载设置到UI控件"""
@@ -276,7 +277,9 @@ class BatchProcessingSettingsDialog(QDialog):
             'highest_point': '最高点',
             'weighted_mean': '加权平均',
             'gaussian_fit': '高斯拟合',
-            'lorentz_fit': '洛伦兹拟合'
+            'lorentz_fit': '洛伦兹拟合',
+            'lorentzian_fit': '洛伦兹拟合',
+            'voigt_fit': '赝Voigt拟合'
         }
         peak_label = peak_labels.get(settings['peak_method'], settings['peak_method'])
         parts.append(peak_label)
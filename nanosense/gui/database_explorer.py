@@ -73,7 +73,11 @@ class DatabaseExplorerDialog(QDialog):
         self.app_settings = getattr(parent, "app_settings", {}) if parent and hasattr(parent, "app_settings") else {}
         self.data_access = None
         if self.db_manager and hasattr(self.db_manager, "conn") and self.db_manager.conn:
-            self.data_access = ExplorerDataAccess(self.db_manager.conn)
+            # 传入按线程取连接的访问器，QtConcurrent 后台查询使用各自线程的连接
+            db_manager = self.db_manager
+            self.data_access = ExplorerDataAccess(
+                lambda: db_manager.conn, getattr(db_manager, "axis_cache", None)
+            )
 
         self._async_supported = bool(QFutureWatcher and QtConcurrent)
         self._search_token = None
@@ -546,7 +550,8 @@ class DatabaseExplorerDialog(QDialog):
             return
 
         if self.db_manager:
-            spectra_list = self.db_manager.get_spectra_for_experiments(experiment_ids)
+            # 仅读取元数据，强度数据由分析窗口按需加载
+            spectra_list = self.db_manager.get_spectra_for_experiments(experiment_ids, lazy=True)
             if spectra_list:
                 # 发出信号，将获取到的光谱列表传递出去
                 self.load_spectra_requested.emit(spectra_list)
@@ -14,7 +14,7 @@ except ModuleNotFoundError as exc:  # Missing PyOpenGL backend
     gl = None
     GLMeshItem = GLAxisItem = None
     GL_IMPORT_ERROR = exc
-from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QTimer
+from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QThread, QTimer
 from PyQt5.QtGui import QCursor, QImage, QMatrix4x4, QVector3D, QVector4D, QColor
 from PyQt5.QtWidgets import (QApplication,QAbstractItemView,QCheckBox,QComboBox,QDialog,QDoubleSpinBox,
     QFileDialog,QFormLayout,QGroupBox,QHBoxLayout,QLabel,QLineEdit,QListWidget,QMenu,QMessageBox,QPushButton,
@@ -27,7 +27,7 @@ from nanosense.algorithms.peak_analysis import (
     PEAK_METHOD_KEYS,
     PEAK_METHOD_LABELS
 )
-from nanosense.algorithms.preprocessing import baseline_als, smooth_savitzky_golay
+from nanosense.core.parallel_executor import map_spectra, peak_positions_task
 from nanosense.utils.file_io import load_wide_format_spectrum
 
 try:  # Optional dependency for GIF export
@@ -220,6 +220,34 @@ class DeltaLambdaGLView(gl.GLViewWidget):
         return best
 
 
+class DeltaLambdaPeakWorker(QThread):
+    """在后台线程中依次计算基线 / 反应后文件各测量列的峰位；请求中断后在下一个分块处停止。"""
+    progress = pyqtSignal(int)  # 发射进度（百分比）
+    finished = pyqtSignal(object, object, str)  # 发射（基线峰位, 反应后峰位, 错误信息；成功时为空）
+
+    def __init__(self, compute, file_paths, settings, method_key, parent=None):
+        super().__init__(parent)
+        self.compute = compute
+        self.file_paths = file_paths
+        self.settings = settings
+        self.method_key = method_key
+
+    def run(self):
+        results = []
+        try:
+            for file_index, file_path in enumerate(self.file_paths):
+                def report(done, total, file_index=file_index):
+                    if self.isInterruptionRequested():
+                        raise InterruptedError("Δλ computation cancelled.")
+                    self.progress.emit(int((file_index + done / max(1, total)) / len(self.file_paths) * 100))
+
+                results.append(self.compute(file_path, self.settings, self.method_key, progress=report))
+        except Exception as exc:  # pylint: disable=broad-except
+            self.finished.emit(None, None, str(exc))
+            return
+        self.finished.emit(results[0], results[1], "")
+
+
 class DeltaLambdaVisualizationDialog(QDialog):
     """
     Visualize Δλ (peak wavelength shift) as an interactive 3D surface.
@@ -264,6 +292,7 @@ class DeltaLambdaVisualizationDialog(QDialog):
         self._default_camera_opts = {}
         self._last_warnings = []
         self._table_updating = False
+        self.peak_worker = None
 
         self._build_ui()
         self._connect_signals()
@@ -338,6 +367,10 @@ class DeltaLambdaVisualizationDialog(QDialog):
             'parabolic': self.tr('Parabolic Interpolation'),
             'wavelet': self.tr('Wavelet Transform'),
             'threshold': self.tr('Threshold-based'),
+            'gaussian_3point': self.tr('Gaussian 3-Point'),
+            'centroid_window': self.tr('Windowed Centroid'),
+            'lorentzian_fit': self.tr('Lorentzian Fit'),
+            'voigt_fit': self.tr('Pseudo-Voigt Fit'),
         }
         for method_key in PEAK_METHOD_KEYS:
             label = peak_labels[method_key]
@@ -544,7 +577,8 @@ class DeltaLambdaVisualizationDialog(QDialog):
     def _update_controls_state(self):
         has_folder = bool(self.folder_path and len(self.available_files) >= 2)
         has_data = self.delta_grid is not None
-        self.compute_button.setEnabled(has_folder)
+        computing = self.peak_worker is not None and self.peak_worker.isRunning()
+        self.compute_button.setEnabled(has_folder and not computing)
         self.export_matplotlib_button.setEnabled(has_data)
         self.export_gif_button.setEnabled(has_data)
         self.export_table_button.setEnabled(has_data)
@@ -872,6 +906,8 @@ class DeltaLambdaVisualizationDialog(QDialog):
         return True
 
     def _load_and_visualize(self):
+        if self.peak_worker is not None and self.peak_worker.isRunning():
+            return
         if not self.folder_path:
             QMessageBox.information(self, self.tr("Info"), self.tr("Please select a folder first."))
             return
@@ -892,10 +928,28 @@ class DeltaLambdaVisualizationDialog(QDialog):
         self.app_settings["analysis_baseline_enabled"] = bool(self.baseline_checkbox.isChecked())
         self.app_settings["analysis_smoothing_enabled"] = bool(self.smoothing_checkbox.isChecked())
 
-        QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
+        # 峰位计算在后台线程中进行；设置在此处取快照，线程内不访问控件
+        self.peak_worker = DeltaLambdaPeakWorker(
+            self._compute_peak_positions,
+            (baseline_path, post_path),
+            dict(self.app_settings),
+            self.peak_method_combo.currentData() or 'highest_point',
+            parent=self,
+        )
+        self.peak_worker.progress.connect(self._on_peak_progress)
+        self.peak_worker.finished.connect(self._on_peaks_computed)
+        self.peak_worker.start()
+        self.summary_label.setText(self.tr("Computing peak positions..."))
+        self._update_controls_state()
+
+    def _on_peak_progress(self, percent):
+        self.summary_label.setText(self.tr("Computing peak positions... {0}%").format(percent))
+
+    def _on_peaks_computed(self, baseline_peaks, post_peaks, error):
+        self.peak_worker = None
         try:
-            baseline_peaks = self._compute_peak_positions(baseline_path)
-            post_peaks = self._compute_peak_positions(post_path)
+            if error:
+                raise ValueError(error)
             if not baseline_peaks or not post_peaks:
                 QMessageBox.warning(
                     self,
@@ -960,7 +1014,6 @@ class DeltaLambdaVisualizationDialog(QDialog):
             self._last_warnings = warnings
             self._rebuild_label_positions()
             self._refresh_after_filter_change()
-
         except Exception as exc:  # pylint: disable=broad-except
             QMessageBox.critical(
                 self,
@@ -969,11 +1022,19 @@ class DeltaLambdaVisualizationDialog(QDialog):
                 self.tr("Δλ calculation failed:\n{0}").format(str(exc)),
             )
         finally:
-            QApplication.restoreOverrideCursor()
             self._update_controls_state()
 
+    def done(self, result):
+        # 关闭对话框时让后台计算在当前分块处停止，再销毁线程
+        if self.peak_worker is not None and self.peak_worker.isRunning():
+            self.peak_worker.finished.disconnect(self._on_peaks_computed)
+            self.peak_worker.requestInterruption()
+            self.peak_worker.wait()
+        self.peak_worker = None
+        super().done(result)
+
     # ----------------------------------------------------------- Processing ---
-    def _compute_peak_positions(self, file_path):
+    def _compute_peak_positions(self, file_path, settings, method_key, progress=None):
         wavelengths, spectra_df, error = load_wide_format_spectrum(file_path)
         if error:
             raise ValueError(error)
@@ -982,84 +1043,56 @@ class DeltaLambdaVisualizationDialog(QDialog):
         spectra_df = self._normalize_measurement_columns(spectra_df)
         peaks = {}
 
-        wl_start = self.app_settings.get("analysis_wl_start", 450.0)
-        wl_end = self.app_settings.get("analysis_wl_end", 750.0)
-        wl_margin = max(0.0, float(self.app_settings.get("analysis_wl_margin", 20.0)))
-        apply_baseline = bool(self.app_settings.get("analysis_baseline_enabled", False))
-        apply_smoothing = bool(self.app_settings.get("analysis_smoothing_enabled", True))
-
-        als_lambda = self.preprocessing_params.get("als_lambda", 1e9)
-        als_p = self.preprocessing_params.get("als_p", 0.01)
-        sg_window_coarse = self.preprocessing_params.get("sg_window_coarse", 15)
-        sg_poly_coarse = self.preprocessing_params.get("sg_polyorder_coarse", 3)
-        sg_window_fine = self.preprocessing_params.get("sg_window_fine", 9)
-        sg_poly_fine = self.preprocessing_params.get("sg_polyorder_fine", 3)
-        sg_two_stage = self.preprocessing_params.get("sg_two_stage", True)
+        wl_start = settings.get("analysis_wl_start", 450.0)
+        wl_end = settings.get("analysis_wl_end", 750.0)
+        wl_margin = max(0.0, float(settings.get("analysis_wl_margin", 20.0)))
+        apply_baseline = bool(settings.get("analysis_baseline_enabled", False))
+        apply_smoothing = bool(settings.get("analysis_smoothing_enabled", True))
+
+        params = {
+            "als_lambda": 1e9,
+            **self.preprocessing_params,
+            "baseline": apply_baseline,
+            "smoothing": apply_smoothing,
+            "smoothing_method": "Savitzky-Golay",
+        }
 
+        columns = []
+        rows = []
         for col in spectra_df.columns:
-            intensities = spectra_df[col].values
+            peaks[str(col)] = np.nan
             try:
-                intensities = np.asarray(intensities, dtype=np.float64)
+                intensities = np.asarray(spectra_df[col].values, dtype=np.float64)
             except ValueError:
-                peaks[str(col)] = np.nan
-                continue
-
-            if intensities.shape[0] != wavelengths.shape[0]:
-                peaks[str(col)] = np.nan
                 continue
-
-            wl_min = float(np.nanmin(wavelengths))
-            wl_max = float(np.nanmax(wavelengths))
-            margin_start = max(wl_min, wl_start - wl_margin)
-            margin_end = min(wl_max, wl_end + wl_margin)
-
-            margin_mask = (wavelengths >= margin_start) & (wavelengths <= margin_end)
-            if not np.any(margin_mask):
-                peaks[str(col)] = np.nan
+            if intensities.shape != wavelengths.shape:
                 continue
-
-            margin_wl = wavelengths[margin_mask]
-            margin_int = intensities[margin_mask]
-            if margin_wl.size < 20:
-                peaks[str(col)] = np.nan
-                continue
-
-            working = margin_int
-            if apply_baseline:
-                baseline = baseline_als(margin_int, lam=als_lambda, p=als_p)
-                working = margin_int - baseline
-
-            if apply_smoothing:
-                coarse = smooth_savitzky_golay(working, sg_window_coarse, sg_poly_coarse)
-                if sg_two_stage:
-                    fine = smooth_savitzky_golay(coarse, sg_window_fine, sg_poly_fine)
-                else:
-                    fine = coarse
-            else:
-                fine = working
-
-            final_mask = (margin_wl >= wl_start) & (margin_wl <= wl_end)
-            if not np.any(final_mask):
-                peaks[str(col)] = np.nan
-            else:
-                sub_wl = margin_wl[final_mask]
-                sub_int = fine[final_mask]
-                if sub_wl.size < 20:
-                    peaks[str(col)] = np.nan
-                    continue
-                # 获取选择的寻峰算法
-                method_key = self.peak_method_combo.currentData() or 'highest_point'
-                
-                # 使用estimate_peak_position函数支持所有寻峰算法
-                peak_idx, peak_wavelength = estimate_peak_position(
-                    sub_wl, sub_int, method=method_key
-                )
-                
-                if peak_idx is None or peak_idx >= sub_wl.size:
-                    peaks[str(col)] = np.nan
-                else:
-                    peaks[str(col)] = float(peak_wavelength)
-
+            columns.append(str(col))
+            rows.append(intensities)
+        if not rows or wavelengths.size == 0:
+            return peaks
+
+        wl_min = float(np.nanmin(wavelengths))
+        wl_max = float(np.nanmax(wavelengths))
+        margin_start = max(wl_min, wl_start - wl_margin)
+        margin_end = min(wl_max, wl_end + wl_margin)
+        margin_mask = (wavelengths >= margin_start) & (wavelengths <= margin_end)
+        margin_wl = wavelengths[margin_mask]
+        if margin_wl.size < 20:
+            return peaks
+
+        final_mask = (margin_wl >= wl_start) & (margin_wl <= wl_end)
+        if np.count_nonzero(final_mask) < 20:
+            return peaks
+
+        # 所有测量列堆叠后批量预处理与寻峰（列数多时分发到进程池，结果顺序与列顺序一致）
+        positions = map_spectra(
+            peak_positions_task,
+            np.vstack(rows)[:, margin_mask],
+            args=(margin_wl, params, final_mask, method_key),
+            progress=progress,
+        )
+        peaks.update(zip(columns, positions))
         return peaks
 
     def _normalize_measurement_columns(self, df):
@@ -1104,16 +1104,20 @@ CollapsibleBox > QToolButton:hover {
             self.realtime_curve.setData(self.realtime_spectrum_x, self.realtime_spectrum_y)
 
         # 更新动力学曲线（时间 vs 峰位）
-        if elapsed_time is not None and peak_wl is not None:
-            elapsed_time = float(elapsed_time)
-            peak_wl = float(peak_wl)
-            self.kinetics_time_data.append(elapsed_time)
-            self.kinetics_wavelength_data.append(peak_wl)
+        # 全帧率跟踪时 samples 携带本周期内每一帧的 (时间, 峰位)，一次性追加
+        samples = data_package.get("samples")
+        if not samples and elapsed_time is not None and peak_wl is not None:
+            samples = [(elapsed_time, peak_wl)]
+        if samples:
+            for sample_time, sample_peak in samples:
+                self.kinetics_time_data.append(float(sample_time))
+                self.kinetics_wavelength_data.append(float(sample_peak))
             self.sensorgram_curve.setData(self.kinetics_time_data, self.kinetics_wavelength_data)
-            
+            elapsed_time, peak_wl = self.kinetics_time_data[-1], self.kinetics_wavelength_data[-1]
+
             # DEBUG: 检查峰位移计算
             print(f"更新峰位移: time={elapsed_time:.2f}s, peak={peak_wl:.2f}nm, baseline={self.baseline_peak_wavelength}")
-            self._update_peak_shift_series(elapsed_time, peak_wl)
+            self._update_peak_shift_series(samples)
             
             # 更新峰位标记以显示 Δλ
             if self.baseline_spectrum_x is not None and self.baseline_spectrum_y is not None:
@@ -1132,12 +1136,12 @@ CollapsibleBox > QToolButton:hover {
 
         self._refresh_popouts()
 
-    def _update_peak_shift_series(self, elapsed_time, peak_wavelength):
+    def _update_peak_shift_series(self, samples):
         if self.baseline_peak_wavelength is None:
             return
-        shift = peak_wavelength - self.baseline_peak_wavelength
-        self.peak_shift_time_data.append(elapsed_time)
-        self.peak_shift_values.append(shift)
+        for elapsed_time, peak_wavelength in samples:
+            self.peak_shift_time_data.append(float(elapsed_time))
+            self.peak_shift_values.append(float(peak_wavelength) - self.baseline_peak_wavelength)
         self.peak_shift_curve.setData(self.peak_shift_time_data, self.peak_shift_values)
         if not self._shift_user_interacted:
             self.peak_shift_plot.enableAutoRange(x=True, y=True)
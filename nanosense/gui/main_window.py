@@ -38,6 +38,7 @@ from nanosense.core.controller import FX2000Controller
 from nanosense.core.spectrum_processor import SpectrumProcessor
 from nanosense.core.batch_acquisition import BatchRunDialog, BatchAcquisitionWorker
 from ..core.database_manager import DatabaseManager
+from ..core.sqlite_profile import ConnectionProfile
 from ..utils.config_manager import load_settings, save_settings
 
 from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTranslator
@@ -106,6 +107,7 @@ class AppWindow(QMainWindow):
             return
         
         self.processor = SpectrumProcessor(self.controller.wavelengths)
+        self.processor.start_worker()  # 平滑/基线等计算在后台线程进行，不阻塞界面
         self._create_global_actions()
         self.init_ui()
         self.apply_styles()  # 保留原有样式加载
@@ -119,7 +121,8 @@ class AppWindow(QMainWindow):
         print(f"尝试初始化数据库连接，数据库路径: {db_path}")
         if db_path:
             try:
-                self.db_manager = DatabaseManager(db_path)
+                self.db_manager = DatabaseManager(db_path, ConnectionProfile.from_settings(self.app_settings))
+                self._apply_legacy_write_mode()
                 print(f"数据库管理器已创建: {self.db_manager is not None}")
             except Exception as e:
                 print(f"创建数据库管理器时出错: {e}")
@@ -140,6 +143,16 @@ class AppWindow(QMainWindow):
                 )
             )
     
+    def _apply_legacy_write_mode(self):
+        """将设置中的旧版 spectra 表写入模式应用到数据库管理器。"""
+        if not self.db_manager:
+            return
+        mode = self.app_settings.get('legacy_write_mode', 'mirror')
+        try:
+            self.db_manager.set_legacy_write_mode(mode)
+        except ValueError as e:
+            print(f"忽略无效的旧表写入模式: {e}")
+
     # 【新增】查询或创建默认项目
     def _find_or_create_default_project(self):
         """查询或创建默认项目"""
@@ -939,6 +952,8 @@ class AppWindow(QMainWindow):
         
         if hasattr(self, 'measurement_page'):
             self.measurement_page.stop_all_activities()
+        if getattr(self, 'processor', None) is not None:
+            self.processor.stop_worker()
         
         print("正在退出应用...")
         event.accept()
@@ -1363,7 +1378,9 @@ class AppWindow(QMainWindow):
             if self.db_manager is None or self.db_manager.db_path != new_db_path:
                 if self.db_manager:
                     self.db_manager.close()
-                self.db_manager = DatabaseManager(new_db_path)
+                self.db_manager = DatabaseManager(
+                    new_db_path, ConnectionProfile.from_settings(self.app_settings)
+                )
                 self._find_or_create_default_project()
                 
                 QMessageBox.information(
@@ -1374,6 +1391,7 @@ class AppWindow(QMainWindow):
                         "A restart may be required for all features to use the new database."
                     )
                 )
+            self._apply_legacy_write_mode()
             
             # 如果主题发生了变化，应用新主题
             if theme_changed:
@@ -1609,6 +1627,7 @@ class AppWindow(QMainWindow):
             processing_info=processing_info,
             peak_method=self.run_dialog.get_selected_peak_method(),
             processing_settings=self.run_dialog.processing_settings.copy(),
+            scans_per_point=self.app_settings.get('batch_scans_per_point', 1),
         )
         
         # 连接对话框的信号，当用户更改寻峰方法或处理设置时更新工作线程
@@ -6,7 +6,6 @@ from .kinetics_window import KineticsWindow
 from .single_plot_window import SinglePlotWindow
 import time
 import numpy as np
-import queue
 import threading
 import os
 from .realtime_noise_setup_dialog import RealTimeNoiseSetupDialog
@@ -19,6 +18,7 @@ from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 
 import pyqtgraph as pg
 
+from nanosense.algorithms.preprocessing import available_baselines
 from nanosense.algorithms.peak_analysis import (
     find_spectral_peaks,
     find_main_resonance_peak,
@@ -27,6 +27,9 @@ from nanosense.algorithms.peak_analysis import (
     PEAK_METHOD_LABELS,
     estimate_peak_position,
     calculate_sers_enhancement_factor,
+    xcorr_peak_position,
+    PeakTracker,
+    CentroidTracker,
 )
 from nanosense.algorithms.raman_database import (
     create_raman_database,
@@ -35,9 +38,31 @@ from nanosense.algorithms.raman_database import (
     get_all_raman_substances,
 )
 from nanosense.core.controller import FX2000Controller
+from nanosense.core.frame_averager import StreamingFrameAverager
+from nanosense.core.frame_ring import DEFAULT_RING_CAPACITY, FrameConsumer, FrameCounters, FrameRing
 from nanosense.utils.file_io import save_spectrum, load_spectrum, save_all_spectra_to_file
 from nanosense.core.spectrum_processor import SpectrumProcessor
 
+
+def _track_peak(x_data, y_data, method_key, reference=None, tracker=None, centroid_tracker=None):
+    """
+    动力学峰位：提供参考 (波长, 结果谱, 峰位) 且波长轴一致时按互相关位移计算；
+    高斯拟合且提供 PeakTracker 时沿用上一帧的解做窗口内增量拟合；
+    固定窗口质心且提供 CentroidTracker 时以上一帧的中心与窗宽取窗；
+    否则按所选寻峰算法计算。无法确定时返回 None。
+    """
+    if reference is not None:
+        ref_x, ref_y, ref_peak = reference
+        if ref_x.shape == np.shape(x_data) and np.array_equal(ref_x, x_data) and len(ref_x) >= 3:
+            return xcorr_peak_position(x_data, ref_y, y_data, ref_peak)
+    if tracker is not None and method_key == 'gaussian_fit':
+        return tracker.update(x_data, y_data)
+    if centroid_tracker is not None and method_key == 'centroid_window':
+        return centroid_tracker.update(x_data, y_data)
+    _, peak_wavelength = estimate_peak_position(x_data, y_data, method_key)
+    return peak_wavelength
+
+
 class MeasurementWidget(QWidget):
     kinetics_data_updated = pyqtSignal(dict)
 
@@ -49,7 +74,20 @@ class MeasurementWidget(QWidget):
         self.processor = processor
         self.mode_name = "N/A"
         self.wavelengths = np.array(self.controller.wavelengths if self.controller else [])
-        self.data_queue = queue.Queue(maxsize=10)
+        # 采集线程原地写入环形缓冲区，GUI 定时器按序号读取最新帧（零拷贝视图）
+        self.frame_ring = None
+        self._last_rendered_seq = 0
+        self._signal_frame = None  # 交给处理器的稳定副本（预分配，复用）
+        # 实时帧平均：采集线程逐帧累积，写入环形缓冲区的是去噪后的帧（None 表示不平均）
+        self.frame_averager = None
+        self._raw_frame = None  # 采集线程读取原始帧的缓冲区
+        # 帧计数：采集 / 全帧率处理 / 渲染 / 显示跳过（最新帧优先）/ 处理溢出丢失
+        self.frame_counters = FrameCounters()
+        # 全帧率动力学峰位跟踪：后台线程逐帧处理，GUI 定时器批量取走结果
+        self.kinetics_consumer = None
+        self._kinetics_track_params = None
+        self._pending_kinetics_samples = []
+        self._kinetics_result_buffer = None  # 仅由跟踪线程使用的结果缓冲区
         self.stop_event = threading.Event()
         self.acquisition_thread = None
 
@@ -59,11 +97,19 @@ class MeasurementWidget(QWidget):
         self.kinetics_sample_interval = 0.5    # 采样/刷新间隔（秒），可按需调整
         self.kinetics_window = None
         self.kinetics_baseline_value = None
+        self.kinetics_reference = None  # 设置基线时的 (分析范围波长, 结果谱, 峰位)，供互相关跟踪
+        # 高斯拟合 / 固定窗口质心的逐帧跟踪器：定时器路径（GUI 线程）与全帧率路径（后台线程）各用一组
+        self.kinetics_peak_tracker = PeakTracker()
+        self._kinetics_frame_tracker = PeakTracker()
+        self.kinetics_centroid_tracker = CentroidTracker()
+        self._kinetics_frame_centroid_tracker = CentroidTracker()
         self.is_acquiring = False
         self.is_ui_update_enabled = True
         # --- 用于存储完整的、未经裁剪的结果光谱 ---
         self.full_result_x = None
         self.full_result_y = None
+        # ROI 模式下结果只覆盖分析范围，记录其在全谱中的起始下标（全谱模式为 None）
+        self.result_roi_offset = None
 
         # --- 用于存储所有弹出的独立窗口 ---
         self.popout_windows = []
@@ -76,6 +122,7 @@ class MeasurementWidget(QWidget):
         self.connect_signals()
 
         self.processor.result_updated.connect(self._on_result_updated)
+        self.processor.roi_result_updated.connect(self._on_roi_result_updated)
         self.processor.background_updated.connect(self._on_background_updated)
         self.processor.reference_updated.connect(self._on_reference_updated)
         
@@ -204,6 +251,11 @@ class MeasurementWidget(QWidget):
         self.fluorescence_subtract_checkbox.setChecked(False)
         raman_preprocessing_layout.addRow(self.fluorescence_subtract_checkbox)
         
+        # 宇宙射线尖峰去除（在平滑之前处理原始信号）
+        self.despike_checkbox = QCheckBox(self.tr("Cosmic-Ray Removal"))
+        self.despike_checkbox.setChecked(False)
+        raman_preprocessing_layout.addRow(self.despike_checkbox)
+        
         # 瑞利散射去除
         self.rayleigh_remove_checkbox = QCheckBox(self.tr("Rayleigh Scattering Removal"))
         self.rayleigh_remove_checkbox.setChecked(False)
@@ -227,7 +279,25 @@ class MeasurementWidget(QWidget):
         ])
         raman_preprocessing_layout.addRow(self.tr("Normalization:"), self.normalization_combo)
         
+        # 实时帧平均（软件滚动平均，不增加硬件积分时间）
+        self.live_average_spinbox = QSpinBox()
+        self.live_average_spinbox.setRange(1, 100)
+        self.live_average_spinbox.setValue(1)
+        self.live_average_spinbox.setToolTip(
+            self.tr("Rolling average over the last N frames (1 = off)")
+        )
+        self.live_average_method_combo = QComboBox()
+        self.live_average_method_combo.addItem(self.tr("Mean"), "mean")
+        self.live_average_method_combo.addItem(self.tr("Median"), "median")
+        self.spike_rejection_checkbox = QCheckBox(self.tr("Reject Cosmic-Ray Spikes"))
+        self.spike_rejection_checkbox.setChecked(True)
+        live_average_layout = QHBoxLayout()
+        live_average_layout.addWidget(self.live_average_spinbox)
+        live_average_layout.addWidget(self.live_average_method_combo)
+        live_average_layout.addWidget(self.spike_rejection_checkbox)
+
         self.params_layout.addRow(self.tr("Integration Time:"), self.integration_time_spinbox)
+        self.params_layout.addRow(self.tr("Live Averaging:"), live_average_layout)
         self.params_layout.addRow(self.tr("Smoothing Method:"), self.smooth_method_combo)
         self.params_layout.addRow(self.tr("Smoothing Window:"), self.smoothing_window_spinbox)
         
@@ -242,7 +312,7 @@ class MeasurementWidget(QWidget):
         
         # 算法选择
         self.baseline_algorithm_combo = QComboBox()
-        self.baseline_algorithm_combo.addItems(["ALS"])  # 未来可扩展ArPLS, Polynomial
+        self.baseline_algorithm_combo.addItems(available_baselines())
         baseline_layout.addRow(self.tr("Algorithm:"), self.baseline_algorithm_combo)
         
         # Lambda 参数 (平滑度)
@@ -304,6 +374,11 @@ class MeasurementWidget(QWidget):
         
         analysis_range_layout.addRow(self.tr("Start:"), self.analysis_start_spinbox)
         analysis_range_layout.addRow(self.tr("End:"), self.analysis_end_spinbox)
+        self.roi_only_checkbox = QCheckBox(self.tr("ROI-only Processing"))
+        self.roi_only_checkbox.setToolTip(
+            self.tr("Compute and display only the analysis range (faster; results outside it are not available)")
+        )
+        analysis_range_layout.addRow(self.roi_only_checkbox)
         self.params_layout.addRow(self.analysis_range_group)
         self.params_box.setContentLayout(self.params_layout)
         panel_layout.addWidget(self.params_box)
@@ -322,6 +397,10 @@ class MeasurementWidget(QWidget):
             'parabolic': self.tr('Parabolic Interpolation'),
             'wavelet': self.tr('Wavelet Transform'),
             'threshold': self.tr('Threshold-based'),
+            'gaussian_3point': self.tr('Gaussian 3-Point'),
+            'centroid_window': self.tr('Windowed Centroid'),
+            'lorentzian_fit': self.tr('Lorentzian Fit'),
+            'voigt_fit': self.tr('Pseudo-Voigt Fit'),
         }
         for method_key in PEAK_METHOD_KEYS:
             label = peak_labels[method_key]
@@ -506,8 +585,17 @@ class MeasurementWidget(QWidget):
         self.kinetics_interval_spinbox.setValue(1.0)          # 默认 1 秒
         self.kinetics_interval_spinbox.setSuffix(" s")
         kinetics_form_layout.addRow(self.tr("Sampling Interval:"), self.kinetics_interval_spinbox)
+        self.kinetics_full_rate_checkbox = QCheckBox(self.tr("Track peak on every frame"))
+        self.kinetics_full_rate_checkbox.setChecked(True)
+        kinetics_form_layout.addRow(self.kinetics_full_rate_checkbox)
+        # 互相关跟踪：以设置基线时的结果谱为参考，按整段光谱的位移计算峰位（精度高、每帧开销固定）
+        self.kinetics_xcorr_checkbox = QCheckBox(self.tr("Track shift against baseline spectrum"))
+        self.kinetics_xcorr_checkbox.setChecked(False)
+        kinetics_form_layout.addRow(self.kinetics_xcorr_checkbox)
 
         kinetics_layout.addLayout(kinetics_form_layout)
+        self.frame_stats_label = QLabel()
+        kinetics_layout.addWidget(self.frame_stats_label)
         self.set_baseline_button = QPushButton(self.tr("Set Baseline from Current Peak"))
         self.set_baseline_button.setEnabled(False)
         kinetics_layout.addWidget(self.set_baseline_button)
@@ -747,10 +835,16 @@ class MeasurementWidget(QWidget):
         self.capture_dark_button.clicked.connect(self.processor.set_background)
         self.capture_ref_button.clicked.connect(self.processor.set_reference)
         self.integration_time_spinbox.valueChanged.connect(self._on_integration_time_changed)
+        self.live_average_spinbox.valueChanged.connect(lambda _value: self._rebuild_frame_averager())
+        self.live_average_method_combo.currentIndexChanged.connect(lambda _index: self._rebuild_frame_averager())
+        self.spike_rejection_checkbox.toggled.connect(lambda _checked: self._rebuild_frame_averager())
 
         # 连接统一的分析范围信号
         self.analysis_start_spinbox.valueChanged.connect(self._on_analysis_range_changed)
         self.analysis_end_spinbox.valueChanged.connect(self._on_analysis_range_changed)
+        self.roi_only_checkbox.toggled.connect(
+            lambda checked: self.processor.set_result_mode("roi" if checked else "full")
+        )
         
         # 峰分析和数据保存
         self.find_peaks_button.clicked.connect(self._find_all_peaks)
@@ -759,6 +853,7 @@ class MeasurementWidget(QWidget):
         self.load_data_button.clicked.connect(self._load_spectrum_data_for_comparison)
         self.set_baseline_button.clicked.connect(self._set_kinetics_baseline_from_current_peak)
         self.toggle_kinetics_button.clicked.connect(self._toggle_kinetics_window)
+        self.kinetics_full_rate_checkbox.toggled.connect(lambda _checked: self._sync_kinetics_consumer())
         # 波长/波数切换
         self.wavenumber_toggle.clicked.connect(self._toggle_wavelength_wavenumber)
         self.save_all_button.clicked.connect(self._save_all_spectra)
@@ -769,6 +864,7 @@ class MeasurementWidget(QWidget):
         self.baseline_lambda_spinbox.valueChanged.connect(self._update_baseline_params)
         self.baseline_p_spinbox.valueChanged.connect(self._update_baseline_params)
         self.baseline_niter_spinbox.valueChanged.connect(self._update_baseline_params)
+        self.despike_checkbox.toggled.connect(self.processor.set_despike_params)
         
         # SERS分析
         self.calculate_sers_button.clicked.connect(self._calculate_sers_enhancement)
@@ -782,6 +878,7 @@ class MeasurementWidget(QWidget):
         self.laser_button.clicked.connect(self._on_laser_button_clicked)
         self.excitation_wavelength_spinbox.valueChanged.connect(self._on_excitation_wavelength_changed)
         self.laser_power_spinbox.valueChanged.connect(self._on_laser_power_changed)
+        self.scans_to_average_spinbox.valueChanged.connect(self._on_scans_to_average_changed)
 
     def _open_single_plot_window(self, plot_type):
         """创建并显示一个独立的图表窗口。"""
@@ -946,6 +1043,12 @@ class MeasurementWidget(QWidget):
                                     self.tr("File saved, but an error occurred while syncing to the database:\n{0}")
                                     .format(str(e)))
 
+    def _result_in_range(self, result_spec, mask):
+        """按全谱掩码裁剪结果谱；ROI 模式下结果本身就是分析范围，直接返回。"""
+        if self.result_roi_offset is not None:
+            return result_spec
+        return result_spec[mask]
+
     def _save_all_spectra(self):
         """保存所有光谱（使用当前寻峰范围裁剪）。"""
         background_spec = self.processor.background_spectrum
@@ -966,7 +1069,7 @@ class MeasurementWidget(QWidget):
             'Signal': signal_spec[mask] if signal_spec is not None else None,
             'Background': background_spec[mask] if background_spec is not None else None,
             'Reference': reference_spec[mask] if reference_spec is not None else None,
-            self.mode_name: result_spec[mask] if result_spec is not None else None
+            self.mode_name: self._result_in_range(result_spec, mask) if result_spec is not None else None
         }
 
         default_save_path = self.app_settings.get('default_save_path', '')
@@ -1066,79 +1169,205 @@ class MeasurementWidget(QWidget):
         print(self.tr("Measurement page switched to: {0}").format(display_name))
         self._toggle_acquisition(True)
 
-    def update_plot(self):
-        try:
-            raw_signal = self.data_queue.get_nowait()
-            if raw_signal is None:
-                return
-
-            self.signal_curve.setData(self.wavelengths, raw_signal)
+    def _ensure_frame_ring(self):
+        """按当前像素数（重连后可能变化）准备环形缓冲区。"""
+        pixels = len(self.controller.wavelengths) if self.controller else len(self.wavelengths)
+        if self.frame_ring is None or self.frame_ring.pixels != pixels:
+            self.frame_ring = FrameRing(DEFAULT_RING_CAPACITY, pixels)
+            self._signal_frame = np.zeros(pixels, dtype=np.float64)
+            self._raw_frame = np.zeros(pixels, dtype=np.float64)
+        self.frame_ring.reset()
+        self._rebuild_frame_averager()
+        self._last_rendered_seq = 0
+        self.frame_counters.reset()
+
+    def _sync_kinetics_consumer(self):
+        """根据采集/监测状态与“逐帧跟踪”选项启动或停止全帧率处理线程。"""
+        wanted = (
+            self.is_acquiring
+            and self.is_kinetics_monitoring
+            and self.frame_ring is not None
+            and self.kinetics_full_rate_checkbox.isChecked()
+        )
+        consumer = self.kinetics_consumer
+        if consumer is not None and (not wanted or consumer.ring is not self.frame_ring):
+            consumer.stop()
+            self.kinetics_consumer = None
+            consumer = None
+        if wanted and consumer is None:
+            self._update_kinetics_track_params()
+            self._pending_kinetics_samples = []
+            self._kinetics_frame_tracker = PeakTracker()
+            self._kinetics_frame_centroid_tracker = CentroidTracker()
+            self.kinetics_consumer = FrameConsumer(
+                self.frame_ring, self._track_kinetics_frame, self.frame_counters
+            )
+            self.kinetics_consumer.start()
 
-            if self.processor.background_spectrum is None:
-                self.background_curve.setData(self.wavelengths, raw_signal)
-            if self.processor.reference_spectrum is None:
-                self.reference_curve.setData(self.wavelengths, raw_signal)
+    def _update_kinetics_track_params(self):
+        """在 GUI 线程读取控件值，供后台跟踪线程使用（整体替换元组，无需加锁）。"""
+        self._kinetics_track_params = (
+            self.analysis_start_spinbox.value(),
+            self.analysis_end_spinbox.value(),
+            self.peak_method_combo.currentData() or 'highest_point',
+            self.kinetics_start_time,
+            self.kinetics_reference if self.kinetics_xcorr_checkbox.isChecked() else None,
+        )
 
-            self.processor.update_signal(raw_signal)
+    def _track_kinetics_frame(self, seq, frame, timestamp):
+        """FrameConsumer 回调（后台线程）：计算单帧结果谱的主峰位置。"""
+        params = self._kinetics_track_params
+        if params is None or params[3] is None:
+            return None
+        _analysis_start, _analysis_end, method_key, start_time, reference = params
+        # 只计算分析范围（ROI 视图），不重建全长结果谱，也不需要逐帧掩码
+        pipeline = self.processor.pipeline
+        buffer = self._kinetics_result_buffer
+        if buffer is None or buffer.shape != (pipeline.size,):
+            buffer = self._kinetics_result_buffer = np.empty(pipeline.size)
+        result = self.processor.compute_roi(frame, out=buffer, pipeline=pipeline)
+        if result is None or result.size < 3:
+            return None
+        peak_wl = _track_peak(
+            pipeline.roi_wavelengths, result, method_key, reference,
+            self._kinetics_frame_tracker, self._kinetics_frame_centroid_tracker,
+        )
+        if peak_wl is None:
+            return None
+        return float(timestamp - start_time), float(peak_wl)
+
+    def _rebuild_frame_averager(self):
+        """按控件设置重建实时帧平均器（整体替换对象，采集线程下一帧起生效，无需加锁）。"""
+        frames = self.live_average_spinbox.value()
+        pixels = self.frame_ring.pixels if self.frame_ring is not None else len(self.wavelengths)
+        if frames <= 1 or pixels == 0:
+            self.frame_averager = None
+            return
+        self.frame_averager = StreamingFrameAverager(
+            pixels,
+            frames=frames,
+            method=self.live_average_method_combo.currentData() or 'mean',
+            spike_rejection=self.spike_rejection_checkbox.isChecked(),
+        )
 
-            # === 动力学采样：统一使用 monotonic 计时，首帧兜底 ===
-            if self.is_kinetics_monitoring:
-                current_time = time.monotonic()
-                interval = float(self.kinetics_interval_spinbox.value())
+    def _update_frame_stats_label(self):
+        stats = self.frame_counters.snapshot()
+        text = self.tr("Frames: acquired {0} | processed {1} | rendered {2} | dropped {3}").format(
+            stats['acquired'], stats['processed'], stats['rendered'], stats['dropped'] + stats['lost']
+        )
+        timing = self.processor.baseline_timing() if self.processor.baseline_correction_enabled else None
+        if timing and timing['calls']:
+            text += self.tr(" | baseline {0}: {1:.2f} ms").format(self.processor.baseline_algorithm, timing['last_ms'])
+        averager = self.frame_averager
+        if averager is not None:
+            text += self.tr(" | averaging {0} | spikes rejected {1}").format(
+                averager.frames, averager.rejected_pixels
+            )
+        self.frame_stats_label.setText(text)
 
-                if self.kinetics_start_time is None:
-                    self.kinetics_start_time = current_time
-                if self.kinetics_last_sample_time is None:
-                    self.kinetics_last_sample_time = current_time  # 允许首帧立即输出
+    def update_plot(self):
+        ring = self.frame_ring
+        if ring is None:
+            return
+        seq, frame_view = ring.latest()
+        self.frame_counters.set('acquired', ring.sequence)
+        if self.kinetics_consumer is not None:
+            self._pending_kinetics_samples.extend(self.kinetics_consumer.take_results())
+        if frame_view is None or seq == self._last_rendered_seq:
+            return
+        # 最新帧优先：两次刷新之间到达的其余帧不再显示，显示延迟不超过一个定时器周期
+        self.frame_counters.add('dropped', seq - self._last_rendered_seq - 1)
+        self._last_rendered_seq = seq
+
+        # 处理器会在两次刷新之间保留信号（设置背景/参考时取用），因此复制到复用的缓冲区；
+        # 曲线直接使用该缓冲区，不再额外分配
+        np.copyto(self._signal_frame, frame_view)
+        raw_signal = self._signal_frame
+        self.signal_curve.setData(self.wavelengths, raw_signal)
+
+        if self.processor.background_spectrum is None:
+            self.background_curve.setData(self.wavelengths, raw_signal)
+        if self.processor.reference_spectrum is None:
+            self.reference_curve.setData(self.wavelengths, raw_signal)
 
-                if (current_time - self.kinetics_last_sample_time) >= interval:
-                    self.kinetics_last_sample_time = current_time
+        self.processor.update_signal(raw_signal)
 
-                    peak_wl = self._get_main_peak_wavelength(y_data=self.full_result_y)
-                    if peak_wl is not None:
-                        elapsed_time = current_time - self.kinetics_start_time
-                        
+        # === 动力学采样：统一使用 monotonic 计时，首帧兜底 ===
+        if self.is_kinetics_monitoring:
+            current_time = time.monotonic()
+            interval = float(self.kinetics_interval_spinbox.value())
+
+            if self.kinetics_start_time is None:
+                self.kinetics_start_time = current_time
+            if self.kinetics_last_sample_time is None:
+                self.kinetics_last_sample_time = current_time  # 允许首帧立即输出
+            if self.kinetics_consumer is not None:
+                self._update_kinetics_track_params()
+
+            if (current_time - self.kinetics_last_sample_time) >= interval:
+                self.kinetics_last_sample_time = current_time
+
+                samples = None
+                if self.kinetics_consumer is not None:
+                    # 全帧率路径：本周期内每一帧的 (时间, 峰位) 一并发送
+                    samples, self._pending_kinetics_samples = self._pending_kinetics_samples, []
+                    peak_wl = samples[-1][1] if samples else None
+                    elapsed_time = samples[-1][0] if samples else None
+                else:
+                    peak_wl = self._get_main_peak_wavelength(
+                        y_data=self.full_result_y, x_data=self.full_result_x,
+                        reference=self.kinetics_reference if self.kinetics_xcorr_checkbox.isChecked() else None,
+                        tracker=self.kinetics_peak_tracker,
+                        centroid_tracker=self.kinetics_centroid_tracker,
+                    )
+                    elapsed_time = current_time - self.kinetics_start_time
+                if peak_wl is not None and self.full_result_y is not None:
+                    if self.result_roi_offset is not None:
+                        # ROI 模式：结果本身就是分析范围
+                        cropped_x, cropped_y = self.full_result_x, self.full_result_y
+                    else:
                         # 裁剪到分析范围，避免发送范围外的原始信号值
                         analysis_start = self.analysis_start_spinbox.value()
                         analysis_end = self.analysis_end_spinbox.value()
-                        
-                        # 创建分析范围内的数据
                         mask = (self.full_result_x >= analysis_start) & (self.full_result_x <= analysis_end)
                         cropped_x = self.full_result_x[mask]
                         cropped_y = self.full_result_y[mask]
 
-                        data_package = {
-                            'result_x': cropped_x,
-                            'result_y': cropped_y,
-                            'elapsed_time': float(elapsed_time),
-                            'peak_wl': float(peak_wl)
-                        }
-                        self.kinetics_data_updated.emit(data_package)
-
-            # 更新弹出窗口
-            for item in self.popout_windows:
-                win = item['window']
-                plot_type = item['type']
-
-                if plot_type == 'signal':
-                    win.update_data(self.wavelengths, raw_signal, self.signal_curve.opts['pen'])
-                elif plot_type == 'background':
-                    if self.processor.background_spectrum is None:
-                        win.update_data(self.wavelengths, raw_signal, self.background_curve.opts['pen'])
-                elif plot_type == 'reference':
-                    if self.processor.reference_spectrum is None:
-                        win.update_data(self.wavelengths, raw_signal, self.reference_curve.opts['pen'])
-                elif plot_type == 'result':
-                    x, y = self.result_curve.getData()
-                    win.update_data(x, y, self.result_curve.opts['pen'])
-                elif plot_type == 'sensorgram':
-                    pass
+                    data_package = {
+                        'result_x': cropped_x,
+                        'result_y': cropped_y,
+                        'elapsed_time': float(elapsed_time),
+                        'peak_wl': float(peak_wl)
+                    }
+                    if samples:
+                        data_package['samples'] = samples
+                    self.kinetics_data_updated.emit(data_package)
+
+        # 更新弹出窗口
+        for item in self.popout_windows:
+            win = item['window']
+            plot_type = item['type']
 
-        except queue.Empty:
-            pass
+            if plot_type == 'signal':
+                win.update_data(self.wavelengths, raw_signal, self.signal_curve.opts['pen'])
+            elif plot_type == 'background':
+                if self.processor.background_spectrum is None:
+                    win.update_data(self.wavelengths, raw_signal, self.background_curve.opts['pen'])
+            elif plot_type == 'reference':
+                if self.processor.reference_spectrum is None:
+                    win.update_data(self.wavelengths, raw_signal, self.reference_curve.opts['pen'])
+            elif plot_type == 'result':
+                x, y = self.result_curve.getData()
+                win.update_data(x, y, self.result_curve.opts['pen'])
+            elif plot_type == 'sensorgram':
+                pass
+
+        self.frame_counters.add('rendered')
+        self._update_frame_stats_label()
 
     def _on_result_updated(self, x_data, y_data):
         """确保接收到的数据在处理前被转换为Numpy数组。"""
+        self.result_roi_offset = None
         self.full_result_x = np.array(x_data)
         if y_data is not None:
             self.full_result_y = np.array(y_data)
@@ -1149,6 +1378,20 @@ class MeasurementWidget(QWidget):
             self.set_baseline_button.setEnabled(self.full_result_y is not None)
 
         self._update_result_plot_with_crop()
+
+    def _on_roi_result_updated(self, roi_x, roi_y, offset):
+        """ROI 模式：处理器只发射分析范围的视图（已归本窗口所有），直接使用，无需复制和裁剪。"""
+        self.result_roi_offset = offset
+        self.full_result_x = roi_x
+        self.full_result_y = roi_y
+
+        if hasattr(self, 'set_baseline_button'):
+            self.set_baseline_button.setEnabled(roi_y is not None)
+
+        if roi_y is None:
+            self.result_curve.clear()
+            return
+        self._plot_result(roi_x, roi_y)
     
     def _update_smoothing_params(self):
         """当平滑参数改变时更新处理器。"""
@@ -1183,9 +1426,10 @@ class MeasurementWidget(QWidget):
         end_wl = self.analysis_end_spinbox.value()
 
         mask = (self.full_result_x >= start_wl) & (self.full_result_x <= end_wl)
-        x_cropped = self.full_result_x[mask]
-        y_cropped = self.full_result_y[mask]
+        self._plot_result(self.full_result_x[mask], self.full_result_y[mask])
 
+    def _plot_result(self, x_cropped, y_cropped):
+        """绘制分析范围内的结果谱（拉曼模式下先做拉曼预处理）。"""
         # 如果在拉曼模式下，应用拉曼预处理
         if self.mode_name == "Raman":
             from nanosense.algorithms.preprocessing import (
@@ -1252,6 +1496,7 @@ class MeasurementWidget(QWidget):
                 self.acquisition_thread.join(timeout=0.5)
 
             self.stop_event.clear()
+            self._ensure_frame_ring()
             self.acquisition_thread = threading.Thread(target=self.acquisition_thread_func)
             self.acquisition_thread.daemon = True
             self.acquisition_thread.start()
@@ -1261,6 +1506,7 @@ class MeasurementWidget(QWidget):
                 self.update_timer.setInterval(50)
                 self.update_timer.timeout.connect(self.update_plot)
             self.update_timer.start()
+            self._sync_kinetics_consumer()
             print(self.tr("Acquisition thread has started."))
 
         else:
@@ -1274,19 +1520,33 @@ class MeasurementWidget(QWidget):
 
             if hasattr(self, 'acquisition_thread') and self.acquisition_thread and self.acquisition_thread.is_alive():
                 self.acquisition_thread.join(timeout=0.5)
+            self._sync_kinetics_consumer()
 
             print(self.tr("Acquisition thread has stopped."))
 
     def _on_integration_time_changed(self, value):
         if self.controller:
             self.controller.set_integration_time(value)
+        # 积分时间改变后信号量级不同，重新开始平均
+        self._rebuild_frame_averager()
+
+    def _on_scans_to_average_changed(self, value):
+        if self.controller:
+            self.controller.set_scans_to_average(value)
 
     def acquisition_thread_func(self):
+        ring = self.frame_ring
         while not self.stop_event.is_set():
             if self.controller and self.is_acquiring:
-                _, spectrum = self.controller.get_spectrum()
-                if not self.data_queue.full():
-                    self.data_queue.put(np.array(spectrum))
+                # 直接写入下一个槽位，写满后才发布序号，读端不会看到半帧
+                averager = self.frame_averager
+                if averager is None:
+                    self.controller.read_spectrum_into(ring.next_slot())
+                else:
+                    # 启用实时平均时先读入原始帧，再把去噪结果写入槽位
+                    self.controller.read_spectrum_into(self._raw_frame)
+                    averager.update(self._raw_frame, out=ring.next_slot())
+                ring.commit()
             else:
                 time.sleep(0.1)
 
@@ -1298,6 +1558,9 @@ class MeasurementWidget(QWidget):
         self.stop_event.set()
         if self.acquisition_thread and self.acquisition_thread.is_alive():
             self.acquisition_thread.join(timeout=0.5)
+        if self.kinetics_consumer is not None:
+            self.kinetics_consumer.stop()
+            self.kinetics_consumer = None
 
     def _load_spectrum_data_for_comparison(self):
         default_load_path = self.app_settings.get('default_load_path', '')
@@ -1316,7 +1579,7 @@ class MeasurementWidget(QWidget):
             )
             return
 
-        peak_value = self._get_main_peak_wavelength(self.full_result_y)
+        peak_value = self._get_main_peak_wavelength(self.full_result_y, self.full_result_x)
         if peak_value is None:
             QMessageBox.warning(
                 self,
@@ -1326,6 +1589,9 @@ class MeasurementWidget(QWidget):
             return
 
         self.kinetics_baseline_value = float(peak_value)
+        x_data = self.full_result_x
+        mask = (x_data >= self.analysis_start_spinbox.value()) & (x_data <= self.analysis_end_spinbox.value())
+        self.kinetics_reference = (x_data[mask].copy(), self.full_result_y[mask].copy(), float(peak_value))
         if self.kinetics_window is not None:
             self.kinetics_window.set_baseline_peak_wavelength(self.kinetics_baseline_value)
 
@@ -1337,6 +1603,10 @@ class MeasurementWidget(QWidget):
             self.kinetics_baseline_value = None
         else:
             self.kinetics_baseline_value = float(baseline_value)
+        # 手动修改的基线不再对应参考谱
+        reference = self.kinetics_reference
+        if reference is not None and reference[2] != self.kinetics_baseline_value:
+            self.kinetics_reference = None
 
     def _toggle_kinetics_window(self):
         """打开或关闭独立的动力学监测窗口。"""
@@ -1360,9 +1630,12 @@ class MeasurementWidget(QWidget):
             self.kinetics_data_updated.connect(self.kinetics_window.update_kinetics_data)
 
             # 统一计时（monotonic）
+            self.kinetics_peak_tracker.reset()
+            self.kinetics_centroid_tracker.reset()
             now = time.monotonic()
             self.kinetics_start_time = now
             self.kinetics_last_sample_time = now
+            self._sync_kinetics_consumer()
 
             # 显示并置前
             self.kinetics_window.show()
@@ -1393,23 +1666,24 @@ class MeasurementWidget(QWidget):
         # 恢复时间基到未启动状态，避免残留
         self.kinetics_start_time = None
         self.kinetics_last_sample_time = None
+        self._sync_kinetics_consumer()
 
-    def _get_main_peak_wavelength(self, y_data):
+    def _get_main_peak_wavelength(self, y_data, x_data=None, reference=None, tracker=None, centroid_tracker=None):
         if y_data is None:
             return None
 
+        x_data = self.wavelengths if x_data is None else x_data
         min_wl = self.analysis_start_spinbox.value()
         max_wl = self.analysis_end_spinbox.value()
-        region_indices = np.where((self.wavelengths >= min_wl) & (self.wavelengths <= max_wl))[0]
+        region_indices = np.where((x_data >= min_wl) & (x_data <= max_wl))[0]
         if len(region_indices) < 3:
             return None
 
-        x_subset = self.wavelengths[region_indices]
+        x_subset = x_data[region_indices]
         y_subset = y_data[region_indices]
 
         method_key = self.peak_method_combo.currentData() or 'highest_point'
-        _, peak_wavelength = estimate_peak_position(x_subset, y_subset, method_key)
-        return peak_wavelength
+        return _track_peak(x_subset, y_subset, method_key, reference, tracker, centroid_tracker)
 
     def update_background_plot(self, wavelengths, spectrum):
         """更新背景光谱图表的显示。"""
@@ -1453,6 +1727,11 @@ class MeasurementWidget(QWidget):
             return
         
         reference_intensities = self.processor.reference_spectrum
+        if self.result_roi_offset is not None:
+            # ROI 模式：参考光谱取与结果相同的范围
+            reference_intensities = reference_intensities[
+                self.result_roi_offset:self.result_roi_offset + len(sers_intensities)
+            ]
         
         # 获取浓度值
         sers_concentration = self.sers_concentration_spinbox.value()
@@ -1678,6 +1957,8 @@ Do you wish to continue?'''),
         self.kinetics_box.toggle_button.setText(self.tr("Kinetics Monitoring"))
         kinetics_form_layout = self.kinetics_box.content_area.widget().layout().itemAt(0).layout()
         kinetics_form_layout.labelForField(self.kinetics_interval_spinbox).setText(self.tr("Sampling Interval:"))
+        self.kinetics_full_rate_checkbox.setText(self.tr("Track peak on every frame"))
+        self.kinetics_xcorr_checkbox.setText(self.tr("Track shift against baseline spectrum"))
 
         self.data_op_box.toggle_button.setText(self.tr("Data Operations"))
 
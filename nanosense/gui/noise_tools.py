@@ -15,6 +15,10 @@ class RealTimeNoiseWorker(QObject):
     progress = pyqtSignal(int, str)
     error = pyqtSignal(str)
 
+    # 每个突发块的最大帧数 / 最长时长，决定中止与进度更新的粒度
+    BURST_CHUNK_FRAMES = 50
+    BURST_CHUNK_SECONDS = 1.0
+
     def __init__(self, controller, num_spectra, output_folder, interval):
         super().__init__()
         self.controller = controller
@@ -35,29 +39,31 @@ class RealTimeNoiseWorker(QObject):
             raw_data_dir = os.path.join(results_dir, "raw_data")
             os.makedirs(raw_data_dir)
 
-            spectra_list = []
             wavelengths = self.controller.wavelengths
+            spectra = np.empty((self.num_spectra, len(wavelengths)), dtype=np.float64)
             self.progress.emit(0, self.tr("Starting real-time acquisition..."))
 
-            # 2. 循环采集并保存原始数据
-            for i in range(self.num_spectra):
+            # 2. 分块突发采集并保存原始数据（块间检查中止请求并更新进度）
+            chunk_size = max(1, int(self.BURST_CHUNK_SECONDS / self.interval)) if self.interval > 0 else self.BURST_CHUNK_FRAMES
+            for start in range(0, self.num_spectra, chunk_size):
                 if not self._is_running:
                     self.error.emit(self.tr("Task was aborted by the user."))
                     return
 
-                _, spectrum = self.controller.get_spectrum()
-                spectra_list.append(spectrum)
+                stop = min(start + chunk_size, self.num_spectra)
+                if start > 0 and self.interval > 0:
+                    time.sleep(self.interval)
+                self.controller.acquire_burst(stop - start, self.interval * 1000.0, out=spectra[start:stop])
 
                 # 保存单条光谱数据
-                df = pd.DataFrame({'Wavelength (nm)': wavelengths, 'Intensity': spectrum})
-                df.to_csv(os.path.join(raw_data_dir, f"spectrum_{i + 1:03d}.csv"), index=False)
-
-                if self.interval > 0:
-                    time.sleep(self.interval)
+                for i in range(start, stop):
+                    df = pd.DataFrame({'Wavelength (nm)': wavelengths, 'Intensity': spectra[i]})
+                    df.to_csv(os.path.join(raw_data_dir, f"spectrum_{i + 1:03d}.csv"), index=False)
 
-                progress_val = int(((i + 1) / self.num_spectra) * 100)
+                progress_val = int((stop / self.num_spectra) * 100)
                 self.progress.emit(progress_val,
-                                   self.tr("Acquiring spectra ({0}/{1})...").format(i + 1, self.num_spectra))
+                                   self.tr("Acquiring spectra ({0}/{1})...").format(stop, self.num_spectra))
+            spectra_list = list(spectra)
 
             self.progress.emit(95, self.tr("Aggregating raw data..."))
             summary_data_dict = {'Wavelength (nm)': wavelengths}
@@ -70,8 +76,7 @@ class RealTimeNoiseWorker(QObject):
 
             # 3. 核心计算
             self.progress.emit(90, self.tr("Calculating noise..."))
-            spectra_matrix = np.array(spectra_list).T
-            noise_per_wavelength = np.std(spectra_matrix, axis=1, ddof=1)
+            noise_per_wavelength = np.std(spectra, axis=0, ddof=1)
             average_noise = np.mean(noise_per_wavelength)
 
             # 4. 保存计算结果
@@ -4,7 +4,7 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit,
                              QPushButton, QFileDialog, QDialogButtonBox,
                              QHBoxLayout, QGroupBox, QLabel, QDoubleSpinBox, QMessageBox, QComboBox)
 from PyQt5.QtCore import QEvent  # 新增 QEvent
-from nanosense.core.database_manager import DatabaseManager
+from nanosense.core.database_manager import DatabaseManager, LEGACY_WRITE_MODES
 
 
 class SettingsDialog(QDialog):
@@ -84,6 +84,13 @@ class SettingsDialog(QDialog):
         self.db_path_label = QLabel()
         db_layout.addRow(self.db_path_label, db_path_layout)
 
+        # 旧版 spectra 表写入模式
+        self.legacy_write_combo = QComboBox()
+        for mode in LEGACY_WRITE_MODES:
+            self.legacy_write_combo.addItem(mode, mode)
+        self.legacy_write_label = QLabel()
+        db_layout.addRow(self.legacy_write_label, self.legacy_write_combo)
+
         self.init_db_button = QPushButton()  # 初始化按钮
         db_layout.addRow(self.init_db_button)
         main_layout.addWidget(self.db_group)
@@ -133,6 +140,15 @@ class SettingsDialog(QDialog):
         self.db_path_label.setText(self.tr("Database File Path:"))  # 【新增】
         self.db_path_browse_btn.setText(self.tr("Browse..."))  # 【新增】
         self.init_db_button.setText(self.tr("Initialize/Create Database"))  # 【新增】
+        self.legacy_write_label.setText(self.tr("Legacy Spectra Table:"))
+        legacy_mode_texts = {
+            'mirror': self.tr("Mirror (write both tables)"),
+            'off': self.tr("Off (structured tables only)"),
+            'lazy-view': self.tr("Lazy view (synthesize on read)"),
+        }
+        for index in range(self.legacy_write_combo.count()):
+            mode = self.legacy_write_combo.itemData(index)
+            self.legacy_write_combo.setItemText(index, legacy_mode_texts.get(mode, mode))
 
     def _browse_folder(self, line_edit):
         directory = QFileDialog.getExistingDirectory(self, self.tr("Select Folder"), line_edit.text())
@@ -171,6 +187,9 @@ class SettingsDialog(QDialog):
             self.theme_combo.setCurrentIndex(index)
         default_db_path = os.path.join(os.path.expanduser("~"), ".nanosense", "nanosense_data.db")
         self.db_path_edit.setText(self.settings.get('database_path', default_db_path))
+        index = self.legacy_write_combo.findData(self.settings.get('legacy_write_mode', 'mirror'))
+        if index >= 0:
+            self.legacy_write_combo.setCurrentIndex(index)
 
     def _save_and_accept(self):
         self.settings['default_save_path'] = self.save_path_edit.text()
@@ -180,6 +199,7 @@ class SettingsDialog(QDialog):
         # 保存主题设置
         self.settings['theme'] = self.theme_combo.currentData()
         self.settings['database_path'] = self.db_path_edit.text()
+        self.settings['legacy_write_mode'] = self.legacy_write_combo.currentData()
         self.accept()
 
     def get_settings(self):
@@ -20,6 +20,10 @@ def get_default_settings():
         'analysis_wl_end': 750.0,
         'theme': 'dark',  # 添加主题设置，默认为深色主题
         'database_path': default_db_path,  # 添加数据库路径设置
+        'legacy_write_mode': 'mirror',  # 旧版 spectra 表写入模式: mirror / off / lazy-view
+        'sqlite_cache_size_mb': 64,  # SQLite 页缓存大小
+        'sqlite_mmap_size_mb': 256,  # SQLite 内存映射窗口大小
+        'batch_scans_per_point': 1,  # 批量采集每个点的平均扫描次数
         'mock_api_config': {
             "mode": "dynamic",  # 可选 "static", "dynamic", "noisy_baseline"
             "static_peak_pos": 650.0,
@@ -135,12 +135,12 @@ def generate_summary_reports(output_folder, grouped_data, selected_points, prepr
         df = grouped_data[point_name]
         original_wavelengths = df.iloc[:, 0].values
 
-        for col_name in df.columns[1:]:
-            original_intensity = df[col_name].values
+        # 步骤 1: 先在【全波段】原始数据上进行基线校正（该测量点的所有列一次完成）
+        intensity_matrix = df.iloc[:, 1:].to_numpy(dtype=float).T
+        baselines = baseline_als(intensity_matrix, lam=preprocessing_params['als_lambda'],
+                                 p=preprocessing_params['als_p'])
 
-            # 步骤 1: 先在【全波段】原始数据上进行基线校正
-            baseline = baseline_als(original_intensity, lam=preprocessing_params['als_lambda'],
-                                    p=preprocessing_params['als_p'])
+        for col_name, original_intensity, baseline in zip(df.columns[1:], intensity_matrix, baselines):
             baseline_corrected_full = original_intensity - baseline
 
             # 步骤 2: 然后，截取用户定义的范围，用于后续处理
@@ -8,7 +8,7 @@ import matplotlib.pyplot as plt
 import traceback
 
 from nanosense.algorithms.peak_analysis import find_main_resonance_peak
-from nanosense.algorithms.preprocessing import baseline_als, smooth_savitzky_golay
+from nanosense.algorithms.preprocessing import preprocess_batch
 from nanosense.utils.config_manager import load_settings
 
 
@@ -55,29 +55,18 @@ def generate_plots_for_point(point_name, df, output_folder, preprocessing_params
         # (预处理和寻峰部分无变化)
         processed_data = {'Wavelength (nm)': wavelengths}
         peak_locations = []
-        for col in spectra_df.columns:
-            spectrum_data = spectra_df[col].values
-            baseline = baseline_als(spectrum_data, lam=preprocessing_params['als_lambda'],
-                                    p=preprocessing_params['als_p'])
-            baseline_corrected = spectrum_data - baseline
-            sg_two_stage = preprocessing_params.get('sg_two_stage', True)
-            coarse_smoothed = smooth_savitzky_golay(baseline_corrected,
-                                                    window_length=preprocessing_params['sg_window_coarse'],
-                                                    polyorder=preprocessing_params['sg_polyorder_coarse'])
-            if sg_two_stage:
-                fine_smoothed = smooth_savitzky_golay(
-                    coarse_smoothed,
-                    window_length=preprocessing_params['sg_window_fine'],
-                    polyorder=preprocessing_params['sg_polyorder_fine']
-                )
-            else:
-                fine_smoothed = coarse_smoothed
-            if np.max(fine_smoothed) != np.min(fine_smoothed):
-                processed_data[col] = (fine_smoothed - np.min(fine_smoothed)) / (
-                            np.max(fine_smoothed) - np.min(fine_smoothed))
-            else:
-                processed_data[col] = fine_smoothed
-            range_mask = (wavelengths >= wl_start) & (wavelengths <= wl_end)
+        # 所有列一次性完成基线校正、两阶段平滑和 0-1 归一化
+        spectra_matrix = spectra_df.to_numpy(dtype=float).T
+        processed_matrix = preprocess_batch(wavelengths, spectra_matrix, {
+            **preprocessing_params,
+            'baseline': True,
+            'smoothing': True,
+            'smoothing_method': 'Savitzky-Golay',
+            'normalize': 'minmax',
+        })
+        range_mask = (wavelengths >= wl_start) & (wavelengths <= wl_end)
+        for col, processed in zip(spectra_df.columns, processed_matrix):
+            processed_data[col] = processed
             y_subset = processed_data[col][range_mask]
             x_subset = wavelengths[range_mask]
             peak_index_in_subset, _ = find_main_resonance_peak(y_subset, x_subset)
@@ -16,7 +16,7 @@ from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml import parse_xml
-from nanosense.algorithms.peak_analysis import find_main_resonance_peak, calculate_fwhm
+from nanosense.algorithms.peak_analysis import calculate_fwhm_batch, find_main_resonance_peaks_batch
 
 
 def run_analysis_pipeline(wavelengths, spectra_df):
@@ -25,23 +25,22 @@ def run_analysis_pipeline(wavelengths, spectra_df):
     """
     try:
         peak_metrics_list = []
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
 
-        # 1. 遍历每一条光谱（DataFrame的每一列）
-        for col_name in spectra_df.columns:
-            spectrum_data = spectra_df[col_name].values
+        # 1. 所有光谱（DataFrame的每一列）堆叠为 (光谱数, 点数) 矩阵
+        matrix = spectra_df.to_numpy(dtype=np.float64).T
 
-            # 2. 寻找主共振峰
-            #    这里使用最简单可靠的 np.argmax 来找到最大值点作为峰值
-            peak_index, _ = find_main_resonance_peak(spectrum_data, wavelengths, min_height=-np.inf)
+        # 2. 整批寻找主共振峰：取最高的内部局部极大值，没有内部极大值的光谱记为 -1 并跳过
+        peak_indices = find_main_resonance_peaks_batch(matrix)
 
-            if peak_index is not None:
+        # 3. 整批计算半峰全宽 (FWHM)，无法计算时记为 0（与 calculate_fwhm 一致）
+        fwhms = np.nan_to_num(calculate_fwhm_batch(wavelengths, matrix, peak_indices[:, None])[:, 0], nan=0.0)
+
+        for col_name, spectrum_data, peak_index, fwhm in zip(spectra_df.columns, matrix, peak_indices, fwhms):
+            if peak_index >= 0:
                 peak_wl = wavelengths[peak_index]
                 peak_int = spectrum_data[peak_index]
 
-                # 3. 计算半峰全宽 (FWHM)
-                fwhm_results = calculate_fwhm(wavelengths, spectrum_data, [peak_index])
-                fwhm = fwhm_results[0] if fwhm_results else np.nan
-
                 peak_metrics_list.append({
                     'Spectrum Name': col_name,
                     'Peak Wavelength (nm)': peak_wl,
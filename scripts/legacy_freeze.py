@@ -13,7 +13,6 @@ from __future__ import annotations
 
 import argparse
 import csv
-import shutil
 import sqlite3
 import sys
 from datetime import datetime, timezone
@@ -180,7 +179,16 @@ def run_backfill(conn: sqlite3.Connection) -> Dict[str, int]:
 def backup_database(db_path: Path, backup_dir: Path, run_stamp: str) -> Path:
     backup_dir.mkdir(parents=True, exist_ok=True)
     target = backup_dir / f"{db_path.stem}_{run_stamp}{db_path.suffix}"
-    shutil.copy2(db_path, target)
+    # 使用在线备份 API，确保 WAL 中尚未检查点的页也被写入备份
+    source = sqlite3.connect(db_path)
+    try:
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+    finally:
+        source.close()
     return target
 
 
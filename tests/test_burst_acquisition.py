@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import pytest
+
+from mock_spectrometer_api import Wrapper
+from nanosense.core.controller import FX2000Controller
+
+
+class _LoopOnlyWrapper:
+    """Driver without burst or averaging support: one `getSpectrum` per frame."""
+
+    def __init__(self, pixels=16):
+        self.wavelengths = np.linspace(400.0, 800.0, pixels)
+        self.calls = 0
+
+    def getName(self, index):
+        return "Loop"
+
+    def getSerialNumber(self, index):
+        return "SN"
+
+    def getSpectrum(self, index):
+        self.calls += 1
+        return np.full(len(self.wavelengths), float(self.calls))
+
+
+def _make_controller(wrapper):
+    FX2000Controller._instance = None
+    return FX2000Controller(wrapper, use_real_hardware=False)
+
+
+@pytest.fixture(autouse=True)
+def _reset_singleton():
+    yield
+    FX2000Controller._instance = None
+
+
+def test_burst_falls_back_to_tight_loop_with_paced_frames():
+    wrapper = _LoopOnlyWrapper()
+    controller = _make_controller(wrapper)
+
+    frames = controller.acquire_burst(5)
+    assert frames.shape == (5, 16) and frames.dtype == np.float64
+    np.testing.assert_array_equal(frames[:, 0], [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    out = np.zeros((3, 16))
+    start = time.perf_counter()
+    assert controller.acquire_burst(3, interval_ms=20, out=out) is out
+    assert time.perf_counter() - start >= 0.035
+    np.testing.assert_array_equal(out[:, 0], [6.0, 7.0, 8.0])
+
+    with pytest.raises(ValueError):
+        controller.acquire_burst(2, out=np.zeros((3, 16)))
+
+    averaged = controller.acquire_averaged(4)
+    np.testing.assert_allclose(averaged, np.full(16, 10.5))
+
+
+def test_mock_burst_and_hardware_averaging():
+    wrapper = Wrapper()
+    wrapper.config = {"mode": "static", "noise_level": 50.0, "static_peak_pos": 650.0}
+    controller = _make_controller(wrapper)
+
+    frames = controller.acquire_burst(64)
+    assert frames.shape == (64, len(controller.wavelengths))
+    peaks = controller.wavelengths[frames.argmax(axis=1)]
+    assert np.all(np.abs(peaks - 650.0) < 5.0)
+
+    averaged = controller.acquire_averaged(100)
+    assert controller.scans_to_average == 1
+    despiked = controller.acquire_averaged(8, reject_spikes=True)
+    assert despiked.shape == averaged.shape
+    baseline = slice(0, 200)
+    assert np.std(averaged[baseline]) < 0.3 * np.std(frames[0, baseline])
+
+
+def test_mock_burst_outpaces_per_frame_loop():
+    wrapper = Wrapper()
+    wrapper.config = {"mode": "dynamic", "noise_level": 50.0}
+    controller = _make_controller(wrapper)
+    frames = 200
+
+    start = time.perf_counter()
+    out = np.empty((frames, len(controller.wavelengths)))
+    for index in range(frames):
+        _, out[index] = controller.get_spectrum()
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    controller.acquire_burst(frames, out=out)
+    burst_elapsed = time.perf_counter() - start
+
+    assert burst_elapsed < loop_elapsed
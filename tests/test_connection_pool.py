@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from nanosense.core.connection_pool import ConnectionPool
+from nanosense.core.data_access import ExplorerDataAccess
+from nanosense.core.database_manager import DatabaseManager
+
+
+def test_pool_gives_each_thread_its_own_reader(tmp_path):
+    db_path = str(tmp_path / "pool.db")
+    pool = ConnectionPool(lambda: sqlite3.connect(db_path, check_same_thread=False))
+    try:
+        main_reader = pool.connection()
+        assert pool.connection() is main_reader
+        assert main_reader is not pool.writer
+
+        with pool.writing() as writer:
+            assert pool.connection() is writer
+            with pool.writing():
+                assert pool.connection() is writer
+        assert pool.connection() is main_reader
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not main_reader
+    finally:
+        pool.close()
+    assert pool.connection() is None
+
+
+def test_concurrent_reads_during_batch_inserts(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "pool_concurrency.db"))
+    try:
+        project_id = manager.find_or_create_project("Pool", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Batch Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.linspace(400.0, 800.0, 256)
+        access = ExplorerDataAccess(lambda: manager.conn, manager.axis_cache)
+        stop = threading.Event()
+        errors = []
+
+        def insert_batches():
+            try:
+                for batch in range(10):
+                    records = [
+                        {
+                            "experiment_id": exp_id,
+                            "spec_type": f"Signal_Point_{batch}_{index}",
+                            "timestamp": "2025-01-01 00:00:00",
+                            "wavelengths": wavelengths,
+                            "intensities": np.full(256, float(index)),
+                        }
+                        for index in range(20)
+                    ]
+                    assert all(manager.save_spectra_batch(records))
+            finally:
+                stop.set()
+
+        def search_loop():
+            reads = 0
+            while not stop.is_set() or reads == 0:
+                try:
+                    manager.search_experiments()
+                    access.fetch_projects()
+                    manager.get_spectra_for_experiments([exp_id])
+                    reads += 1
+                except Exception as exc:  # pragma: no cover - failure path
+                    errors.append(exc)
+                    break
+            return reads
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            readers = [executor.submit(search_loop) for _ in range(3)]
+            executor.submit(insert_batches).result(timeout=30)
+            read_counts = [future.result(timeout=30) for future in readers]
+
+        assert not errors
+        assert all(count > 0 for count in read_counts)
+        assert len(manager.get_spectra_for_experiments([exp_id])) == 200
+    finally:
+        manager.close()
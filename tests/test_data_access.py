@@ -1,5 +1,6 @@
 import sqlite3
 
+import numpy as np
 import pytest
 
 from nanosense.core.data_access import ExplorerDataAccess
@@ -83,3 +84,30 @@ def test_fetch_batch_overview_returns_items_for_experiment():
     assert rows[0]["position_label"] == "A1"
     assert rows[0]["item_status"] == "completed"
     assert rows[0]["capture_count"] == 5
+
+
+def test_fetch_spectrum_payloads_decodes_shared_axis_once():
+    conn = setup_conn()
+    conn.execute(
+        "CREATE TABLE wavelength_axes (axis_id INTEGER PRIMARY KEY, axis_hash TEXT, points_count INTEGER, storage_format TEXT, axis_blob BLOB)"
+    )
+    conn.execute(
+        "CREATE TABLE spectrum_data (data_id INTEGER PRIMARY KEY, axis_id INTEGER, wavelengths_blob BLOB, intensities_blob BLOB, storage_format TEXT)"
+    )
+    conn.execute("ALTER TABLE spectrum_sets ADD COLUMN data_id INTEGER")
+    axis = np.array([500.0, 501.0, 502.0])
+    conn.execute("INSERT INTO wavelength_axes VALUES (1, 'h', 3, 'f64le', ?)", (axis.tobytes(),))
+    for set_id in (7, 8):
+        conn.execute(
+            "INSERT INTO spectrum_data VALUES (?, 1, X'', ?, 'f64le')",
+            (set_id, np.full(3, float(set_id)).tobytes()),
+        )
+        conn.execute(
+            "INSERT INTO spectrum_sets (spectrum_set_id, experiment_id, capture_label, data_id) VALUES (?, 3, 'Signal', ?)",
+            (set_id, set_id),
+        )
+    access = ExplorerDataAccess(conn)
+    payloads = access.fetch_spectrum_payloads([7, 8])
+    np.testing.assert_array_equal(payloads[7]["wavelengths"], axis)
+    np.testing.assert_array_equal(payloads[8]["intensities"], [8.0, 8.0, 8.0])
+    assert payloads[7]["wavelengths"] is payloads[8]["wavelengths"]
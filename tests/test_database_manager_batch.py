@@ -1,4 +1,15 @@
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+
 from nanosense.core.database_manager import DatabaseManager
+from nanosense.core.migrations import migration_0003_binary_spectrum_storage
+from nanosense.core.spectrum_codec import decode_array
+from nanosense.core.sqlite_profile import ConnectionProfile, apply_connection_profile
 
 
 def test_save_spectrum_links_batch_item(tmp_path):
@@ -64,3 +75,272 @@ def test_save_spectrum_links_batch_item(tmp_path):
         assert '"notes": {"operator": "tester"}' in row[0]
     finally:
         manager.close()
+
+
+def test_save_spectrum_stores_binary_payload(tmp_path):
+    db_path = tmp_path / "binary_storage.db"
+    manager = DatabaseManager(str(db_path))
+    try:
+        project_id = manager.find_or_create_project("Binary Storage", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Single Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.linspace(400.0, 800.0, 2048)
+        intensities = np.sin(wavelengths / 50.0)
+        manager.save_spectrum(exp_id, "Signal", "2025-01-01 00:00:00", wavelengths, intensities)
+
+        row = manager.conn.execute(
+            "SELECT storage_format, LENGTH(intensities_blob) FROM spectrum_data"
+        ).fetchone()
+        assert row == ("f64le", 2048 * 8)
+
+        spectra = manager.get_spectra_for_experiments([exp_id])
+        assert len(spectra) == 1
+        assert spectra[0]["name"] == "Exp_Signal"
+        np.testing.assert_array_equal(spectra[0]["x"], wavelengths)
+        np.testing.assert_array_equal(spectra[0]["y"], intensities)
+
+        full = manager.get_full_experiment_data(exp_id)
+        np.testing.assert_array_equal(full["spectra_sets"][0]["Signal"], intensities)
+    finally:
+        manager.close()
+
+
+def test_binary_storage_migration_converts_json_rows():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        """
+        CREATE TABLE spectrum_data (
+            data_id INTEGER PRIMARY KEY,
+            wavelengths_blob BLOB,
+            intensities_blob BLOB,
+            points_count INTEGER,
+            hash TEXT,
+            storage_format TEXT
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO spectrum_data VALUES (1, ?, ?, 2, NULL, 'json')",
+        (b"[500.0,501.0]", b"[1.0,1.5]"),
+    )
+    conn.execute(
+        "INSERT INTO spectrum_data VALUES (2, ?, ?, 1, NULL, 'json')",
+        (b"not-json", b"[1.0]"),
+    )
+    migration_0003_binary_spectrum_storage.apply(conn)
+
+    rows = conn.execute(
+        "SELECT data_id, storage_format, intensities_blob FROM spectrum_data ORDER BY data_id"
+    ).fetchall()
+    assert rows[0][1] == "f64le"
+    np.testing.assert_array_equal(decode_array(rows[0][2], rows[0][1]), [1.0, 1.5])
+    assert rows[1][1] == "json"
+
+
+def test_save_spectrum_shares_wavelength_axis(tmp_path):
+    db_path = tmp_path / "axis_dedup.db"
+    manager = DatabaseManager(str(db_path))
+    try:
+        project_id = manager.find_or_create_project("Axis Dedup", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Batch Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.linspace(400.0, 800.0, 512)
+        for index in range(3):
+            manager.save_spectrum(
+                exp_id, "Signal", f"2025-01-01 00:00:0{index}", wavelengths, np.full(512, float(index))
+            )
+
+        assert manager.conn.execute("SELECT COUNT(*) FROM wavelength_axes").fetchone()[0] == 1
+        rows = manager.conn.execute(
+            "SELECT DISTINCT axis_id, LENGTH(wavelengths_blob) FROM spectrum_data"
+        ).fetchall()
+        assert len(rows) == 1 and rows[0][1] == 0
+
+        spectra = manager.get_spectra_for_experiments([exp_id])
+        assert len(spectra) == 3
+        assert spectra[0]["x"] is spectra[2]["x"]
+        np.testing.assert_array_equal(spectra[1]["x"], wavelengths)
+        np.testing.assert_array_equal(spectra[2]["y"], np.full(512, 2.0))
+    finally:
+        manager.close()
+
+
+def test_wavelength_axis_insert_race_reuses_existing_row(tmp_path):
+    db_path = tmp_path / "axis_race.db"
+    manager = DatabaseManager(str(db_path))
+    other = manager.create_connection()
+    try:
+        wavelengths = np.linspace(400.0, 800.0, 64)
+
+        class RacingCursor:
+            """第一次查询返回空，同时由另一个连接抢先写入同一波长轴。"""
+
+            def __init__(self, cursor):
+                self.cursor = cursor
+                self.raced = False
+
+            def execute(self, sql, params=()):
+                self.cursor.execute(sql, params)
+                if not self.raced:
+                    self.raced = True
+                    winner = manager._get_or_create_wavelength_axis(other.cursor(), wavelengths)
+                    other.commit()
+                    self.winner = winner
+                    return self
+                return self.cursor
+
+            def fetchone(self):
+                return None
+
+        cursor = RacingCursor(manager.conn.cursor())
+        axis_id = manager._get_or_create_wavelength_axis(cursor, wavelengths)
+        assert axis_id is not None and axis_id == cursor.winner
+        assert manager.conn.execute("SELECT COUNT(*) FROM wavelength_axes").fetchone()[0] == 1
+    finally:
+        other.close()
+        manager.close()
+
+
+def test_legacy_write_modes(tmp_path):
+    db_path = tmp_path / "legacy_modes.db"
+    manager = DatabaseManager(str(db_path))
+    try:
+        project_id = manager.find_or_create_project("Legacy Modes", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Single Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.array([500.0, 501.0, 502.0])
+
+        # 各模式都返回 spectrum_set_id
+        mirrored_id = manager.save_spectrum(exp_id, "Signal", "2025-01-01 00:00:00", wavelengths, [1.0, 2.0, 3.0])
+        legacy_id, data_id = manager.conn.execute(
+            "SELECT spectrum_id, data_id FROM spectra WHERE spectrum_set_id = ?", (mirrored_id,)
+        ).fetchone()
+        assert data_id is not None
+
+        manager.set_legacy_write_mode("lazy-view")
+        set_id = manager.save_spectrum(exp_id, "Dark", "2025-01-01 00:00:01", wavelengths, [0.5, 0.5, 0.5])
+        manager.set_legacy_write_mode("off")
+        off_id = manager.save_spectrum(exp_id, "Reference", "2025-01-01 00:00:02", wavelengths, [0.7, 0.7, 0.7])
+        assert manager.conn.execute("SELECT COUNT(*) FROM spectra").fetchone()[0] == 1
+        assert manager.conn.execute(
+            "SELECT spectrum_set_id FROM spectrum_sets ORDER BY spectrum_set_id").fetchall() == [
+            (mirrored_id,), (set_id,), (off_id,)]
+
+        # 本进程连接（TEMP 视图）解码全部载荷；合成行的 id 为负，不与旧表 id 冲突
+        rows = manager.conn.execute(
+            "SELECT spectrum_id, spectrum_set_id, type, wavelengths, intensities FROM legacy_spectra_view "
+            "ORDER BY spectrum_set_id"
+        ).fetchall()
+        assert [row[:3] for row in rows] == [
+            (legacy_id, mirrored_id, "Signal"), (-set_id, set_id, "Dark"), (-off_id, off_id, "Reference")]
+        assert json.loads(rows[1][3]) == [500.0, 501.0, 502.0]
+        assert json.loads(rows[1][4]) == [0.5, 0.5, 0.5]
+
+        # 外部读取端看到持久视图中的同一组行
+        external = sqlite3.connect(str(db_path))
+        try:
+            assert external.execute(
+                "SELECT spectrum_id, type FROM legacy_spectra_view ORDER BY spectrum_set_id").fetchall() == [
+                (legacy_id, "Signal"), (-set_id, "Dark"), (-off_id, "Reference")]
+        finally:
+            external.close()
+
+        spectra = manager.get_spectra_for_experiments([exp_id])
+        assert sorted(item["name"] for item in spectra) == ["Exp_Dark", "Exp_Reference", "Exp_Signal"]
+
+        with pytest.raises(ValueError):
+            manager.set_legacy_write_mode("sometimes")
+    finally:
+        manager.set_legacy_write_mode("mirror")
+        manager.close()
+
+
+def _reader_writer_benchmark(db_path, profile, rows=200):
+    """Count reads completed on one connection while another commits spectra."""
+    writer = sqlite3.connect(str(db_path))
+    reader = sqlite3.connect(str(db_path), check_same_thread=False)
+    apply_connection_profile(writer, profile)
+    apply_connection_profile(reader, profile)
+    writer.execute("CREATE TABLE IF NOT EXISTS bench (id INTEGER PRIMARY KEY, payload BLOB)")
+    writer.commit()
+    payload = np.zeros(2048).tobytes()
+    stop = threading.Event()
+    stats = {"reads": 0, "busy": 0}
+
+    def read_loop():
+        while not stop.is_set():
+            try:
+                reader.execute("SELECT COUNT(*), SUM(LENGTH(payload)) FROM bench").fetchone()
+                stats["reads"] += 1
+            except sqlite3.OperationalError:
+                stats["busy"] += 1
+
+    thread = threading.Thread(target=read_loop)
+    thread.start()
+    started = time.perf_counter()
+    write_busy = 0
+    for _ in range(rows):
+        try:
+            writer.execute("INSERT INTO bench (payload) VALUES (?)", (payload,))
+            writer.commit()
+        except sqlite3.OperationalError:
+            writer.rollback()
+            write_busy += 1
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+    reader.close()
+    writer.close()
+    return {**stats, "write_busy": write_busy, "elapsed": elapsed}
+
+
+def test_wal_profile_allows_concurrent_reader_and_writer(tmp_path):
+    wal = ConnectionProfile(journal_mode="WAL", busy_timeout_ms=50)
+    legacy = ConnectionProfile(journal_mode="DELETE", synchronous="FULL", busy_timeout_ms=50)
+
+    # 读事务持有快照时，WAL 下写连接仍可提交；DELETE 模式下提交会被读锁阻塞
+    for profile, expect_commit in ((wal, True), (legacy, False)):
+        db_path = tmp_path / f"lock_{profile.journal_mode}.db"
+        writer = sqlite3.connect(str(db_path))
+        reader = sqlite3.connect(str(db_path))
+        assert apply_connection_profile(writer, profile) == profile.journal_mode.lower()
+        apply_connection_profile(reader, profile)
+        writer.execute("CREATE TABLE t (v INTEGER)")
+        writer.commit()
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM t").fetchone()
+        writer.execute("INSERT INTO t VALUES (1)")
+        committed = True
+        try:
+            writer.commit()
+        except sqlite3.OperationalError:
+            committed = False
+        assert committed is expect_commit
+        reader.rollback()
+        reader.close()
+        writer.close()
+
+    wal_stats = _reader_writer_benchmark(tmp_path / "bench_wal.db", wal)
+    legacy_stats = _reader_writer_benchmark(tmp_path / "bench_delete.db", legacy)
+    assert wal_stats["busy"] == 0 and wal_stats["write_busy"] == 0
+    assert wal_stats["reads"] > 0 and wal_stats["elapsed"] > 0
+    # DELETE 模式下读写互相阻塞，只要求读线程有进展、写入没有全部被阻塞
+    assert legacy_stats["reads"] + legacy_stats["busy"] > 0
+    assert 0 <= legacy_stats["write_busy"] < 200 and legacy_stats["elapsed"] > 0
+
+
+def test_database_manager_applies_connection_profile(tmp_path):
+    profile = ConnectionProfile(cache_size_mb=8, mmap_size_mb=16, maintenance_interval_s=0.0)
+    manager = DatabaseManager(str(tmp_path / "profile.db"), profile)
+    try:
+        conn = manager.conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -8 * 1024
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert manager.maintenance.maybe_run(conn) is True
+
+        writer = manager.create_connection()
+        try:
+            assert writer.execute("PRAGMA cache_size").fetchone()[0] == -8 * 1024
+        finally:
+            writer.close()
+    finally:
+        manager.close()
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+from nanosense.core.controller import FX2000Controller
+from nanosense.core.frame_ring import FrameConsumer, FrameCounters, FrameRing
+
+
+class _FakeWrapper:
+    def __init__(self, pixels=8):
+        self.wavelengths = np.linspace(400.0, 800.0, pixels)
+        self.calls = 0
+
+    def getName(self, index):
+        return "Fake"
+
+    def getSerialNumber(self, index):
+        return "SN"
+
+    def getSpectrum(self, index):
+        self.calls += 1
+        return np.full(len(self.wavelengths), float(self.calls))
+
+
+@pytest.fixture
+def controller():
+    FX2000Controller._instance = None
+    instance = FX2000Controller(_FakeWrapper(), use_real_hardware=False)
+    yield instance
+    FX2000Controller._instance = None
+
+
+def test_ring_publishes_in_place_frames_without_copying():
+    ring = FrameRing(capacity=4, pixels=3)
+    assert ring.latest() == (0, None)
+
+    slot = ring.next_slot()
+    slot[:] = [1.0, 2.0, 3.0]
+    seq = ring.commit()
+    latest_seq, view = ring.latest()
+    assert latest_seq == seq == 1
+    assert np.shares_memory(view, slot)
+    assert not view.flags.writeable
+    np.testing.assert_array_equal(view, [1.0, 2.0, 3.0])
+
+    for value in range(2, 7):
+        ring.write(np.full(3, float(value)))
+    # The slot the writer fills next is no longer readable.
+    assert ring.get(3) is None
+    np.testing.assert_array_equal(ring.get(4), np.full(3, 4.0))
+    seqs, lost = ring.read_since(1)
+    assert seqs == [4, 5, 6] and lost == 2
+
+
+def test_controller_reads_into_ring_and_caches_axis(controller):
+    wavelengths, spectrum = controller.get_spectrum()
+    assert wavelengths is controller.wavelengths
+    assert not wavelengths.flags.writeable
+    assert spectrum.dtype == np.float64
+
+    ring = FrameRing(capacity=2, pixels=len(wavelengths))
+    slot = ring.next_slot()
+    assert controller.read_spectrum_into(slot) is slot
+    ring.commit()
+    np.testing.assert_array_equal(ring.latest()[1], np.full(len(wavelengths), 2.0))
+
+
+def test_frame_consumer_processes_every_frame_and_counts_losses():
+    ring = FrameRing(capacity=4, pixels=2)
+    counters = FrameCounters()
+    consumer = FrameConsumer(ring, lambda seq, frame, ts: (seq, float(frame[0])), counters)
+
+    for value in range(1, 4):
+        ring.write(np.full(2, float(value)))
+    assert consumer.drain() == 3
+    assert consumer.take_results() == [(1, 1.0), (2, 2.0), (3, 3.0)]
+
+    # Writer laps the ring before the consumer catches up.
+    for value in range(4, 10):
+        ring.write(np.full(2, float(value)))
+    consumer.drain()
+    assert [seq for seq, _ in consumer.take_results()] == [7, 8, 9]
+    stats = counters.snapshot()
+    assert stats["processed"] == 6 and stats["lost"] == 3
+
+
+def test_frame_consumer_thread_follows_writer():
+    ring = FrameRing(capacity=64, pixels=4)
+    consumer = FrameConsumer(ring, lambda seq, frame, ts: seq)
+    consumer.start()
+    try:
+        for value in range(20):
+            ring.write(np.full(4, float(value)))
+        deadline = time.monotonic() + 5
+        while consumer.last_seq < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        consumer.stop()
+    assert consumer.take_results() == list(range(1, 21))
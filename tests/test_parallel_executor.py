@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from nanosense.core import parallel_executor
+
+from nanosense.algorithms.peak_analysis import compute_spectrum_metrics, estimate_peak_position
+from nanosense.algorithms.preprocessing import preprocess_batch
+from nanosense.core.parallel_executor import (
+    map_spectra,
+    peak_positions_task,
+    shutdown_pool,
+    spectrum_metrics_task,
+)
+
+WAVELENGTHS = np.linspace(450.0, 750.0, 400)
+PARAMS = {"baseline": True, "smoothing": True, "als_lambda": 1e6}
+
+
+def _spectra(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.linspace(520.0, 680.0, count)[:, None]
+    return np.exp(-((WAVELENGTHS - centers) ** 2) / 300.0) + rng.normal(0.0, 0.01, (count, WAVELENGTHS.size))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _pool():
+    yield
+    shutdown_pool()
+
+
+def test_process_pool_keeps_input_order_and_reports_progress():
+    spectra = _spectra(40)
+    peak_mask = (WAVELENGTHS >= 500.0) & (WAVELENGTHS <= 700.0)
+    args = (WAVELENGTHS, PARAMS, peak_mask, "centroid")
+    calls = []
+    parallel = map_spectra(
+        peak_positions_task, spectra, args, progress=lambda done, total: calls.append((done, total)),
+        max_workers=2, chunk_size=7, min_parallel=0,
+    )
+    serial = map_spectra(peak_positions_task, spectra, args, max_workers=1)
+    np.testing.assert_allclose(parallel, serial)
+    assert np.all(np.diff(parallel) > 0)  # peaks were generated in ascending order
+    assert len(calls) == 6 and calls[-1] == (40, 40)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+
+    processed = preprocess_batch(WAVELENGTHS, spectra[3], PARAMS)
+    expected = estimate_peak_position(WAVELENGTHS[peak_mask], processed[peak_mask], "centroid")[1]
+    assert parallel[3] == pytest.approx(expected)
+
+
+def test_failed_map_cancels_queued_chunks_before_releasing_shared_memory(monkeypatch):
+    spectra = _spectra(40)
+    args = (WAVELENGTHS, PARAMS, np.ones(WAVELENGTHS.size, dtype=bool), "highest_point")
+    futures = []
+    get_pool = parallel_executor._get_pool
+
+    class RecordingPool:
+        def __init__(self, pool):
+            self.pool = pool
+
+        def submit(self, *submit_args):
+            future = self.pool.submit(*submit_args)
+            futures.append(future)
+            return future
+
+    monkeypatch.setattr(parallel_executor, "_get_pool", lambda workers: RecordingPool(get_pool(workers)))
+
+    def fail(done, total):
+        raise RuntimeError("cancelled by caller")
+
+    with pytest.raises(RuntimeError):
+        map_spectra(peak_positions_task, spectra, args, progress=fail, max_workers=2, chunk_size=2, min_parallel=0)
+    assert len(futures) == 20 and all(future.done() for future in futures)
+    assert any(future.cancelled() for future in futures)
+    assert all(future.exception() is None for future in futures if not future.cancelled())
+
+
+def test_metrics_task_matches_single_spectrum_metrics():
+    spectra = _spectra(5, seed=1)
+    results = map_spectra(
+        spectrum_metrics_task, spectra, (WAVELENGTHS, None, (500.0, 700.0), (700.0, 750.0), "highest_point")
+    )
+    assert len(results) == 5
+    for row, (processed, metrics) in zip(spectra, results):
+        np.testing.assert_array_equal(processed, row)
+        expected = compute_spectrum_metrics(WAVELENGTHS, row, (700.0, 500.0), (700.0, 750.0))
+        assert metrics.keys() == expected.keys()
+        np.testing.assert_allclose(list(metrics.values()), list(expected.values()))
+        assert 500.0 <= metrics["peak_wl"] <= 700.0 and metrics["fwhm"] > 0
+
+
+def test_map_spectra_validates_and_handles_empty_input():
+    assert map_spectra(peak_positions_task, np.empty((0, 4))) == []
+    with pytest.raises(ValueError):
+        map_spectra(peak_positions_task, np.zeros(4))
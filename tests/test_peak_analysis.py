@@ -15,9 +15,23 @@ sys.path.insert(0, project_root)
 # 测试peak_analysis模块
 from nanosense.algorithms.peak_analysis import (
     find_main_resonance_peak,
+    benchmark_peak_trackers,
     calculate_fwhm,
+    calculate_fwhm_batch,
+    centroid_window,
+    compute_spectrum_metrics,
+    estimate_peak_position,
+    estimate_peak_positions_batch,
+    find_main_resonance_peaks_batch,
+    gaussian_3point,
+    half_max_crossings,
+    PeakTracker,
+    CentroidTracker,
+    xcorr_peak_position,
+    xcorr_shift,
     PEAK_METHOD_LABELS
 )
+import pytest
 
 def test_peak_analysis():
     """测试峰值分析功能"""
@@ -63,5 +77,169 @@ def test_peak_analysis():
     
     print("\n=== 测试完成 ===")
 
+
+def _plate(count=96, points=2048, seed=0):
+    rng = np.random.default_rng(seed)
+    wavelengths = np.linspace(400.0, 1000.0, points)
+    centers = rng.uniform(450.0, 950.0, count)
+    widths = rng.uniform(1.0, 80.0, count)
+    matrix = np.exp(-((wavelengths - centers[:, None]) / widths[:, None]) ** 2) * rng.uniform(0.5, 2.0, (count, 1))
+    matrix += rng.normal(0.0, 0.02, matrix.shape)
+    # 边界：单调上升、单调下降、全平
+    matrix[0] = np.linspace(0.0, 1.0, points)
+    matrix[1] = np.linspace(1.0, 0.0, points)
+    matrix[2] = 0.0
+    return wavelengths, matrix
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["highest_point", "parabolic", "gaussian_3point", "centroid", "threshold", "gaussian_fit", "lorentzian_fit",
+     "voigt_fit"],
+)
+def test_batch_peak_positions_match_per_spectrum(method):
+    wavelengths, matrix = _plate(count=12 if method.endswith("_fit") else 96)
+    indices, peaks = estimate_peak_positions_batch(wavelengths, matrix, method)
+    assert indices.shape == peaks.shape == (len(matrix),)
+    for row, index, peak in zip(matrix, indices, peaks):
+        expected_index, expected_peak = estimate_peak_position(wavelengths, row, method)
+        if expected_peak is None:
+            assert index == -1 and np.isnan(peak)
+        else:
+            assert index == expected_index
+            assert peak == pytest.approx(expected_peak, abs=1e-6)
+
+
+def test_batch_peak_positions_feed_spectrum_metrics():
+    wavelengths, matrix = _plate(count=4)
+    find_range, noise_range = (450.0, 950.0), (400.0, 440.0)
+    mask = (wavelengths >= 450.0) & (wavelengths <= 950.0)
+    indices, peaks = estimate_peak_positions_batch(wavelengths[mask], matrix[:, mask], "parabolic")
+    for row, index, peak in zip(matrix, indices, peaks):
+        metrics = compute_spectrum_metrics(wavelengths, row, find_range, noise_range, "parabolic", peak=(index, peak))
+        expected = compute_spectrum_metrics(wavelengths, row, find_range, noise_range, "parabolic")
+        np.testing.assert_allclose(
+            [metrics[key] for key in sorted(metrics)], [expected[key] for key in sorted(expected)], atol=1e-6
+        )
+    with pytest.raises(ValueError):
+        estimate_peak_positions_batch(wavelengths[:10], matrix)
+
+
+def test_batch_main_resonance_peaks_skip_edges_like_find_peaks():
+    wavelengths, plate = _plate(count=8)
+    n_points = len(wavelengths)
+    ramp = np.linspace(0.0, 1.0, n_points)
+    edge_spike = np.exp(-((np.arange(n_points) - 200) / 20.0) ** 2)
+    edge_spike[0] = 5.0
+    plateau = np.zeros(n_points)
+    plateau[100:104] = 1.0
+    with_nan = plate[0].copy()
+    with_nan[50] = np.nan
+    matrix = np.vstack([plate, ramp, np.ones(n_points), edge_spike, plateau, with_nan])
+
+    indices = find_main_resonance_peaks_batch(matrix)
+    for row, index in zip(matrix, indices):
+        expected, _ = find_main_resonance_peak(row, wavelengths, min_height=-np.inf)
+        assert index == (-1 if expected is None else expected)
+    assert list(indices[8:12]) == [-1, -1, 200, 101]
+
+
+def test_batch_fwhm_matches_per_peak_and_supports_local_baseline():
+    rng = np.random.default_rng(4)
+    wavelengths = np.linspace(400.0, 900.0, 1500)
+    centers = np.array([500.0, 620.0, 780.0])
+    sigmas = np.array([8.0, 15.0, 25.0])
+    matrix = np.array([
+        (rng.uniform(0.5, 2.0, (3, 1)) * np.exp(-((wavelengths - centers[:, None]) / sigmas[:, None]) ** 2)).sum(axis=0)
+        for _ in range(20)
+    ]) + rng.normal(0.0, 1e-3, (20, wavelengths.size))
+    peak_indices = np.searchsorted(wavelengths, centers)[None, :].repeat(20, axis=0)
+    peak_indices[0, 2] = -1  # 空位
+
+    widths = calculate_fwhm_batch(wavelengths, matrix, peak_indices)
+    assert np.isnan(widths[0, 2])
+    for row, indices, expected in zip(matrix, peak_indices, widths):
+        np.testing.assert_allclose(calculate_fwhm(wavelengths, row, indices[indices >= 0]),
+                                   expected[indices >= 0], atol=1e-9)
+    np.testing.assert_allclose(widths[1:], np.broadcast_to(2 * np.sqrt(np.log(2)) * sigmas, (19, 3)), rtol=0.02)
+
+    # 倾斜基线上的孤立峰：以全局最小值为基线时右侧找不到半高交点，局部基线可以
+    sloped = np.exp(-((wavelengths - 650.0) / 10.0) ** 2) + 0.004 * (wavelengths - 400.0)
+    index = [int(np.argmax(sloped))]
+    truth = 2 * np.sqrt(np.log(2)) * 10.0
+    assert calculate_fwhm(wavelengths, sloped, index, baseline='local', window=150)[0] == pytest.approx(truth, rel=0.05)
+    assert calculate_fwhm(wavelengths, sloped, index) == [0]
+    left, right, level = half_max_crossings(wavelengths, sloped, index, baseline='local', window=150)
+    assert left[0] < 650.0 < right[0] and np.isfinite(level[0])
+    assert calculate_fwhm(wavelengths, np.zeros_like(wavelengths), [10]) == [0]
+    with pytest.raises(ValueError):
+        calculate_fwhm_batch(wavelengths, matrix, peak_indices, baseline='median')
+
+
+def test_subpixel_trackers_are_exact_on_noise_free_gaussians():
+    wavelengths = np.linspace(500.0, 800.0, 1000)
+    reference = np.exp(-((wavelengths - 650.0) / 35.0) ** 2)
+    for shift in (0.13, 1.0, 3.3):
+        shifted = np.exp(-((wavelengths - 650.0 - shift) / 35.0) ** 2)
+        assert gaussian_3point(wavelengths, shifted) == pytest.approx(650.0 + shift, abs=1e-6)
+        assert centroid_window(wavelengths, shifted) == pytest.approx(650.0 + shift, abs=2e-3)
+        assert centroid_window(wavelengths, shifted, center=650.0, half_width=40.0) == pytest.approx(650.0 + shift, abs=2e-3)
+        assert xcorr_peak_position(wavelengths, reference, shifted, 650.0) == pytest.approx(650.0 + shift, abs=2e-3)
+    assert xcorr_shift(reference, np.roll(reference, 7)) == pytest.approx(7.0)
+    assert centroid_window(wavelengths, np.zeros_like(wavelengths)) is None
+
+
+def test_tracker_benchmark_reports_precision_and_cost():
+    rng = np.random.default_rng(0)
+    wavelengths = np.linspace(500.0, 800.0, 1000)
+    centers = 650.0 + np.cumsum(rng.normal(0.0, 0.05, 40))
+    spectra = np.exp(-((wavelengths - centers[:, None]) / 35.0) ** 2) + rng.normal(0.0, 0.01, (40, 1000))
+    reference = np.exp(-((wavelengths - 650.0) / 35.0) ** 2)
+    report = benchmark_peak_trackers(wavelengths, spectra, centers, reference=reference, reference_peak=650.0)
+    assert {"highest_point", "gaussian_3point", "centroid_window", "xcorr_shift"} <= set(report)
+    assert all(entry["failures"] == 0 and entry["us_per_frame"] > 0 for entry in report.values())
+    # 宽峰上最高点被噪声主导；利用整个峰的跟踪器精度高一个数量级以上
+    assert report["centroid_window"]["rms_error"] < 0.1 * report["highest_point"]["rms_error"]
+    assert report["xcorr_shift"]["rms_error"] < 0.1 * report["highest_point"]["rms_error"]
+
+
+def test_peak_tracker_warm_starts_and_recovers_from_jumps():
+    rng = np.random.default_rng(2)
+    wavelengths = np.linspace(500.0, 800.0, 1000)
+    centers = np.concatenate([650.0 + np.cumsum(rng.normal(0.0, 0.05, 30)), [720.0, 720.1, 720.2]])
+    spectra = 0.2 + np.exp(-((wavelengths - centers[:, None]) / 12.0) ** 2)
+    spectra += rng.normal(0.0, 0.01, spectra.shape)
+
+    tracker = PeakTracker()
+    tracked = np.array([tracker.update(wavelengths, y) for y in spectra])
+    np.testing.assert_allclose(tracked, centers, atol=0.05)
+    assert tracker.fwhm == pytest.approx(12.0 * 2 * np.sqrt(np.log(2)), rel=0.02)
+    # 一次跳变触发全局重新搜索，其余帧都是热启动
+    assert tracker.restarts == 1 and tracker.warm_fits == len(centers) - 2
+
+    tracker.reset()
+    assert tracker.center is None and tracker.update(wavelengths, np.zeros_like(wavelengths)) is None
+
+
+def test_centroid_tracker_reuses_previous_center_and_width():
+    rng = np.random.default_rng(3)
+    wavelengths = np.linspace(500.0, 800.0, 1000)
+    centers = np.concatenate([650.0 + np.cumsum(rng.normal(0.0, 0.05, 20)), [720.0, 720.1]])
+    spectra = 0.2 + np.exp(-((wavelengths - centers[:, None]) / 12.0) ** 2)
+    spectra += rng.normal(0.0, 0.005, spectra.shape)
+
+    tracker = CentroidTracker()
+    first = tracker.update(wavelengths, spectra[0])
+    half_width = tracker.half_width
+    assert first == pytest.approx(centers[0], abs=0.05) and half_width > 0
+    tracked = [first] + [tracker.update(wavelengths, y) for y in spectra[1:]]
+    np.testing.assert_allclose(tracked, centers, atol=0.05)
+    # 跳出上一帧窗口时重新全局定位一次，之后继续沿用同一窗宽
+    assert tracker.restarts == 1 and tracker.half_width == pytest.approx(half_width, rel=0.05)
+    assert tracker.center == pytest.approx(tracked[-1])
+
+    tracker.reset()
+    assert tracker.center is None and tracker.update(wavelengths, np.zeros_like(wavelengths)) is None
+
 if __name__ == "__main__":
     test_peak_analysis()
\ No newline at end of file
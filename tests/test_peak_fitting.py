@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from nanosense.algorithms.peak_analysis import identify_raman_peaks
+from nanosense.algorithms.peak_fitting import LINE_SHAPES, _evaluate, fit_peaks, fit_peaks_batch, multi_peak_model
+
+
+def _true_params(shape):
+    if shape == "pseudo_voigt":
+        return [5.0, 30.0, 6.0, 0.3, 3.0, 42.0, 10.0, 0.7]
+    return [5.0, 30.0, 6.0, 3.0, 42.0, 10.0]
+
+
+@pytest.mark.parametrize("shape", LINE_SHAPES)
+def test_analytic_jacobian_matches_finite_differences(shape):
+    x = np.linspace(0.0, 100.0, 200)
+    params = np.array(_true_params(shape) + [0.5, 0.01])
+    model, jacobian = _evaluate(x, params[None, :], shape, 2, "linear")
+    step = 1e-6
+    for column in range(params.size):
+        shifted = params.copy()
+        shifted[column] += step
+        numeric = (multi_peak_model(x, shifted, shape, 2, "linear") - model[0]) / step
+        np.testing.assert_allclose(jacobian[0, :, column], numeric, atol=1e-5)
+
+
+@pytest.mark.parametrize("shape", LINE_SHAPES)
+def test_batch_fit_separates_overlapping_peaks(shape):
+    rng = np.random.default_rng(0)
+    x = np.linspace(0.0, 100.0, 400)
+    truth = np.array(_true_params(shape))
+    clean = multi_peak_model(x, np.append(truth, 1.0), shape, 2, "constant")
+    matrix = clean + rng.normal(0.0, 0.02, (16, x.size))
+
+    result = fit_peaks_batch(x, matrix, [28.0, 45.0], shape=shape)
+    assert result["converged"].all()
+    size = 4 if shape == "pseudo_voigt" else 3
+    np.testing.assert_allclose(result["center"], np.broadcast_to(truth[1::size], (16, 2)), atol=0.1)
+    np.testing.assert_allclose(result["fwhm"], np.broadcast_to(truth[2::size], (16, 2)), rtol=0.03)
+    np.testing.assert_allclose(result["baseline"][:, 0], 1.0, atol=0.05)
+
+    # 单条拟合与批量拟合中的对应行一致
+    single = fit_peaks(x, matrix[3], [28.0, 45.0], shape=shape)
+    assert [peak["center"] for peak in single["peaks"]] == pytest.approx(result["center"][3].tolist(), abs=1e-8)
+
+
+def test_fit_respects_bounds_and_validates_input():
+    x = np.linspace(0.0, 10.0, 50)
+    y = multi_peak_model(x, np.array([2.0, 5.0, 1.5, 0.1]), "lorentzian", 1, "constant")
+    lower = np.array([0.0, 5.5, 0.1, -np.inf])
+    upper = np.array([np.inf, 9.0, 10.0, np.inf])
+    result = fit_peaks(x, y, [6.0], shape="lorentzian", bounds=(lower, upper))
+    assert result["peaks"][0]["center"] == pytest.approx(5.5)
+    with pytest.raises(ValueError):
+        fit_peaks(x, y, [5.0], shape="voigt")
+    with pytest.raises(ValueError):
+        fit_peaks_batch(x[:10], y[None, :], [5.0])
+
+
+def test_identify_raman_peaks_reports_fitted_line_shapes():
+    x = np.linspace(200.0, 1800.0, 1600)
+    truth = [100.0, 520.0, 12.0, 0.6, 60.0, 545.0, 15.0, 0.4, 80.0, 1000.0, 8.0, 0.5]
+    y = multi_peak_model(x, np.array(truth + [5.0, 0.002]), "pseudo_voigt", 3, "linear")
+    y += np.random.default_rng(1).normal(0.0, 0.3, x.size)
+
+    _, _, peak_info = identify_raman_peaks(x, y, min_height=20, min_distance=5, line_shape="pseudo_voigt")
+    assert len(peak_info) == 3
+    for info, (amplitude, center, fwhm, eta) in zip(peak_info, np.reshape(truth, (3, 4))):
+        assert info["fit_shape"] == "pseudo_voigt"
+        assert info["fit_wavenumber"] == pytest.approx(center, abs=0.1)
+        assert info["fit_fwhm"] == pytest.approx(fwhm, rel=0.03)
+        assert info["fit_eta"] == pytest.approx(eta, abs=0.05)
+    _, _, plain = identify_raman_peaks(x, y, min_height=20, min_distance=5)
+    assert "fit_wavenumber" not in plain[0]
@@ -0,0 +1,213 @@
+import numpy as np
+import pytest
+from scipy.sparse import csc_matrix, diags
+from scipy.sparse.linalg import spsolve
+
+from nanosense.algorithms.preprocessing import (
+    _als_penalty_bands,
+    available_baselines,
+    baseline_als,
+    baseline_arpls,
+    baseline_polynomial,
+    benchmark_baselines,
+    benchmark_despiking,
+    despike_frames,
+    detect_spikes,
+    estimate_baseline,
+    get_baseline_algorithm,
+    normalize_spectrum,
+    preprocess_batch,
+    remove_spikes,
+    smooth_median,
+    smooth_moving_average,
+    smooth_savitzky_golay,
+)
+
+
+def _reference_als(y, lam=1e6, p=0.01, niter=10):
+    length = len(y)
+    D = diags([1.0, -2.0, 1.0], [0, -1, -2], shape=(length, length - 2))
+    D = lam * D.dot(D.transpose())
+    w = np.ones(length)
+    W = csc_matrix(diags(w, 0, shape=(length, length)))
+    for _ in range(niter):
+        W.setdiag(w)
+        z = spsolve(W + D, w * y)
+        w = p * (y > z) + (1 - p) * (y < z)
+    return z
+
+
+def _spectra(count, length=512, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, length)
+    peaks = 800.0 * np.exp(-((x - rng.uniform(0.3, 0.7, (count, 1))) ** 2) / 0.002)
+    return peaks + 150.0 * x ** 2 + rng.normal(0.0, 3.0, (count, length))
+
+
+def test_banded_als_matches_sparse_reference():
+    spectra = _spectra(4)
+    for row in spectra:
+        np.testing.assert_allclose(baseline_als(row, lam=1e5, p=0.02), _reference_als(row, 1e5, 0.02), atol=1e-6)
+
+
+@pytest.mark.parametrize("length", [3, 4])
+def test_als_penalty_bands_match_sparse_reference_for_short_spectra(length):
+    D = diags([1.0, -2.0, 1.0], [0, -1, -2], shape=(length, length - 2))
+    penalty = (D @ D.T).toarray()
+    bands = _als_penalty_bands(length, 1.0)
+    for offset in range(3):
+        np.testing.assert_allclose(bands[2 - offset, offset:], np.diagonal(penalty, offset))
+    y = np.array([1.0, 3.0, 2.0, 5.0])[:length]
+    np.testing.assert_allclose(baseline_als(y, lam=10.0, p=0.1), _reference_als(y, 10.0, 0.1), atol=1e-9)
+
+
+def test_als_batch_matches_rows_and_reuses_penalty():
+    spectra = _spectra(6)
+    _als_penalty_bands.cache_clear()
+    batch = baseline_als(spectra)
+    assert batch.shape == spectra.shape
+    for row, baseline in zip(spectra, batch):
+        np.testing.assert_allclose(baseline_als(row), baseline)
+    info = _als_penalty_bands.cache_info()
+    assert info.misses == 1 and info.hits == len(spectra)
+
+
+@pytest.mark.parametrize("name", ["ALS", "arPLS", "airPLS", "Polynomial", "SNIP", "Rolling Ball"])
+def test_registered_baselines_track_a_curved_background(name):
+    length = 1024
+    background = 150.0 * np.linspace(0.0, 1.0, length) ** 2
+    spectra = _spectra(3, length, seed=1)
+    settings = {"lam": 1e6, "p": 0.01, "als_niter": 10, "unused_setting": True}
+
+    algorithm = get_baseline_algorithm(name.lower())
+    algorithm.reset_timing()
+    batch = estimate_baseline(spectra, name, **settings)
+    assert batch.shape == spectra.shape
+    np.testing.assert_allclose(estimate_baseline(spectra[0], name, **settings), batch[0])
+    assert np.median(np.abs(batch - background)) < 25.0
+
+    timing = algorithm.timing()
+    assert timing["calls"] == 2 and timing["spectra"] == 4
+    assert timing["ms_per_spectrum"] > 0
+
+
+def test_shared_iteration_setting_only_applies_to_als():
+    spectra = _spectra(2, 512, seed=3)
+    settings = {"lam": 1e6, "p": 0.01, "als_niter": 3}
+    np.testing.assert_allclose(estimate_baseline(spectra, "ALS", **settings), baseline_als(spectra, niter=3))
+    # arPLS / 多项式保留各自的默认迭代次数，不被 ALS 的设置截断
+    np.testing.assert_allclose(estimate_baseline(spectra, "arPLS", **settings), baseline_arpls(spectra))
+    np.testing.assert_allclose(estimate_baseline(spectra, "Polynomial", **settings), baseline_polynomial(spectra))
+    # 显式的 niter 优先于共用设置
+    np.testing.assert_allclose(estimate_baseline(spectra, "ALS", niter=5, als_niter=3), baseline_als(spectra, niter=5))
+
+
+def test_baseline_registry_rejects_unknown_names_and_benchmarks():
+    with pytest.raises(ValueError):
+        estimate_baseline(np.zeros(16), "does-not-exist")
+    timings = benchmark_baselines(_spectra(2, 256), repeats=1)
+    assert set(timings) == set(available_baselines())
+    assert all(value > 0 for value in timings.values())
+
+
+def _preprocess_single(y, params):
+    """Per-spectrum processing as the GUI call sites did it before preprocess_batch."""
+    y = y - baseline_als(y, lam=params["als_lambda"], p=params["als_p"])
+    method = params["smoothing_method"]
+    if method == "Savitzky-Golay":
+        y = smooth_savitzky_golay(y, params["sg_window_coarse"], 3)
+        y = smooth_savitzky_golay(y, params["sg_window_fine"], 3)
+    elif method == "Moving Average":
+        y = smooth_moving_average(y, params["ma_window"])
+    else:
+        y = smooth_median(y, params["med_kernel"])
+    return y
+
+
+@pytest.mark.parametrize("method", ["Savitzky-Golay", "Moving Average", "Median Filter"])
+def test_preprocess_batch_matches_per_spectrum_processing(method):
+    spectra = _spectra(5)
+    params = {
+        "baseline": True, "smoothing": True, "smoothing_method": method, "als_lambda": 1e5, "als_p": 0.01,
+        "sg_window_coarse": 14, "sg_window_fine": 8, "ma_window": 6, "med_kernel": 5,
+    }
+    batch = preprocess_batch(None, spectra, params)
+    assert batch.shape == spectra.shape
+    for row, processed in zip(spectra, batch):
+        np.testing.assert_allclose(processed, _preprocess_single(row, params), atol=1e-8)
+
+    single, baseline = preprocess_batch(None, spectra[0], params, return_baseline=True)
+    assert single.ndim == 1 and baseline.shape == single.shape
+    np.testing.assert_allclose(single, batch[0])
+
+
+def test_preprocess_batch_range_and_normalization():
+    spectra = _spectra(3, length=256)
+    wavelengths = np.linspace(400.0, 800.0, 256)
+    params = {"smoothing": True, "normalize": "minmax", "processing_range": (500.0, 700.0)}
+    result = preprocess_batch(wavelengths, spectra, params)
+    inside = (wavelengths >= 500.0) & (wavelengths <= 700.0)
+    np.testing.assert_array_equal(result[:, ~inside], spectra[:, ~inside])
+    np.testing.assert_allclose(result[:, inside].min(axis=1), 0.0)
+    np.testing.assert_allclose(result[:, inside].max(axis=1), 1.0)
+
+    for method in ("peak_height", "area", "snv"):
+        np.testing.assert_allclose(
+            preprocess_batch(None, spectra, {"normalize": method})[1], normalize_spectrum(spectra[1], method)
+        )
+    untouched = preprocess_batch(None, spectra, {})
+    assert untouched is not spectra
+    np.testing.assert_array_equal(untouched, spectra)
+    with pytest.raises(ValueError):
+        preprocess_batch(wavelengths[:10], spectra, {})
+
+
+def _raman_with_spikes(count, seed=0, length=1024):
+    rng = np.random.default_rng(seed)
+    x = np.arange(length)
+    clean = np.vstack([
+        1000.0 + 3000.0 * np.exp(-((x - c) / 4.0) ** 2) + 800.0 * np.exp(-((x - c - 200) / 6.0) ** 2)
+        for c in rng.uniform(200, 700, count)
+    ])
+    noisy = clean + rng.normal(0.0, 15.0, clean.shape)
+    spiky = noisy.copy()
+    for row, clean_row in zip(spiky, clean):
+        flat = np.flatnonzero(clean_row < 1001.0)
+        for start in rng.choice(flat[(flat > 5) & (flat < length - 5)], 3, replace=False):
+            row[start:start + rng.integers(1, 3)] += rng.uniform(1000.0, 5000.0)
+    return clean, noisy, spiky
+
+
+def test_spike_removal_keeps_narrow_raman_peaks():
+    clean, noisy, spiky = _raman_with_spikes(40)
+    spikes = spiky != noisy
+    mask = detect_spikes(spiky)
+    assert mask.shape == spiky.shape
+    assert mask[spikes].mean() > 0.95 and not mask[~spikes].any()
+
+    cleaned, mask_single = remove_spikes(spiky[0], return_mask=True)
+    np.testing.assert_array_equal(mask_single, mask[0])
+    np.testing.assert_allclose(cleaned, remove_spikes(spiky)[0])
+    assert np.abs(cleaned - clean[0]).max() < 100.0
+
+    report = benchmark_despiking(spiky, clean=clean, repeats=1)
+    assert set(report) == {"Modified Z-score", "Median filter"}
+    assert report["Modified Z-score"]["ms_per_spectrum"] > 0
+    # The median filter clips the narrow peaks; spike removal leaves them alone.
+    assert abs(report["Modified Z-score"]["peak_height_ratio"] - 1.0) < 0.01
+    assert report["Median filter"]["peak_height_ratio"] < 0.97
+
+
+def test_despike_frames_replaces_spikes_with_the_frame_median():
+    rng = np.random.default_rng(1)
+    clean, _, _ = _raman_with_spikes(1, seed=1)
+    frames = clean + rng.normal(0.0, 15.0, (6, clean.shape[1]))
+    noisy = frames.copy()
+    frames[2, 300:302] += 2000.0
+    frames[4, 50] += 800.0
+    cleaned, mask = despike_frames(frames, return_mask=True)
+    assert mask[2, 300:302].all() and mask[4, 50] and mask.sum() < 10
+    np.testing.assert_array_equal(cleaned[~mask], frames[~mask])
+    assert np.abs(cleaned - noisy).max() < 100.0
+    with pytest.raises(ValueError):
+        despike_frames(frames[0])
@@ -0,0 +1,148 @@
+import threading
+
+import numpy as np
+import pytest
+from scipy.ndimage import uniform_filter1d
+from scipy.signal import medfilt, savgol_filter
+
+from nanosense.algorithms.preprocessing import baseline_als, remove_spikes
+from nanosense.core.preprocessing_pipeline import PreprocessingPipeline
+
+WAVELENGTHS = np.linspace(400.0, 1000.0, 1024)
+
+
+def _smooth(spectrum, method, window, order):
+    if method == "No Smoothing":
+        return spectrum
+    if method == "Moving Average":
+        return uniform_filter1d(spectrum, size=window)
+    if method == "Median Filter":
+        return medfilt(spectrum, kernel_size=window)
+    return savgol_filter(spectrum, window, order)
+
+
+def _reference_result(mode, signal, dark, ref, method, window, order, baseline, start=500.0, end=900.0, margin=30.0):
+    """Per-frame computation as SpectrumProcessor did it before the pipeline."""
+    mask = (WAVELENGTHS >= max(WAVELENGTHS[0], start - margin)) & (WAVELENGTHS <= min(WAVELENGTHS[-1], end + margin))
+    idx = np.where(mask)[0]
+    s = _smooth(signal[idx], method, window, order)
+    d = _smooth(dark[idx], method, window, order) if dark is not None else np.zeros_like(s)
+    r = _smooth(ref[idx], method, window, order) if ref is not None else np.ones_like(s)
+    if mode in ("Reflectance", "Transmission", "Absorbance"):
+        den = r - d
+        den[den == 0] = 1e-9
+        result = (s - d) / den
+        if mode == "Absorbance":
+            result[result <= 0] = 1e-9
+            result = -np.log10(result)
+    elif mode in ("Raman", "Fluorescence"):
+        result = s - d if dark is not None else s
+        if mode == "Raman" and ref is not None:
+            den = r.copy()
+            den[den == 0] = 1e-9
+            result = result / den
+    else:
+        result = s
+    if baseline:
+        result = result - baseline_als(result, lam=1e5, p=0.01, niter=10)
+    full = np.array(signal, dtype=float)
+    full[idx] = result
+    return full
+
+
+def _frames(seed=0):
+    rng = np.random.default_rng(seed)
+    peak = 8000.0 * np.exp(-((WAVELENGTHS - 650.0) ** 2) / 200.0)
+    dark = 100.0 + rng.normal(0.0, 2.0, WAVELENGTHS.size)
+    ref = 12000.0 + rng.normal(0.0, 20.0, WAVELENGTHS.size)
+    signal = ref - peak + rng.normal(0.0, 20.0, WAVELENGTHS.size)
+    return signal, dark, ref
+
+
+@pytest.mark.parametrize("mode", ["Absorbance", "Transmission", "Raman", "Fluorescence", "N/A"])
+@pytest.mark.parametrize("method", ["Savitzky-Golay", "Moving Average", "Median Filter", "No Smoothing"])
+def test_pipeline_matches_per_frame_processing(mode, method):
+    signal, dark, ref = _frames()
+    pipeline = PreprocessingPipeline(WAVELENGTHS, 500.0, 900.0, 30.0, smoothing_method=method, smoothing_window=11)
+    np.testing.assert_allclose(
+        pipeline.run(mode, signal, dark, ref), _reference_result(mode, signal, dark, ref, method, 11, 3, False)
+    )
+
+
+def test_pipeline_baseline_reuses_buffers_and_is_thread_local():
+    signal, dark, ref = _frames(1)
+    pipeline = PreprocessingPipeline(
+        WAVELENGTHS, 500.0, 900.0, 30.0,
+        baseline_enabled=True, baseline_algorithm="ALS", baseline_params={"lam": 1e5, "p": 0.01, "niter": 10},
+    )
+    expected = _reference_result("Absorbance", signal, dark, ref, "Savitzky-Golay", 11, 3, True)
+    out = np.empty_like(signal)
+    assert pipeline.run("Absorbance", signal, dark, ref, out=out) is out
+    np.testing.assert_allclose(out, expected)
+    assert pipeline.run("Absorbance", signal, None, ref) is None
+
+    main_buffer = pipeline._buffer()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pipeline._buffer()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main_buffer and pipeline._buffer() is main_buffer
+
+
+def test_dark_and_reference_are_prepared_once_per_capture():
+    signal, dark, ref = _frames(2)
+    pipeline = PreprocessingPipeline(WAVELENGTHS, 500.0, 900.0, 30.0)
+    smoothed_dark, denominator = pipeline.prepare("Absorbance", dark, ref)
+    for frame in range(3):
+        pipeline.run("Absorbance", signal + frame, dark, ref)
+    assert pipeline.prepare("Absorbance", dark, ref)[1] is denominator
+    assert not denominator.flags.writeable
+
+    # A new capture (new array) or a different mode group recomputes the entries.
+    new_ref = ref.copy()
+    assert pipeline.prepare("Absorbance", dark, new_ref)[1] is not denominator
+    raman_dark, raman_denominator = pipeline.prepare("Raman", dark, new_ref)
+    np.testing.assert_allclose(raman_dark, smoothed_dark)
+    np.testing.assert_allclose(raman_denominator, pipeline.smooth(new_ref))
+    np.testing.assert_allclose(
+        pipeline.run("Raman", signal, dark, new_ref),
+        _reference_result("Raman", signal, dark, new_ref, "Savitzky-Golay", 11, 3, False),
+    )
+
+
+@pytest.mark.parametrize("mode", ["Absorbance", "Raman"])
+def test_roi_result_is_a_view_of_the_processed_window(mode):
+    signal, dark, ref = _frames(3)
+    pipeline = PreprocessingPipeline(
+        WAVELENGTHS, 500.0, 900.0, 30.0,
+        baseline_enabled=True, baseline_params={"lam": 1e5, "p": 0.01, "niter": 10},
+    )
+    full = pipeline.run(mode, signal, dark, ref)
+    mask = (WAVELENGTHS >= 500.0) & (WAVELENGTHS <= 900.0)
+    assert pipeline.roi_offset == np.flatnonzero(mask)[0]
+    np.testing.assert_array_equal(pipeline.roi_wavelengths, WAVELENGTHS[mask])
+
+    out = np.empty(pipeline.size)
+    roi = pipeline.run_roi(mode, signal, dark, ref, out=out)
+    assert roi.base is out and np.shares_memory(roi, out)
+    np.testing.assert_allclose(roi, full[mask])
+    # Without `out`, every frame gets its own window-sized array.
+    assert pipeline.run_roi(mode, signal, dark, ref).base is not roi.base
+
+    assert pipeline.run_roi("Absorbance", signal, None, ref) is None
+    empty = PreprocessingPipeline(WAVELENGTHS, 1500.0, 1600.0, 30.0)
+    assert empty.roi is None and empty.run_roi(mode, signal, dark, ref) is None
+
+
+def test_raman_despiking_runs_before_smoothing():
+    signal, dark, _ = _frames(4)
+    spiky = signal.copy()
+    spiky[400] += 5000.0
+    pipeline = PreprocessingPipeline(WAVELENGTHS, 500.0, 900.0, 30.0, despike_enabled=True)
+    window = pipeline.window
+    expected = savgol_filter(remove_spikes(spiky[window]), 11, 3) - savgol_filter(remove_spikes(dark[window]), 11, 3)
+    np.testing.assert_allclose(pipeline.run("Raman", spiky, dark)[window], expected)
+    plain = PreprocessingPipeline(WAVELENGTHS, 500.0, 900.0, 30.0)
+    assert np.abs(pipeline.run("Raman", spiky, dark) - plain.run("Raman", signal, dark)).max() < 50.0
+    # Other modes are untouched.
+    np.testing.assert_allclose(pipeline.run("Fluorescence", spiky, dark), plain.run("Fluorescence", spiky, dark))
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import numpy as np
+
+from nanosense.core.processing_worker import LatestFrameMailbox, ProcessingWorker
+
+
+def test_mailbox_keeps_only_the_newest_frame():
+    mailbox = LatestFrameMailbox()
+    source = np.zeros(4)
+    for value in range(5):
+        source[:] = value
+        mailbox.post(source)
+    source[:] = -1.0  # the mailbox holds its own copy
+
+    ok, frame = mailbox.take(timeout=0.1)
+    assert ok
+    np.testing.assert_array_equal(frame, np.full(4, 4.0))
+    assert mailbox.stats()["superseded"] == 4
+
+    # A bare recompute hands back the last frame; nothing else is pending.
+    mailbox.request()
+    assert mailbox.take(timeout=0.1)[1] is frame
+    assert mailbox.take(timeout=0.01) == (False, None)
+
+
+def test_parameter_requests_are_coalesced_but_frames_are_not_delayed():
+    mailbox = LatestFrameMailbox()
+    start = time.monotonic()
+    for _ in range(10):
+        mailbox.request(delay=0.05)
+        time.sleep(0.005)
+    ok, _ = mailbox.take(timeout=1.0)
+    assert ok and time.monotonic() - start >= 0.09
+    assert mailbox.take(timeout=0.1) == (False, None)
+
+    mailbox.request(delay=10.0)
+    mailbox.post(np.ones(2))
+    begin = time.monotonic()
+    assert mailbox.take(timeout=1.0)[0]
+    assert time.monotonic() - begin < 0.5
+    # The frame also satisfied the pending recompute.
+    assert mailbox.take(timeout=0.05) == (False, None)
+
+    # An immediate request overrides a debounced one that is still pending.
+    mailbox.request(delay=10.0)
+    mailbox.request()
+    begin = time.monotonic()
+    assert mailbox.take(timeout=1.0)[0]
+    assert time.monotonic() - begin < 0.5
+
+
+def test_worker_processes_latest_frames_off_the_calling_thread():
+    results = []
+    threads = set()
+    done = threading.Event()
+
+    def process(frame):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return float(frame[0])
+
+    def deliver(value):
+        results.append(value)
+        if value == 99.0:
+            done.set()
+
+    worker = ProcessingWorker(process, deliver, name="TestWorker")
+    worker.start()
+    try:
+        for value in range(100):
+            worker.mailbox.post(np.full(8, float(value)))
+        assert done.wait(2.0)
+    finally:
+        worker.stop()
+    assert not worker.running
+    assert threads == {"TestWorker"}
+    assert results[-1] == 99.0 and len(results) < 100
+    assert results == sorted(results)
@@ -0,0 +1,52 @@
+import sqlite3
+
+import numpy as np
+
+from nanosense.core.database_manager import DatabaseManager
+from nanosense.core.spectrum_handles import LazySpectrum, SpectrumPayloadCache, prefetch_spectra
+
+
+def test_lazy_spectra_decode_on_access(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "lazy.db"))
+    try:
+        project_id = manager.find_or_create_project("Lazy", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Batch Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.linspace(400.0, 800.0, 128)
+        for index in range(5):
+            manager.save_spectrum(
+                exp_id, f"Signal_Point_{index}", "2025-01-01 00:00:00", wavelengths, np.full(128, float(index))
+            )
+        manager.payload_source.cache.clear()
+
+        spectra = manager.get_spectra_for_experiments([exp_id], lazy=True)
+        assert len(spectra) == 5
+        assert all(isinstance(spectrum, LazySpectrum) for spectrum in spectra)
+        assert len(manager.payload_source.cache) == 0
+        assert spectra[0]["name"] == "Exp_Signal_Point_0"
+        np.testing.assert_array_equal(spectra[0]["x"], wavelengths)
+
+        np.testing.assert_array_equal(spectra[3]["y"], np.full(128, 3.0))
+        assert len(manager.payload_source.cache) == 1
+
+        prefetch_spectra(spectra)
+        assert len(manager.payload_source.cache) == 5
+        eager = manager.get_spectra_for_experiments([exp_id])
+        for lazy_item, eager_item in zip(spectra, eager):
+            assert lazy_item.get("name") == eager_item["name"]
+            np.testing.assert_array_equal(lazy_item.y, eager_item["y"])
+    finally:
+        manager.close()
+
+
+def test_payload_cache_is_bounded():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE spectrum_data (data_id INTEGER PRIMARY KEY, intensities_blob BLOB, storage_format TEXT)")
+    conn.executemany(
+        "INSERT INTO spectrum_data VALUES (?, ?, 'f64le')",
+        [(data_id, np.full(4, float(data_id)).tobytes()) for data_id in range(1, 6)],
+    )
+    cache = SpectrumPayloadCache(maxsize=2)
+    cache.prefetch(conn, [1, 2, 3])
+    assert len(cache) == 2 and 1 not in cache
+    np.testing.assert_array_equal(cache.get(conn, 1), np.full(4, 1.0))
+    assert 2 not in cache and 3 in cache
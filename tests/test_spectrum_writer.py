@@ -0,0 +1,50 @@
+import numpy as np
+
+from nanosense.core.database_manager import DatabaseManager
+from nanosense.core.spectrum_writer import SpectrumWriteQueue
+
+
+def test_write_queue_batches_and_resolves_ids(tmp_path):
+    db_path = tmp_path / "write_queue.db"
+    manager = DatabaseManager(str(db_path))
+    writer = SpectrumWriteQueue(manager, max_batch_rows=4, max_batch_interval_ms=10_000)
+    try:
+        project_id = manager.find_or_create_project("Write Queue", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Batch Measurement", "2025-01-01 00:00:00")
+        wavelengths = np.linspace(500.0, 600.0, 64)
+        futures = [
+            writer.submit(exp_id, f"Signal_Point_{index}", "2025-01-01 00:00:00", wavelengths, np.full(64, index))
+            for index in range(6)
+        ]
+
+        # 4 rows hit the batch threshold; the remaining 2 wait for flush().
+        futures[3].result(timeout=5)
+        assert not futures[5].done()
+        assert writer.flush(timeout=5)
+
+        spectrum_ids = [future.result() for future in futures]
+        assert all(spectrum_ids)
+        assert len(set(spectrum_ids)) == 6
+        count = manager.conn.execute(
+            "SELECT COUNT(*) FROM spectrum_sets WHERE experiment_id = ?", (exp_id,)
+        ).fetchone()[0]
+        assert count == 6
+    finally:
+        writer.close()
+        manager.close()
+
+
+def test_write_queue_close_commits_pending(tmp_path):
+    db_path = tmp_path / "write_queue_close.db"
+    manager = DatabaseManager(str(db_path))
+    writer = SpectrumWriteQueue(manager, max_batch_rows=100, max_batch_interval_ms=10_000)
+    try:
+        project_id = manager.find_or_create_project("Write Queue", "")
+        exp_id = manager.create_experiment(project_id, "Exp", "Batch Measurement", "2025-01-01 00:00:00")
+        future = writer.submit(exp_id, "Background", "2025-01-01 00:00:00", [1.0, 2.0], [3.0, 4.0])
+        writer.close(timeout=5)
+        assert future.result(timeout=1)
+        spectra = manager.get_spectra_for_experiments([exp_id])
+        np.testing.assert_array_equal(spectra[0]["y"], [3.0, 4.0])
+    finally:
+        manager.close()